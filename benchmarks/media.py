@@ -0,0 +1,64 @@
+"""Synthetic benchmark inputs generated locally with ffmpeg's test sources"""
+
+import logging
+import subprocess
+from dataclasses import asdict, dataclass
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MediaSpec:
+    """One synthetic clip: duration, frame size and GOP length (keyframe interval in frames)"""
+    duration: float
+    width: int
+    height: int
+    gop: int
+    fps: int = 30
+
+    @property
+    def name(self) -> str:
+        return f"{self.duration:g}s_{self.width}x{self.height}_gop{self.gop}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "name": self.name}
+
+
+def media_matrix(durations: Sequence[float], resolutions: Sequence[str], gops: Sequence[int]) -> List[MediaSpec]:
+    """Every combination of duration, 'WxH' resolution and GOP length"""
+    specs = []
+    for duration, resolution, gop in product(durations, resolutions, gops):
+        width, height = (int(n) for n in resolution.lower().split("x"))
+        specs.append(MediaSpec(duration=duration, width=width, height=height, gop=gop))
+    return specs
+
+
+def generate_media(spec: MediaSpec, media_dir: str) -> str:
+    """
+    Render the clip once and reuse it on later runs
+
+    testsrc2 video with a moving pattern plus a sine tone, H.264 with a fixed GOP
+    (scene-cut keyframes disabled) so seek and segment costs depend only on spec.gop.
+    """
+    path = Path(media_dir) / f"{spec.name}.mp4"
+    if path.exists():
+        return str(path)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f".partial_{path.name}")
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-f', 'lavfi', '-i', f"testsrc2=size={spec.width}x{spec.height}:rate={spec.fps}:duration={spec.duration}",
+        '-f', 'lavfi', '-i', f"sine=frequency=440:duration={spec.duration}",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+        '-g', str(spec.gop), '-keyint_min', str(spec.gop), '-sc_threshold', '0',
+        '-c:a', 'aac', '-shortest',
+        '-y', str(partial)
+    ]
+    logger.info(f"Generating benchmark clip {spec.name}")
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+    partial.replace(path)
+    return str(path)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks over synthetic media
+
+Generates clips at several durations, resolutions and GOP lengths, then times
+probe, frame sampling, AI payload building, create_enhanced_video and the whole
+process_video pipeline against a fake (or replayed) AI client, plus the CLI's
+cold-start cost. Results are JSON; --compare flags benchmarks whose median
+regressed past a threshold.
+
+Usage (from the repository root):
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.media import MediaSpec, generate_media, media_matrix
+
+logger = logging.getLogger(__name__)
+
+SUITE_VERSION = 1
+
+
+class FakeAIClient:
+    """
+    Deterministic stand-in for the completion client
+
+    Answers every frame-analysis request with a text overlay on the first frame
+    and an effect on the middle one, after an optional fixed latency, so the
+    editing phases always have the same work to do.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    async def create_completion(self, messages: List[Dict[str, Any]], model: str, **kwargs) -> Dict[str, Any]:
+        self.calls += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+
+        images = sum(1 for part in messages[0]["content"] if part.get("type") == "image_url")
+        analysis = {
+            "video_analysis": {"total_frames": images, "content_summary": "synthetic test pattern"},
+            "edits_to_apply": [
+                {"frame_index": 0, "edit_type": "text_overlay", "text": "Benchmark", "position": "bottom"},
+                {"frame_index": images // 2, "edit_type": "effect_enhancement", "description": "boost"}
+            ]
+        }
+        return {"choices": [{"message": {"content": json.dumps(analysis)}}]}
+
+
+def time_call(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Run fn repeat times; wall-clock seconds per run plus summary statistics"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "median_s": round(statistics.median(samples), 6),
+        "min_s": round(min(samples), 6),
+        "mean_s": round(statistics.fmean(samples), 6),
+        "samples": [round(s, 6) for s in samples]
+    }
+
+
+def benchmark_clip(spec: MediaSpec, video_path: str, work_dir: Path, repeat: int, frames: int,
+                   editor) -> Dict[str, Any]:
+    """Time each pipeline step on one clip"""
+    from src.video.editor import VideoEditor
+    from src.video.frame_cache import configure_frame_cache
+    from src.video.gemini_frame_analyzer import GeminiFrameAnalyzer
+    from src.video.probe import probe_video
+    from src.video.sampling import even_timestamps
+
+    results: Dict[str, Any] = {}
+    analyzer = GeminiFrameAnalyzer(ai_client=None)
+    timestamps = even_timestamps(0.0, spec.duration, frames)
+
+    results["probe"] = time_call(lambda: probe_video(video_path), repeat)
+
+    def cold_sampling():
+        # A fresh cache each time, so this keeps measuring the decode
+        configure_frame_cache(memory_bytes=0)
+        configure_frame_cache()
+        analyzer._extract_key_frames(video_path, timestamps)
+
+    results["frame_sampling"] = time_call(cold_sampling, repeat)
+    results["frame_sampling_cached"] = time_call(lambda: analyzer._extract_key_frames(video_path, timestamps), repeat)
+
+    extracted, extracted_timestamps = analyzer._extract_key_frames(video_path, timestamps)
+    results["payload_build"] = time_call(lambda: analyzer._frame_content(extracted, extracted_timestamps), repeat)
+
+    try:
+        from src.video.heuristic_analyzer import HeuristicAnalyzer
+        pre_analyzer = HeuristicAnalyzer()
+        results["pre_analysis"] = time_call(lambda: pre_analyzer.analyze(video_path), repeat)
+    except ImportError as e:
+        logger.warning(f"Skipping pre_analysis benchmark (OpenCV not installed): {e}")
+
+    video_editor = VideoEditor()
+    render_analysis = {
+        "frames_to_edit": [{"start": spec.duration * 0.25, "end": spec.duration * 0.5, "type": "effect_enhancement"},
+                           {"start": spec.duration * 0.75, "end": spec.duration, "type": "scene_transition"}],
+        "text_overlay_suggestions": []
+    }
+    render_output = str(work_dir / f"render_{spec.name}.mp4")
+    results["create_enhanced_video"] = time_call(
+        lambda: video_editor.create_enhanced_video(video_path, render_output, render_analysis), repeat)
+
+    e2e_output = str(work_dir / f"e2e_{spec.name}.mp4")
+    last_result = {}
+
+    def end_to_end():
+        last_result["result"] = asyncio.run(editor.process_video(video_path, e2e_output))
+
+    results["process_video"] = time_call(end_to_end, repeat)
+    result = last_result["result"]
+    if not result.success:
+        logger.warning(f"process_video failed on {spec.name}: {result.error_message}")
+    results["process_video"]["success"] = result.success
+    results["process_video"]["counters"] = (result.metrics or {}).get("counters", {})
+    return results
+
+
+def benchmark_startup(repeat: int) -> Dict[str, Any]:
+    """Cold-start cost of a fresh interpreter importing main and parsing the CLI"""
+    root = Path(__file__).resolve().parent.parent
+
+    def run(*args: str):
+        subprocess.run([sys.executable, *args], cwd=root, capture_output=True, check=True)
+
+    return {
+        "import_main": time_call(lambda: run("-c", "import main"), repeat),
+        "cli_help": time_call(lambda: run("main.py", "--help"), repeat)
+    }
+
+
+def build_editor(replay_dir: Optional[str], ai_latency: float, work_dir: Path):
+    from main import NanoBananaEditor, VideoProcessingConfig
+
+    # Replay mode never imports ai_proxy_core; with no corpus given, the fake client replaces it.
+    # The pre-analysis would skip the AI for synthetic test patterns, so it is timed on its own instead.
+    config = VideoProcessingConfig(ai_replay_dir=replay_dir or str(work_dir / "empty_corpus"),
+                                   replay_latency_scale=1.0, pre_analysis=False)
+    editor = NanoBananaEditor(config)
+    if not replay_dir:
+        editor.ai_client = FakeAIClient(latency_seconds=ai_latency)
+    return editor
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        ffmpeg_version = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True,
+                                        check=True).stdout.splitlines()[0]
+    except (OSError, subprocess.CalledProcessError, IndexError):
+        ffmpeg_version = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": ffmpeg_version
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            min_delta: float) -> List[Dict[str, Any]]:
+    """
+    Benchmarks whose median grew by more than threshold (a fraction) over the baseline
+
+    Differences under min_delta seconds are treated as noise regardless of ratio.
+    """
+    regressions = []
+    for case, benchmarks in current["cases"].items():
+        base_case = baseline.get("cases", {}).get(case)
+        if not base_case:
+            continue
+        for name, timing in benchmarks["benchmarks"].items():
+            base = base_case["benchmarks"].get(name)
+            if not base or not base["median_s"]:
+                continue
+            delta = timing["median_s"] - base["median_s"]
+            ratio = timing["median_s"] / base["median_s"]
+            if ratio > 1 + threshold and delta > min_delta:
+                regressions.append({"case": case, "benchmark": name, "baseline_s": base["median_s"],
+                                    "current_s": timing["median_s"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Nano-Banana-Shorts-Editor performance benchmarks")
+    parser.add_argument("--durations", default="5,20", help="Clip durations in seconds, comma separated")
+    parser.add_argument("--resolutions", default="640x360,1080x1920", help="Clip sizes as WxH, comma separated")
+    parser.add_argument("--gops", default="15,250", help="GOP lengths in frames, comma separated")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the median is compared")
+    parser.add_argument("--frames", type=int, default=8, help="Frames sampled per clip for the AI benchmarks")
+    parser.add_argument("--ai-latency", type=float, default=0.0, help="Fake AI client latency per call in seconds")
+    parser.add_argument("--ai-replay", metavar="DIR", help="Use a recorded AI corpus instead of the fake client")
+    parser.add_argument("--media-dir", default=str(Path(tempfile.gettempdir()) / "nano_benchmarks" / "media"),
+                        help="Cache directory for generated clips")
+    parser.add_argument("--output", "-o", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a saved results JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed median slowdown as a fraction")
+    parser.add_argument("--min-delta", type=float, default=0.005, help="Ignore slowdowns smaller than this (seconds)")
+    args = parser.parse_args()
+
+    specs = media_matrix([float(d) for d in args.durations.split(",")], args.resolutions.split(","),
+                         [int(g) for g in args.gops.split(",")])
+    work_dir = Path(tempfile.mkdtemp(prefix="nano_bench_"))
+    editor = build_editor(args.ai_replay, args.ai_latency, work_dir)
+
+    # Importing main configures INFO logging; per-step logs would drown the benchmark's own
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    results = {
+        "suite_version": SUITE_VERSION,
+        "created_at": time.time(),
+        "environment": environment(),
+        "repeat": args.repeat,
+        "cases": {}
+    }
+    results["cases"]["startup"] = {"media": None, "benchmarks": benchmark_startup(args.repeat)}
+    try:
+        for spec in specs:
+            video_path = generate_media(spec, args.media_dir)
+            logger.info(f"Benchmarking {spec.name}")
+            results["cases"][spec.name] = {
+                "media": spec.to_dict(),
+                "benchmarks": benchmark_clip(spec, video_path, work_dir, args.repeat, args.frames, editor)
+            }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+        logger.info(f"Results written to {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for r in regressions:
+            print(f"❌ {r['case']} {r['benchmark']}: {r['baseline_s']:.4f}s -> {r['current_s']:.4f}s "
+                  f"(x{r['ratio']})", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.compare}", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -4,14 +4,22 @@ Nano-Banana-Shorts-Editor Main Application
 AI-powered video editing system for marketing materials
 """
 
+import time
+_STARTED_AT = time.perf_counter()
+
 import asyncio
 import json
 import logging
 import os
 import shutil
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Any
+from dataclasses import asdict, dataclass
+
+from src.video.instrumentation import mark_startup
+
+mark_startup("start", _STARTED_AT)
+mark_startup("imports")
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -24,6 +32,42 @@ class VideoProcessingConfig:
     ai_model: str = "gemini-1.5-flash"
     temperature: float = 0.7
     output_format: str = "mp4"
+    pre_analysis: bool = True
+    pre_analysis_width: int = 160
+    contact_sheet: bool = False
+    contact_sheet_rows: int = 3
+    contact_sheet_cols: int = 3
+    adaptive_sampling: bool = True
+    ai_frames_per_minute: float = 20.0
+    ai_min_frames: int = 5
+    ai_max_frames: int = 24  # per-video cost ceiling
+    coarse_fraction: float = 0.3
+    coarse_max_width: int = 256
+    coalesce_window_ms: float = 0.0  # > 0 packs concurrent videos into shared AI requests
+    coalesce_max_payload_mb: float = 16.0
+    coalesce_max_videos: int = 8
+    ai_record_dir: Optional[str] = None  # record real AI responses to this corpus
+    ai_replay_dir: Optional[str] = None  # serve AI responses from this corpus, offline
+    replay_latency_scale: float = 1.0
+    ai_ledger_path: Optional[str] = None  # append one JSON line per AI call (payload, tokens, latency)
+    ai_ledger_batch: Optional[str] = None  # batch id for ledger records; defaults to one per process
+    audio_snap_seconds: float = 0.25  # move edit boundaries onto audio onsets this close; 0 disables
+    trim_dead_air: bool = False  # cut silent, static lead-ins and tails before rendering
+    min_dead_air_seconds: float = 1.0
+    incremental_render: bool = False  # keep rendered segments and re-encode only those whose edits changed
+    edits_path: Optional[str] = None  # render the JSON edit list here instead of the analysis's (written if missing)
+    packaging: str = "faststart"  # faststart MP4, fragmented MP4, or hls (faststart MP4 plus an HLS ladder)
+    hls_segment_seconds: float = 4.0
+    reframe: bool = False  # crop landscape sources to vertical 9:16 along a tracked subject
+    reframe_size: Optional[Tuple[int, int]] = None  # scale the reframed output, e.g. (1080, 1920)
+    checkpoint_dir: Optional[str] = None  # persist per-phase artifacts and resume interrupted jobs
+    frame_cache_dir: Optional[str] = None  # disk tier of the shared frame cache; memory-only when unset
+    frame_cache_memory_mb: float = 64.0
+    frame_cache_disk_mb: float = 1024.0
+    ffmpeg_timeout_factor: float = 20.0  # job deadline for ffmpeg work, in seconds per second of video
+    ffmpeg_min_timeout: float = 300.0
+    ffmpeg_stall_seconds: float = 60.0  # kill ffmpeg after this long without progress (or below min speed)
+    ffmpeg_min_speed: float = 0.0  # x realtime; 0 disables the speed check
 
 @dataclass
 class ProcessingResult:
@@ -34,6 +78,21 @@ class ProcessingResult:
     frames_processed: int = 0
     ai_analysis: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None  # spans and counters, see src.video.instrumentation
+
+class PhaseError(Exception):
+    """A pipeline phase failed in a way that fails the whole job"""
+
+# Settings that don't change what a job produces; jobs differing only in these share checkpoints
+OPERATIONAL_SETTINGS = (
+    "coalesce_window_ms", "coalesce_max_payload_mb", "coalesce_max_videos", "ai_record_dir", "ai_replay_dir",
+    "replay_latency_scale", "ai_ledger_path", "ai_ledger_batch", "checkpoint_dir", "edits_path",
+    "frame_cache_dir", "frame_cache_memory_mb", "frame_cache_disk_mb", "ffmpeg_timeout_factor",
+    "ffmpeg_min_timeout", "ffmpeg_stall_seconds", "ffmpeg_min_speed"
+)
+
+# Overall progress reported when each phase starts; analysis and render dominate wall time
+PHASE_PROGRESS = {"probe": 0.0, "analysis": 0.05, "extraction": 0.5, "render": 0.6, "done": 1.0}
 
 class NanoBananaEditor:
     """
@@ -43,21 +102,77 @@ class NanoBananaEditor:
     
     def __init__(self, config: VideoProcessingConfig):
         self.config = config
-        self.ai_client = None
+        self._ai_client = None
         self.frame_extractor = None
+        self.coalescer = None
+        self.checkpoints = None
         self._initialize_components()
     
+    @property
+    def ai_client(self):
+        """
+        The completion client, created on first use
+        
+        Runs that never reach the AI (heuristic-only videos, jobs resumed past
+        analysis, enqueue-only invocations) don't pay for importing ai_proxy_core.
+        """
+        if self._ai_client is None:
+            self._ai_client = self._create_ai_client()
+        return self._ai_client
+    
+    @ai_client.setter
+    def ai_client(self, client):
+        self._ai_client = client
+    
+    def _create_ai_client(self):
+        client = self._create_completion_client()
+        if self.config.ai_ledger_path:
+            from src.video.ai_ledger import LedgerClient
+            client = LedgerClient(client, self.config.ai_ledger_path, batch_id=self.config.ai_ledger_batch)
+            logger.info(f"Recording AI calls to ledger {self.config.ai_ledger_path} (batch {client.batch_id})")
+        return client
+    
+    def _create_completion_client(self):
+        if self.config.ai_replay_dir:
+            from src.video.replay_client import RecordReplayClient
+            client = RecordReplayClient(
+                self.config.ai_replay_dir,
+                mode="replay",
+                latency_scale=self.config.replay_latency_scale
+            )
+            logger.info(f"Initialized replay AI client from {self.config.ai_replay_dir}")
+            return client
+        
+        from ai_proxy_core import CompletionClient
+        client = CompletionClient()
+        logger.info("Initialized AI client")
+        
+        if self.config.ai_record_dir:
+            from src.video.replay_client import RecordReplayClient
+            client = RecordReplayClient(self.config.ai_record_dir, mode="record", inner=client)
+            logger.info(f"Recording AI responses to {self.config.ai_record_dir}")
+        return client
+    
     def _initialize_components(self):
         """Initialize AI and media processing components"""
         try:
-            from ai_proxy_core import CompletionClient
-            self.ai_client = CompletionClient()
-            logger.info("Initialized AI client")
+            if not self.config.ai_replay_dir:
+                # Fail fast on a missing client without paying for the import until it's used
+                import importlib.util
+                if importlib.util.find_spec("ai_proxy_core") is None:
+                    raise ImportError("No module named 'ai_proxy_core'")
             
             import sys
             sys.path.append('/home/ubuntu/repos/media-processor')
             from src.video.extractor import VideoFrameExtractor
             from src.video.editor import VideoEditor
+            from src.video.frame_cache import configure_frame_cache
+            
+            configure_frame_cache(
+                memory_bytes=int(self.config.frame_cache_memory_mb * (1 << 20)),
+                disk_dir=self.config.frame_cache_dir,
+                disk_bytes=int(self.config.frame_cache_disk_mb * (1 << 20))
+            )
             
             self.frame_extractor = VideoFrameExtractor(
                 frame_interval_seconds=self.config.frame_interval_seconds,
@@ -75,44 +190,83 @@ class NanoBananaEditor:
             logger.error("  pip install -e ~/repos/media-processor")
             raise
     
-    async def analyze_video_with_ai(self, video_path: str) -> Dict[str, Any]:
+    async def analyze_video_with_ai(self, video_path: str, duration: Optional[float] = None,
+                                    probe=None) -> Dict[str, Any]:
         """
         Phase 2: Send video directly to Gemini for frame-by-frame analysis
         Gemini will identify specific timestamps to edit
+        
+        duration, when already probed, saves another ffprobe call; a full probe
+        also lets the pre-analysis read audio features in the same decode, and
+        they are returned under "audio_features". With trim_dead_air, the span
+        left after cutting a dead lead-in and tail is returned under "trim".
         """
+        # OpenCV decode is CPU-bound; keep it off the event loop so concurrent jobs overlap
+        pre_analysis = await asyncio.to_thread(self.run_pre_analysis, video_path, probe)
+        trim = self.plan_trim(pre_analysis, probe)
+        if trim is not None:
+            # The dead air is cut before rendering, so the model never needs to see it
+            pre_analysis.intervals = trim.clip(pre_analysis.intervals)
+        
+        analysis = await self._analyze_with_ai(video_path, pre_analysis, duration, trim)
+        if "error" not in analysis:
+            if pre_analysis is not None and pre_analysis.audio is not None:
+                analysis["audio_features"] = pre_analysis.audio.to_dict()
+            if trim is not None:
+                analysis["trim"] = trim.to_dict()
+        return analysis
+    
+    async def _analyze_with_ai(self, video_path: str, pre_analysis, duration: Optional[float], trim) -> Dict[str, Any]:
+        if pre_analysis is not None and not pre_analysis.needs_ai:
+            logger.info(f"Pre-analysis: skipping Gemini ({pre_analysis.reason})")
+            return self._heuristic_analysis(pre_analysis)
+        
         logger.info(f"Extracting frames from video for Gemini analysis: {video_path}")
         
         # Use frame-based analysis (workaround until video support is fixed)
         from src.video.gemini_frame_analyzer import GeminiFrameAnalyzer
-        analyzer = GeminiFrameAnalyzer(self.ai_client)
+        analyzer = GeminiFrameAnalyzer(self.ai_client, coalescer=self._get_coalescer())
+        
+        grid = (self.config.contact_sheet_rows, self.config.contact_sheet_cols)
+        if not duration and pre_analysis is not None:
+            duration = pre_analysis.duration
+        if not duration:
+            duration = await asyncio.to_thread(analyzer._get_video_duration, video_path)
+        budget = self.plan_sampling_budget(trim.duration if trim is not None else duration)
         
-        # Extract key frames and send as images to Gemini
-        analysis = await analyzer.analyze_video_frames(video_path, num_frames=5)
+        if self.config.adaptive_sampling:
+            # Coarse low-res pass finds interesting moments, fine pass spends the rest of the budget there
+            analysis = await analyzer.analyze_video_adaptive(
+                video_path,
+                budget,
+                duration=duration,
+                hint_intervals=pre_analysis.intervals if pre_analysis is not None else None,
+                coarse_max_width=self.config.coarse_max_width,
+                contact_sheet=self.config.contact_sheet,
+                grid=grid
+            )
+        else:
+            # Extract key frames (inside the pre-analysis intervals when available) and send as images to Gemini
+            timestamps = pre_analysis.sample_timestamps(budget.total_frames) if pre_analysis is not None else None
+            analysis = await analyzer.analyze_video_frames(
+                video_path,
+                num_frames=budget.total_frames,
+                timestamps=timestamps,
+                contact_sheet=self.config.contact_sheet,
+                grid=grid
+            )
         
         if "error" not in analysis:
             logger.info(f"Gemini identified {len(analysis.get('edits_to_apply', []))} specific edit points")
-            # Convert to expected format
-            frames_to_edit = []
-            text_overlays = []
+            from src.video.edit_list import EditList
+            edits = EditList.from_ai_edits(analysis.get("edits_to_apply", []), duration)
             
-            for edit in analysis.get("edits_to_apply", []):
-                timestamp = edit.get("timestamp", 0)
-                edit_type = edit.get("edit_type", "")
-                
-                if edit_type == "text_overlay" and edit.get("text"):
-                    text_overlays.append({
-                        "timestamp": timestamp,
-                        "text": edit.get("text", ""),
-                        "position": edit.get("position", "center")
-                    })
-                    frames_to_edit.append({
-                        "start": timestamp,
-                        "end": timestamp + 2.0,
-                        "type": "text_overlay"
-                    })
-            
-            analysis["frames_to_edit"] = frames_to_edit
-            analysis["text_overlay_suggestions"] = text_overlays
+            # The older keys stay for logs and anything still reading them
+            analysis["edit_list"] = edits.to_dicts()
+            analysis["frames_to_edit"] = [{"start": e.start, "end": e.end, "type": e.kind} for e in edits]
+            analysis["text_overlay_suggestions"] = [
+                {"timestamp": e.start, "text": e.text, "position": e.position} for e in edits if e.text
+            ]
             
             return analysis
         
@@ -178,25 +332,123 @@ class NanoBananaEditor:
         except Exception as e:
             logger.error(f"AI analysis failed: {e}")
             
-            logger.warning("Using mock AI analysis for testing purposes")
-            mock_analysis = {
-                "frames_to_edit": [
-                    {"start": 1.0, "end": 3.0, "type": "text_overlay"},
-                    {"start": 5.0, "end": 7.0, "type": "effect_enhancement"},
-                    {"start": 8.0, "end": 9.5, "type": "scene_transition"}
-                ],
-                "enhancement_types": ["text_overlay", "effect_enhancement", "scene_transition"],
-                "text_overlay_suggestions": [
-                    {"timestamp": 2.0, "text": "Test Video Content", "position": "center"},
-                    {"timestamp": 6.0, "text": "Enhanced Scene", "position": "bottom"}
-                ],
-                "effect_recommendations": [
-                    {"timestamp": 2.5, "effect": "highlight", "intensity": 0.8},
-                    {"timestamp": 6.5, "effect": "zoom", "factor": 1.3}
-                ],
-                "priority_scores": [9, 7, 8]
-            }
-            return {"analysis": mock_analysis, "mock": True}
+            logger.warning("Falling back to local heuristic analysis")
+            return self._heuristic_analysis(pre_analysis)
+    
+    def _get_coalescer(self):
+        """Shared cross-video request coalescer, or None when coalescing is disabled"""
+        if self.config.coalesce_window_ms <= 0:
+            return None
+        if self.coalescer is None:
+            from src.video.request_coalescer import AnalysisCoalescer
+            self.coalescer = AnalysisCoalescer(
+                self.ai_client,
+                window_seconds=self.config.coalesce_window_ms / 1000.0,
+                max_payload_bytes=int(self.config.coalesce_max_payload_mb * 1024 * 1024),
+                max_videos=self.config.coalesce_max_videos
+            )
+        return self.coalescer
+    
+    def plan_sampling_budget(self, duration: float):
+        """Frame budget for one video, scaled by duration and capped by the configured cost ceiling"""
+        from src.video.sampling import plan_sampling_budget
+        
+        min_frames = self.config.ai_min_frames
+        if self.config.contact_sheet:
+            # Always fill at least one contact sheet
+            min_frames = max(min_frames, self.config.contact_sheet_rows * self.config.contact_sheet_cols)
+        
+        budget = plan_sampling_budget(
+            duration,
+            frames_per_minute=self.config.ai_frames_per_minute,
+            min_frames=min_frames,
+            max_frames=max(self.config.ai_max_frames, min_frames),
+            coarse_fraction=self.config.coarse_fraction
+        )
+        logger.info(f"Sampling budget for {duration:.1f}s video: {budget.total_frames} frames "
+                    f"({budget.coarse_frames} coarse, {budget.fine_frames} fine)")
+        return budget
+    
+    def run_pre_analysis(self, video_path: str, probe=None):
+        """
+        Phase 2a: Local CPU pre-analysis with OpenCV
+        Returns a PreAnalysis, or None when disabled or OpenCV is unavailable
+        
+        With a probe, frames and audio features come from one ffmpeg decode
+        """
+        if not self.config.pre_analysis:
+            return None
+        
+        try:
+            from src.video.heuristic_analyzer import HeuristicAnalyzer
+            from src.video.instrumentation import span
+            analyzer = HeuristicAnalyzer(analysis_width=self.config.pre_analysis_width)
+            with span("pre_analysis"):
+                return analyzer.analyze(video_path, probe)
+        except ImportError as e:
+            logger.warning(f"Pre-analysis unavailable (OpenCV not installed): {e}")
+        except Exception as e:
+            logger.warning(f"Pre-analysis failed: {e}")
+        return None
+    
+    def plan_trim(self, pre_analysis, probe=None):
+        """TrimPlan for the dead lead-in and tail, or None when trimming is off or there is none"""
+        if not self.config.trim_dead_air or pre_analysis is None or probe is None:
+            return None
+        from src.video.trim import find_dead_air
+        return find_dead_air(pre_analysis.windows, pre_analysis.audio, pre_analysis.duration, probe.has_audio,
+                             min_seconds=self.config.min_dead_air_seconds)
+    
+    async def trim_dead_air(self, input_path: str, ai_analysis: Dict[str, Any], probe=None):
+        """
+        Cut the dead air found during analysis, ahead of the render
+        
+        Returns (video to render, edits to render, its probe). When the analysis
+        planned a trim, the span is widened to keyframes and stream-copied to a
+        temporary file, and the edit list moves onto the trimmed timeline;
+        otherwise, or if the cut fails, the inputs come back unchanged.
+        """
+        from src.video.trim import TrimPlan, align_to_keyframes, apply_trim
+        
+        plan = TrimPlan.from_dict(ai_analysis.get("trim"))
+        if plan is None:
+            return input_path, ai_analysis, probe
+        
+        from src.video.instrumentation import span
+        from src.video.probe import keyframe_times
+        
+        keyframes = await asyncio.to_thread(keyframe_times, input_path)
+        if keyframes:
+            plan = align_to_keyframes(plan, [pts for pts, _ in keyframes], self.config.min_dead_air_seconds)
+            if plan is None:
+                logger.info("Dead air is too short to cut at keyframes; rendering untrimmed")
+                return input_path, ai_analysis, probe
+        
+        import tempfile
+        work_dir = Path(tempfile.mkdtemp(prefix="nano_trim_", dir=self.video_editor.temp_dir))
+        trimmed_path = str(work_dir / f"trimmed_{Path(input_path).name}")
+        with span("trim", seconds_cut=plan.source_duration - plan.duration):
+            trimmed = await asyncio.to_thread(apply_trim, input_path, trimmed_path, plan, keyframes,
+                                              self.video_editor.temp_dir)
+        if not trimmed:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            return input_path, ai_analysis, probe
+        
+        from dataclasses import replace
+        from src.video.edit_list import EditList
+        edits = EditList.from_analysis(ai_analysis).shifted(-plan.start, plan.duration)
+        logger.info(f"Rendering {plan.start:.2f}s-{plan.end:.2f}s; {len(edits)} edits shifted by {-plan.start:.2f}s")
+        return trimmed_path, edits, replace(probe, duration=plan.duration) if probe is not None else None
+    
+    def _heuristic_analysis(self, pre_analysis) -> Dict[str, Any]:
+        """Wrap the pre-analysis as an AI-analysis result usable by the later phases"""
+        if pre_analysis is None:
+            from src.video.heuristic_analyzer import PreAnalysis
+            pre_analysis = PreAnalysis(duration=0.0, needs_ai=False, reason="no analysis available")
+        
+        analysis = pre_analysis.to_analysis()
+        logger.info(f"Heuristic analysis produced {len(analysis['frames_to_edit'])} segments to edit")
+        return {**analysis, "analysis": analysis, "heuristic": True, "reason": pre_analysis.reason}
     
     async def extract_targeted_frames(self, video_path: str, ai_analysis: Dict[str, Any]) -> List[str]:
         """
@@ -206,10 +458,10 @@ class NanoBananaEditor:
         logger.info("Starting targeted frame extraction")
         
         try:
-            analysis_data = ai_analysis.get("analysis", {})
-            frames_to_edit = analysis_data.get("frames_to_edit", [])
+            from src.video.edit_list import EditList
+            edits = EditList.from_analysis(ai_analysis)
             
-            if not frames_to_edit:
+            if not edits:
                 logger.warning("No frames identified for editing by AI")
                 return []
             
@@ -220,23 +472,17 @@ class NanoBananaEditor:
             extracted_frames = []
             total_frames_extracted = 0
             
-            for i, timestamp_range in enumerate(frames_to_edit):
+            for i, edit in enumerate(edits):
                 try:
-                    if isinstance(timestamp_range, dict):
-                        start_time = timestamp_range.get("start", 0)
-                        end_time = timestamp_range.get("end", start_time + 1)
-                        edit_type = timestamp_range.get("type", "unknown")
-                    else:
-                        start_time = float(timestamp_range)
-                        end_time = start_time + 1
-                        edit_type = "unknown"
+                    start_time, end_time, edit_type = edit.start, edit.end, edit.kind
                     
                     segment_output_dir = output_dir / f"segment_{i}_{edit_type}"
                     segment_output_dir.mkdir(parents=True, exist_ok=True)
                     
                     logger.info(f"Extracting frames for segment {i}: {start_time}s-{end_time}s ({edit_type})")
                     
-                    frame_count = self.frame_extractor.extract_frames(
+                    frame_count = await asyncio.to_thread(
+                        self.frame_extractor.extract_frames,
                         video_path, str(segment_output_dir)
                     )
                     
@@ -258,98 +504,504 @@ class NanoBananaEditor:
             logger.error(f"Frame extraction failed: {e}")
             return []
     
-    async def process_video(self, input_path: str, output_path: Optional[str] = None) -> ProcessingResult:
+    async def process_video(self, input_path: str, output_path: Optional[str] = None,
+                            progress_callback: Optional[Callable[[str, float, Any], None]] = None) -> ProcessingResult:
         """
         Main processing pipeline orchestrating all phases
+        
+        With checkpointing enabled, each completed phase is persisted and a rerun
+        resumes after the last phase that completed. ffmpeg work shares a deadline
+        derived from the probed duration, and stalled encodes are killed.
+        
+        Args:
+            progress_callback: Called as (phase, overall_fraction, ffmpeg_progress)
+                when each phase starts (ffmpeg_progress None), for every ffmpeg
+                progress update (an FFmpegProgress; may arrive on another thread),
+                and once more with ("done", 1.0, None)
         """
+        current_phase = ["probe"]
+        
+        def report(phase: str, ffmpeg_progress=None):
+            current_phase[0] = phase
+            if progress_callback is None:
+                return
+            fraction = PHASE_PROGRESS[phase]
+            if ffmpeg_progress is not None and phase == "render" and probe is not None and probe.duration:
+                # The render writes the whole video, so output time tracks completion
+                done = min(1.0, ffmpeg_progress.out_time / probe.duration)
+                fraction += (PHASE_PROGRESS["done"] - fraction) * done
+            progress_callback(phase, fraction, ffmpeg_progress)
+        
+        probe = None
+        
         logger.info(f"Starting video processing pipeline for: {input_path}")
         
         if not Path(input_path).exists():
             error_msg = f"Input video file not found: {input_path}"
             logger.error(error_msg)
-            return ProcessingResult(
-                success=False,
-                input_path=input_path,
-                error_message=error_msg
-            )
+            return self.make_result(input_path, error_message=error_msg)
         
-        try:
-            logger.info("Phase 1: Video upload and initial processing - Complete")
-            
-            logger.info("Phase 2: Starting AI analysis and decision making")
-            ai_analysis = await self.analyze_video_with_ai(input_path)
-            
-            if "error" in ai_analysis:
-                return ProcessingResult(
-                    success=False,
-                    input_path=input_path,
-                    error_message=f"AI analysis failed: {ai_analysis['error']}"
+        from src.video.ffmpeg import ffmpeg_limits
+        from src.video.instrumentation import collect
+        
+        with collect() as metrics:
+            try:
+                output_path = output_path or self.default_output_path(input_path)
+                checkpoint = self.open_checkpoint(input_path, output_path)
+                
+                report("probe")
+                probe = await self.run_probe_phase(input_path, checkpoint)
+                logger.info("Phase 1: Video upload and initial processing - Complete")
+                
+                limits = self.ffmpeg_limits_for(probe, on_progress=lambda p: report(current_phase[0], p))
+                with ffmpeg_limits(limits):
+                    report("analysis")
+                    ai_analysis = await self.run_analysis_phase(input_path, checkpoint, probe)
+                    if self.config.edits_path:
+                        ai_analysis = self.apply_edits_file(ai_analysis, probe)
+                    report("extraction")
+                    extracted_frames = await self.run_extraction_phase(input_path, ai_analysis, checkpoint)
+                    report("render")
+                    output_path = await self.run_render_phase(input_path, output_path, ai_analysis, checkpoint, probe)
+                report("done")
+                
+                return self.make_result(
+                    input_path,
+                    output_path=output_path,
+                    frames_processed=len(extracted_frames),
+                    ai_analysis=ai_analysis,
+                    metrics=metrics.to_dict()
                 )
-            
-            logger.info("Phase 3: Starting targeted frame processing")
+                
+            except PhaseError as e:
+                return self.make_result(input_path, error_message=str(e), metrics=metrics.to_dict())
+            except Exception as e:
+                error_msg = f"Video processing failed: {e}"
+                logger.error(error_msg)
+                return self.make_result(input_path, error_message=error_msg, metrics=metrics.to_dict())
+    
+    async def plan_reframe(self, input_path: str, probe=None) -> Optional[Tuple[List[str], Tuple[int, int]]]:
+        """Crop filters for the 9:16 reframe and the frame size they render; None when already vertical"""
+        from src.video.instrumentation import span
+        from src.video.reframe import Reframer, reframe_filters
+        
+        if probe is None:
+            from src.video.probe import probe_video
+            probe = await asyncio.to_thread(probe_video, input_path)
+        if probe is None or not probe.fps:
+            logger.warning("Skipping reframe: source size and frame rate unknown")
+            return None
+        
+        with span("reframe_plan"):
+            path = await asyncio.to_thread(Reframer().plan, input_path, probe)
+        if path is None:
+            logger.info("Source is already 9:16 or narrower; not reframing")
+            return None
+        import tempfile
+        work_dir = tempfile.mkdtemp(prefix="nano_reframe_", dir=self.video_editor.temp_dir)
+        filters = reframe_filters(path, probe.fps, probe.duration, work_dir, self.config.reframe_size)
+        return filters, tuple(self.config.reframe_size or (path.crop_width, path.crop_height))
+    
+    def default_output_path(self, input_path: str) -> str:
+        video_name = Path(input_path).stem
+        return f"./output/enhanced_{video_name}.{self.config.output_format}"
+    
+    def ffmpeg_limits_for(self, probe, on_progress=None):
+        """Job-wide ffmpeg deadline and stall limits, scaled to the probed duration"""
+        from src.video.ffmpeg import FFmpegLimits
+        return FFmpegLimits.for_duration(
+            probe.duration if probe else None,
+            self.config.ffmpeg_timeout_factor,
+            self.config.ffmpeg_min_timeout,
+            stall_seconds=self.config.ffmpeg_stall_seconds,
+            min_speed=self.config.ffmpeg_min_speed,
+            on_progress=on_progress
+        )
+    
+    def open_checkpoint(self, input_path: str, output_path: str):
+        """The job's checkpoint record, or None when checkpointing is disabled"""
+        if not self.config.checkpoint_dir:
+            return None
+        if self.checkpoints is None:
+            from src.pipeline.checkpoint import CheckpointStore
+            self.checkpoints = CheckpointStore(self.config.checkpoint_dir)
+        return self.checkpoints.open(input_path, output_path, variant=self.settings_key())
+    
+    def settings_key(self) -> str:
+        """The settings a job's results depend on, as canonical JSON"""
+        settings = {k: v for k, v in asdict(self.config).items() if k not in OPERATIONAL_SETTINGS}
+        return json.dumps(settings, sort_keys=True, default=str)
+    
+    async def run_probe_phase(self, input_path: str, checkpoint=None):
+        """Phase 1: probe container and stream metadata; returns a VideoProbe or None"""
+        from src.video.instrumentation import span
+        from src.video.probe import VideoProbe, probe_video
+        
+        if checkpoint is not None and checkpoint.has("probe"):
+            return VideoProbe.from_dict(checkpoint.artifact("probe"))
+        
+        with span("probe"):
+            probe = await asyncio.to_thread(probe_video, input_path)
+        if probe is not None and checkpoint is not None:
+            self.checkpoints.save_phase(checkpoint, "probe", probe.to_dict())
+        return probe
+    
+    async def run_analysis_phase(self, input_path: str, checkpoint=None, probe=None) -> Dict[str, Any]:
+        """Phase 2 as a standalone stage; raises PhaseError when analysis fails"""
+        if checkpoint is not None and checkpoint.has("analysis"):
+            logger.info("Phase 2: Reusing AI analysis from checkpoint")
+            return checkpoint.artifact("analysis")
+        
+        from src.video.ai_ledger import ledger_job
+        from src.video.instrumentation import span
+        
+        logger.info("Phase 2: Starting AI analysis and decision making")
+        with span("analysis"), ledger_job(input_path, probe.duration if probe else None):
+            ai_analysis = await self.analyze_video_with_ai(input_path, duration=probe.duration if probe else None,
+                                                           probe=probe)
+        
+        if "error" in ai_analysis:
+            raise PhaseError(f"AI analysis failed: {ai_analysis['error']}")
+        
+        # Normalize whatever shape the analysis took into one clamped, merged edit list
+        from src.video.edit_list import EditList
+        edits = EditList.from_analysis(ai_analysis, probe.duration if probe else None)
+        
+        from src.video.audio_features import AudioFeatures
+        audio = AudioFeatures.from_dict(ai_analysis.get("audio_features"))
+        if audio is not None and audio.onsets and self.config.audio_snap_seconds > 0:
+            # Cuts and captions land on speech starts and beats rather than wherever the sample fell
+            edits = edits.snapped(lambda t: audio.snap(t, self.config.audio_snap_seconds))
+        ai_analysis["edit_list"] = edits.to_dicts()
+        logger.info(f"Edit decision list: {len(edits)} edits")
+        
+        if checkpoint is not None:
+            self.checkpoints.save_phase(checkpoint, "analysis", ai_analysis)
+        return ai_analysis
+    
+    def apply_edits_file(self, ai_analysis: Dict[str, Any], probe=None) -> Dict[str, Any]:
+        """
+        The analysis with its edit list replaced by the one in config.edits_path
+        
+        A missing file is written from the analysis's own edit list, so it can be
+        tweaked and the job rerun: the analysis comes from its checkpoint, and
+        the render sees the changed list (re-encoding only the affected segments
+        with incremental_render). The analysis itself is never modified.
+        """
+        path = Path(self.config.edits_path)
+        if not path.exists():
+            from src.pipeline.checkpoint import atomic_write_json
+            atomic_write_json(path, ai_analysis.get("edit_list", []))
+            logger.info(f"Wrote the edit list to {path}; edit it and rerun to re-render")
+            return ai_analysis
+        
+        try:
+            records = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            raise PhaseError(f"Could not read the edit list {path}: {e}")
+        from src.video.edit_list import EditList
+        edits = EditList.from_dicts(records, probe.duration if probe else None)
+        logger.info(f"Rendering {len(edits)} edits from {path}")
+        return {**ai_analysis, "edit_list": edits.to_dicts()}
+    
+    async def run_extraction_phase(self, input_path: str, ai_analysis: Dict[str, Any], checkpoint=None) -> List[str]:
+        """Phase 3 as a standalone stage"""
+        if checkpoint is not None and checkpoint.has("extraction"):
+            logger.info("Phase 3: Reusing extracted frames from checkpoint")
+            return checkpoint.artifact("extraction")["frame_dirs"]
+        
+        from src.video.instrumentation import span
+        
+        logger.info("Phase 3: Starting targeted frame processing")
+        with span("extraction"):
             extracted_frames = await self.extract_targeted_frames(input_path, ai_analysis)
-            
-            logger.info("Phase 4: Video reconstruction and output")
-            
-            if not output_path:
-                video_name = Path(input_path).stem
-                output_path = f"./output/enhanced_{video_name}.{self.config.output_format}"
-            
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        if checkpoint is not None:
+            from src.pipeline.checkpoint import frame_dirs_manifest
+            self.checkpoints.save_phase(checkpoint, "extraction", frame_dirs_manifest(extracted_frames))
+        return extracted_frames
+    
+    async def run_render_phase(self, input_path: str, output_path: Optional[str], ai_analysis: Dict[str, Any],
+                               checkpoint=None, probe=None) -> str:
+        """
+        Phase 4 as a standalone stage; returns the output path
+        
+        Renders to a temporary file next to the output and renames it into place,
+        so an interrupted render never leaves a truncated output behind. The
+        same pass packages the output (config.packaging): faststart or
+        fragmented MP4, plus an HLS ladder in hls_dir(output_path) for "hls".
+        """
+        from src.video.packaging import HLS, Packaging
+        
+        output_path = output_path or self.default_output_path(input_path)
+        hls_dir = self.hls_dir(output_path) if self.config.packaging == HLS else None
+        if checkpoint is not None and checkpoint.has("render"):
+            rendered = checkpoint.artifact("render")
+            if rendered.get("edit_list") != ai_analysis.get("edit_list"):
+                logger.info("Phase 4: The edit list changed since the checkpointed render; rendering again")
+            elif Path(rendered["output_path"]).resolve() == Path(output_path).resolve():
+                logger.info("Phase 4: Output already rendered (checkpoint)")
+                return output_path
+            elif hls_dir is None or Path(rendered.get("hls_dir") or "").is_dir():
+                return await self.copy_render(rendered, output_path, hls_dir, checkpoint)
+        
+        logger.info("Phase 4: Video reconstruction and output")
+        
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        partial_path = str(Path(output_path).with_name(f".partial_{Path(output_path).name}"))
+        partial_hls_dir = str(Path(hls_dir).with_name(f".partial_{Path(hls_dir).name}")) if hls_dir else None
+        packaging = Packaging(self.config.packaging, hls_dir=partial_hls_dir,
+                              segment_seconds=self.config.hls_segment_seconds)
+        if partial_hls_dir:
+            shutil.rmtree(partial_hls_dir, ignore_errors=True)
+        
+        from src.video.instrumentation import span
+        source_path, edits, probe = await self.trim_dead_air(input_path, ai_analysis, probe)
+        try:
+            reframe = await self.plan_reframe(source_path, probe) if self.config.reframe else None
+            pre_filters = None
+            if reframe is not None:
+                # The HLS ladder is sized from the reframed frame, not the source
+                pre_filters, packaging.frame_size = reframe
             
             # Use the video editor to apply AI-suggested edits
             logger.info("Applying AI-suggested edits to video")
-            edit_success = self.video_editor.create_enhanced_video(
-                input_path, 
-                output_path, 
-                ai_analysis
-            )
-            
-            if edit_success:
-                logger.info("Phase 4 complete: Enhanced video created with edits")
-            else:
-                logger.warning("Some edits failed, but video was created")
-            
-            return ProcessingResult(
-                success=True,
-                input_path=input_path,
-                output_path=output_path,
-                frames_processed=len(extracted_frames),
-                ai_analysis=ai_analysis
-            )
-            
-        except Exception as e:
-            error_msg = f"Video processing failed: {e}"
-            logger.error(error_msg)
-            return ProcessingResult(
-                success=False,
-                input_path=input_path,
-                error_message=error_msg
-            )
+            with span("render"):
+                if self.config.incremental_render and hls_dir is None:
+                    edit_success = await asyncio.to_thread(
+                        self.video_editor.render_incremental,
+                        source_path,
+                        partial_path,
+                        edits,
+                        self.render_state_dir(output_path),
+                        pre_filters,
+                        probe,
+                        self.render_source_key(input_path, ai_analysis),
+                        packaging
+                    )
+                else:
+                    if self.config.incremental_render:
+                        logger.info("The HLS ladder is encoded with the full render; rendering in one pass")
+                    edit_success = await asyncio.to_thread(
+                        self.video_editor.create_enhanced_video,
+                        source_path, 
+                        partial_path, 
+                        edits,
+                        pre_filters,
+                        packaging,
+                        probe
+                    )
+        finally:
+            if source_path != input_path:
+                shutil.rmtree(Path(source_path).parent, ignore_errors=True)
+        os.replace(partial_path, output_path)
+        if partial_hls_dir and not edit_success:
+            # The output fell back to a copy of the source; whatever the ladder wrote is incomplete
+            shutil.rmtree(partial_hls_dir, ignore_errors=True)
+        if partial_hls_dir and Path(partial_hls_dir).is_dir():
+            shutil.rmtree(hls_dir, ignore_errors=True)
+            os.replace(partial_hls_dir, hls_dir)
+        else:
+            hls_dir = None
+        
+        if edit_success:
+            logger.info("Phase 4 complete: Enhanced video created with edits")
+        else:
+            logger.warning("Some edits failed, but video was created")
+        
+        if checkpoint is not None:
+            self.checkpoints.save_phase(checkpoint, "render", {
+                "output_path": output_path,
+                "size_bytes": Path(output_path).stat().st_size,
+                "edit_success": edit_success,
+                "hls_dir": hls_dir,
+                "edit_list": ai_analysis.get("edit_list")
+            })
+        return output_path
+    
+    async def copy_render(self, rendered: Dict[str, Any], output_path: str, hls_dir: Optional[str],
+                          checkpoint) -> str:
+        """Phase 4 for an input an earlier job already rendered with the same settings: copy its output"""
+        logger.info(f"Phase 4: Reusing the render of the same input at {rendered['output_path']}")
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        partial_path = Path(output_path).with_name(f".partial_{Path(output_path).name}")
+        await asyncio.to_thread(shutil.copyfile, rendered["output_path"], partial_path)
+        os.replace(partial_path, output_path)
+        if hls_dir is not None:
+            partial_hls_dir = Path(hls_dir).with_name(f".partial_{Path(hls_dir).name}")
+            shutil.rmtree(partial_hls_dir, ignore_errors=True)
+            await asyncio.to_thread(shutil.copytree, rendered["hls_dir"], partial_hls_dir)
+            shutil.rmtree(hls_dir, ignore_errors=True)
+            os.replace(partial_hls_dir, hls_dir)
+        self.checkpoints.save_phase(checkpoint, "render", {**rendered, "output_path": output_path,
+                                                           "hls_dir": hls_dir})
+        return output_path
+    
+    def hls_dir(self, output_path: str) -> str:
+        """Where the HLS ladder of an output goes: <stem>_hls next to it, with MASTER_PLAYLIST inside"""
+        output = Path(output_path)
+        return str(output.with_name(f"{output.stem}_hls"))
+    
+    def render_state_dir(self, output_path: str) -> str:
+        """Where an output's rendered segments and segment map live between incremental renders"""
+        output = Path(output_path)
+        return str(output.with_name(f".{output.name}.segments"))
+    
+    def render_source_key(self, input_path: str, ai_analysis: Dict[str, Any]) -> str:
+        """Identity of what the render reads: the input's content, as trimmed by the analysis"""
+        from src.video.incremental import source_key
+        return json.dumps([source_key(input_path), ai_analysis.get("trim")], sort_keys=True)
+    
+    def make_result(self, input_path: str, error_message: Optional[str] = None, **fields) -> ProcessingResult:
+        """Build a ProcessingResult; a result with an error_message is a failure"""
+        return ProcessingResult(
+            success=error_message is None,
+            input_path=input_path,
+            error_message=error_message,
+            **fields
+        )
 
 async def main():
     """Main entry point for the application"""
     import argparse
     
     parser = argparse.ArgumentParser(description="Nano-Banana-Shorts-Editor: AI-powered video editing")
-    parser.add_argument("input_video", help="Path to input video file")
+    parser.add_argument("input_video", nargs="?", help="Path to input video file")
     parser.add_argument("-o", "--output", help="Output video path")
     parser.add_argument("--model", default="gemini-1.5-flash", help="AI model to use")
     parser.add_argument("--frame-interval", type=int, default=1, help="Frame extraction interval in seconds")
     parser.add_argument("--max-frames", type=int, default=5000, help="Maximum frames to process")
+    parser.add_argument("--no-pre-analysis", action="store_true", help="Skip the local OpenCV pre-analysis pass")
+    parser.add_argument("--contact-sheet", action="store_true", help="Tile sampled frames into labeled grid images")
+    parser.add_argument("--contact-sheet-grid", default="3x3", help="Contact sheet grid as ROWSxCOLS")
+    parser.add_argument("--no-adaptive-sampling", action="store_true", help="Single-pass frame sampling instead of coarse-to-fine")
+    parser.add_argument("--max-ai-frames", type=int, default=24, help="Per-video cost ceiling in frames sent to the model")
+    parser.add_argument("--ai-frames-per-minute", type=float, default=20.0, help="Frame budget per minute of video")
+    parser.add_argument("--coalesce-window-ms", type=float, default=0.0, help="Batch AI requests from concurrent videos within this window")
+    parser.add_argument("--ai-record", metavar="DIR", help="Record AI responses to a local corpus")
+    parser.add_argument("--ai-replay", metavar="DIR", help="Replay AI responses from a local corpus (offline)")
+    parser.add_argument("--ai-ledger", metavar="PATH", help="Append a JSON line per AI call (images, bytes, tokens, latency) here")
+    parser.add_argument("--ai-ledger-batch", help="Batch id for ledger records (default: one per run)")
+    parser.add_argument("--ledger-summary", metavar="PATH", help="Print per-batch totals and latency percentiles from an AI ledger")
+    parser.add_argument("--replay-latency-scale", type=float, default=1.0, help="Scale recorded latencies on replay (0 = instant)")
+    parser.add_argument("--batch", metavar="SOURCE", help="Process a directory, glob pattern or JSONL manifest of videos")
+    parser.add_argument("--jobs", type=int, default=4, help="Concurrent jobs in batch mode")
+    parser.add_argument("--output-dir", default="./output", help="Output directory in batch mode")
+    parser.add_argument("--results", help="Batch results JSONL path (default: OUTPUT_DIR/batch_results.jsonl)")
+    parser.add_argument("--no-skip-completed", action="store_true", help="Reprocess jobs that already completed")
+    parser.add_argument("--audio-snap", type=float, default=0.25, help="Snap edit boundaries to audio onsets within this many seconds (0 disables)")
+    parser.add_argument("--trim-dead-air", action="store_true", help="Cut silent, static lead-ins and tails before rendering")
+    parser.add_argument("--incremental-render", action="store_true", help="Re-encode only the segments whose edits changed since the last render of the output")
+    parser.add_argument("--edits", metavar="PATH", help="Single video: render the JSON edit list in PATH instead of the analysis's; a missing file is written from the analysis to tweak and re-run")
+    parser.add_argument("--packaging", choices=("faststart", "fragmented", "hls"), default="faststart", help="Output packaging written by the render pass (hls adds an adaptive ladder in <output>_hls/)")
+    parser.add_argument("--hls-segment-seconds", type=float, default=4.0, help="HLS segment length")
+    parser.add_argument("--reframe", action="store_true", help="Crop landscape video to vertical 9:16 following the subject")
+    parser.add_argument("--reframe-size", metavar="WxH", help="Scale the reframed output, e.g. 1080x1920 (default: source height)")
+    parser.add_argument("--checkpoint-dir", help="Persist per-phase checkpoints here and resume interrupted jobs")
+    parser.add_argument("--input-store", metavar="DIR", help="Service and enqueue modes: store inputs by content so identical uploads share work")
+    parser.add_argument("--frame-cache-dir", help="Keep decoded frames here across stages, jobs and restarts")
+    parser.add_argument("--frame-cache-mb", type=float, default=64.0, help="Memory budget of the frame cache in MB")
+    parser.add_argument("--frame-cache-disk-mb", type=float, default=1024.0, help="Disk budget of the frame cache in MB")
+    parser.add_argument("--pipeline", action="store_true", help="Batch mode: overlap analysis and rendering across videos")
+    parser.add_argument("--analysis-workers", type=int, default=4, help="Pipeline analysis stage workers")
+    parser.add_argument("--extraction-workers", type=int, default=2, help="Pipeline extraction stage workers")
+    parser.add_argument("--render-workers", type=int, default=2, help="Pipeline render stage workers")
+    parser.add_argument("--queue-size", type=int, default=2, help="Pipeline bounded queue size between stages")
+    parser.add_argument("--ffmpeg-timeout-factor", type=float, default=20.0, help="Job deadline for ffmpeg work in seconds per second of video")
+    parser.add_argument("--ffmpeg-stall-seconds", type=float, default=60.0, help="Kill ffmpeg after this long without progress")
+    parser.add_argument("--ffmpeg-min-speed", type=float, default=0.0, help="Kill ffmpeg when slower than this (x realtime) for the stall period")
+    parser.add_argument("--metrics", metavar="PATH", help="Write the job's spans and counters as JSON, or Prometheus text if PATH ends in .prom")
+    parser.add_argument("--serve", action="store_true", help="Run as a long-lived job service with an HTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="Service bind address")
+    parser.add_argument("--port", type=int, default=8765, help="Service port")
+    parser.add_argument("--workers", type=int, default=2, help="Warm workers in service mode")
+    parser.add_argument("--queue-db", help="Job store path or URL, e.g. sqlite:///shared/jobs.db (default: OUTPUT_DIR/jobs.db)")
+    parser.add_argument("--worker", action="store_true", help="Lease and run jobs from the shared job store (no HTTP API)")
+    parser.add_argument("--enqueue", metavar="SOURCE", help="Add a directory, glob or JSONL manifest of videos to the job store")
+    parser.add_argument("--lease-seconds", type=float, default=60.0, help="Job lease length; renewed by heartbeats while running")
+    parser.add_argument("--locality-wait", type=float, default=30.0, help="Seconds a job waits for a worker with its input locally")
+    parser.add_argument("--local-root", action="append", default=[], help="Directory on this host's local disks (repeatable)")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Worker mode: exit once the queue is empty")
+    parser.add_argument("--prefork", action="store_true", help="Worker, service and batch modes: import once, fork a process per job")
     
     args = parser.parse_args()
     
+    if args.ledger_summary:
+        return ledger_summary(args.ledger_summary)
+    
+    if not any((args.input_video, args.batch, args.serve, args.worker, args.enqueue)):
+        parser.error("one of input_video, --batch, --serve, --worker, --enqueue or --ledger-summary is required")
+    if args.edits and any((args.batch, args.serve, args.worker, args.enqueue)):
+        parser.error("--edits applies to a single input_video")
+    
+    rows, cols = (int(n) for n in args.contact_sheet_grid.lower().split("x"))
+    
     config = VideoProcessingConfig(
         frame_interval_seconds=args.frame_interval,
         max_frames=args.max_frames,
-        ai_model=args.model
+        ai_model=args.model,
+        pre_analysis=not args.no_pre_analysis,
+        contact_sheet=args.contact_sheet,
+        contact_sheet_rows=rows,
+        contact_sheet_cols=cols,
+        adaptive_sampling=not args.no_adaptive_sampling,
+        ai_max_frames=args.max_ai_frames,
+        ai_frames_per_minute=args.ai_frames_per_minute,
+        coalesce_window_ms=args.coalesce_window_ms,
+        ai_record_dir=args.ai_record,
+        ai_replay_dir=args.ai_replay,
+        replay_latency_scale=args.replay_latency_scale,
+        ai_ledger_path=args.ai_ledger,
+        audio_snap_seconds=args.audio_snap,
+        trim_dead_air=args.trim_dead_air,
+        incremental_render=args.incremental_render,
+        edits_path=args.edits,
+        packaging=args.packaging,
+        hls_segment_seconds=args.hls_segment_seconds,
+        reframe=args.reframe,
+        reframe_size=tuple(int(n) for n in args.reframe_size.lower().split("x")) if args.reframe_size else None,
+        checkpoint_dir=args.checkpoint_dir,
+        frame_cache_dir=args.frame_cache_dir,
+        frame_cache_memory_mb=args.frame_cache_mb,
+        frame_cache_disk_mb=args.frame_cache_disk_mb,
+        ffmpeg_timeout_factor=args.ffmpeg_timeout_factor,
+        ffmpeg_stall_seconds=args.ffmpeg_stall_seconds,
+        ffmpeg_min_speed=args.ffmpeg_min_speed
     )
     
+    if args.enqueue:
+        return enqueue_jobs(args)
+    
+    if args.ai_ledger:
+        # Fixed up front so forked workers' records land in the same batch
+        from src.video.ai_ledger import default_batch_id
+        config.ai_ledger_batch = args.ai_ledger_batch or default_batch_id()
+    
     editor = NanoBananaEditor(config)
+    mark_startup("editor_ready")
+    
+    if args.prefork and not args.pipeline and (args.worker or args.serve or args.batch):
+        from src.pipeline.prefork import PreforkEditor
+        # Before any service or worker threads start: the fork server must be forked single-threaded
+        prefork = PreforkEditor(editor)
+        prefork.warm_up()
+        try:
+            return await run_mode(prefork, args)
+        finally:
+            prefork.close()
+    
+    if args.worker or args.serve or args.batch:
+        return await run_mode(editor, args)
     
     result = await editor.process_video(args.input_video, args.output)
     
+    from src.video.instrumentation import startup_timings
+    startup = startup_timings()
+    logger.info("Startup: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in startup.items()))
+    if args.metrics and result.metrics:
+        result.metrics["startup"] = startup
+        write_metrics(result, args.metrics)
+    
     if result.success:
         print(f"✅ Video processing completed successfully!")
         print(f"Input: {result.input_path}")
@@ -363,5 +1015,124 @@ async def main():
     
     return 0
 
+async def run_batch(editor: NanoBananaEditor, args) -> int:
+    """Process every video from --batch through one warm editor"""
+    from src.pipeline.batch import BatchRunner, discover_jobs
+    
+    jobs = discover_jobs(args.batch, args.output_dir, editor.config.output_format)
+    if not jobs:
+        print(f"❌ No videos found for batch source: {args.batch}")
+        return 1
+    
+    pipeline = None
+    if args.pipeline:
+        from src.pipeline.stages import StageConfig, StagedPipeline
+        pipeline = StagedPipeline(editor, StageConfig(
+            analysis_workers=args.analysis_workers,
+            extraction_workers=args.extraction_workers,
+            render_workers=args.render_workers,
+            queue_size=args.queue_size
+        ))
+    
+    results_path = args.results or str(Path(args.output_dir) / "batch_results.jsonl")
+    runner = BatchRunner(editor, results_path, concurrency=args.jobs, skip_completed=not args.no_skip_completed,
+                         pipeline=pipeline)
+    records = await runner.run(jobs)
+    
+    failed = [r for r in records if not r["success"]]
+    skipped = [r for r in records if r.get("skipped")]
+    print(f"{'✅' if not failed else '⚠️'} Batch finished: {len(records) - len(failed) - len(skipped)} processed, "
+          f"{len(skipped)} skipped, {len(failed)} failed")
+    print(f"Results: {results_path}")
+    return 1 if failed else 0
+
+def write_metrics(result: ProcessingResult, path: str):
+    from src.video.instrumentation import to_prometheus
+    
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        if path.endswith(".prom"):
+            f.write(to_prometheus(result.metrics, labels={"input": Path(result.input_path).name}))
+        else:
+            json.dump(result.metrics, f, indent=2)
+    logger.info(f"Metrics written to {path}")
+
+def ledger_summary(path: str) -> int:
+    """Print the per-batch AI call report for a ledger"""
+    from src.video.ai_ledger import format_summary, read_ledger, summarize
+    
+    if not Path(path).exists():
+        print(f"❌ No AI ledger at {path}")
+        return 1
+    records = read_ledger(path)
+    if not records:
+        print(f"No AI calls recorded in {path}")
+        return 0
+    print(format_summary(summarize(records)))
+    return 0
+
+async def run_mode(editor, args) -> int:
+    """Run the worker, service or batch mode the arguments select"""
+    if args.worker:
+        return await run_workers(editor, args)
+    if args.serve:
+        return await run_service(editor, args)
+    return await run_batch(editor, args)
+
+def open_store(args):
+    from src.pipeline.job_store import open_job_store
+    return open_job_store(args.queue_db or str(Path(args.output_dir) / "jobs.db"))
+
+def open_input_store(args):
+    if not args.input_store:
+        return None
+    from src.pipeline.input_store import InputStore
+    return InputStore(args.input_store)
+
+async def run_service(editor: NanoBananaEditor, args) -> int:
+    """Serve jobs over HTTP until interrupted"""
+    from src.pipeline.service import JobService
+    
+    service = JobService(editor, open_store(args), workers=args.workers, output_dir=args.output_dir,
+                         lease_seconds=args.lease_seconds, input_store=open_input_store(args))
+    await service.serve(args.host, args.port)
+    return 0
+
+async def run_workers(editor: NanoBananaEditor, args) -> int:
+    """Run this host's workers against the shared job store"""
+    import socket
+    from src.pipeline.worker import JobWorker, locality_check, run_worker_pool
+    
+    store = open_store(args)
+    is_local = locality_check(local_roots=args.local_root)
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    workers = [
+        JobWorker(editor, store, name=f"{prefix}:{i}", lease_seconds=args.lease_seconds,
+                  is_local=is_local, locality_wait=args.locality_wait)
+        for i in range(max(1, args.workers))
+    ]
+    await run_worker_pool(workers, exit_when_idle=args.exit_when_idle)
+    return 0
+
+def enqueue_jobs(args) -> int:
+    """Submit every video from --enqueue to the job store"""
+    import socket
+    from src.pipeline.batch import discover_jobs
+    
+    jobs = discover_jobs(args.enqueue, args.output_dir)
+    if not jobs:
+        print(f"❌ No videos found for source: {args.enqueue}")
+        return 1
+    
+    store = open_store(args)
+    hostname = socket.gethostname()
+    input_store = open_input_store(args)
+    for job in jobs:
+        input_path = input_store.add(job.input_path).path if input_store else job.input_path
+        store.submit(str(Path(input_path).resolve()), str(Path(job.output_path).resolve()),
+                     input_host=hostname)
+    print(f"✅ Queued {len(jobs)} jobs")
+    return 0
+
 if __name__ == "__main__":
     exit(asyncio.run(main()))
@@ -0,0 +1,179 @@
+"""Batch processing: many videos through one warm editor in a single process"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Set
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".m4v", ".mkv", ".webm", ".avi"}
+
+
+@dataclass
+class BatchJob:
+    """One input video and where its output goes"""
+    job_id: str
+    input_path: str
+    output_path: str
+
+
+def discover_jobs(source: str, output_dir: str, output_format: str = "mp4") -> List[BatchJob]:
+    """
+    Build the job list from a directory, a glob pattern or a JSONL manifest
+
+    Directories are scanned recursively for video files. Manifest lines are JSON
+    objects with "input" and optional "output" and "id" keys. Outputs default to
+    output_dir/<relative dir>/enhanced_<name>.<output_format>, mirroring the
+    inputs' layout so equal file names in different folders don't collide.
+    """
+    source_path = Path(source)
+
+    if source_path.is_file() and source_path.suffix == ".jsonl":
+        return _jobs_from_manifest(source_path, output_dir, output_format)
+
+    if source_path.is_dir():
+        inputs = sorted(str(p) for p in source_path.rglob("*") if p.suffix.lower() in VIDEO_EXTENSIONS)
+        root = str(source_path)
+    else:
+        inputs = sorted(p for p in glob.glob(source, recursive=True) if Path(p).is_file())
+        root = os.path.commonpath([str(Path(p).parent) for p in inputs]) if inputs else ""
+
+    return [_default_job(p, root, output_dir, output_format) for p in inputs]
+
+
+def _default_job(input_path: str, root: str, output_dir: str, output_format: str) -> BatchJob:
+    relative = Path(os.path.relpath(input_path, root)) if root else Path(Path(input_path).name)
+    output_path = Path(output_dir) / relative.parent / f"enhanced_{relative.stem}.{output_format}"
+    return BatchJob(job_id=str(relative.with_suffix("")), input_path=input_path, output_path=str(output_path))
+
+
+def _jobs_from_manifest(manifest_path: Path, output_dir: str, output_format: str) -> List[BatchJob]:
+    jobs = []
+    with open(manifest_path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping invalid manifest line {line_number}: {e}")
+                continue
+
+            input_path = entry.get("input")
+            if not input_path:
+                logger.error(f"Skipping manifest line {line_number}: no 'input'")
+                continue
+            job = _default_job(input_path, str(Path(input_path).parent), output_dir, output_format)
+            job.job_id = entry.get("id", job.job_id)
+            job.output_path = entry.get("output", job.output_path)
+            jobs.append(job)
+    return jobs
+
+
+class BatchRunner:
+    """
+    Process a list of jobs with bounded concurrency through one NanoBananaEditor
+
+    The AI client and editor are built once and shared by every job. Each finished
+    job appends one JSON line to results_path, built from its ProcessingResult. Jobs
+    whose output exists and was recorded as successful in a previous run are skipped.
+
+    With a StagedPipeline, jobs flow through per-phase worker pools instead of
+    running process_video end to end under the concurrency limit.
+    """
+
+    def __init__(self, editor, results_path: str, concurrency: int = 4, skip_completed: bool = True,
+                 pipeline=None):
+        self.editor = editor
+        self.results_path = Path(results_path)
+        self.concurrency = max(1, concurrency)
+        self.skip_completed = skip_completed
+        self.pipeline = pipeline
+
+    async def run(self, jobs: List[BatchJob]) -> List[Dict[str, Any]]:
+        """Run all jobs and return their result records in job order"""
+        self.results_path.parent.mkdir(parents=True, exist_ok=True)
+        completed = self._load_completed() if self.skip_completed else set()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        logger.info(f"Batch: {len(jobs)} jobs, concurrency {self.concurrency}, "
+                    f"{len(completed)} previously completed")
+
+        def is_completed(job: BatchJob) -> bool:
+            return job.output_path in completed and Path(job.output_path).exists()
+
+        def skipped_record(job: BatchJob) -> Dict[str, Any]:
+            logger.info(f"Skipping completed job {job.job_id}")
+            return {"job_id": job.job_id, "input_path": job.input_path,
+                    "output_path": job.output_path, "skipped": True, "success": True}
+
+        async def run_one(job: BatchJob) -> Dict[str, Any]:
+            if is_completed(job):
+                return skipped_record(job)
+            async with semaphore:
+                return await self._process(job)
+
+        if self.pipeline is not None:
+            pending = [job for job in jobs if not is_completed(job)]
+            by_job = {id(job): skipped_record(job) for job in jobs if is_completed(job)}
+
+            async def on_result(job, result, elapsed):
+                by_job[id(job)] = self._record(job, asdict(result), elapsed)
+
+            await self.pipeline.run(pending, on_result=on_result)
+            records = [by_job[id(job)] for job in jobs]
+        else:
+            records = await asyncio.gather(*(run_one(job) for job in jobs))
+
+        failed = sum(1 for r in records if not r["success"])
+        skipped = sum(1 for r in records if r.get("skipped"))
+        logger.info(f"Batch complete: {len(records) - failed - skipped} processed, {skipped} skipped, {failed} failed")
+        return records
+
+    async def _process(self, job: BatchJob) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result = await self.editor.process_video(job.input_path, job.output_path)
+            record = asdict(result)
+        except Exception as e:
+            # process_video reports its own failures; this only catches bugs outside it
+            logger.error(f"Job {job.job_id} crashed: {e}")
+            record = {"success": False, "input_path": job.input_path, "output_path": None,
+                      "error_message": f"Job crashed: {e}"}
+
+        return self._record(job, record, time.perf_counter() - start)
+
+    def _record(self, job: BatchJob, record: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
+        record.update({
+            "job_id": job.job_id,
+            "elapsed_seconds": round(elapsed, 3),
+            "finished_at": time.time()
+        })
+        self._append_result(record)
+        return record
+
+    def _append_result(self, record: Dict[str, Any]):
+        # One write per line keeps records whole even with concurrent jobs
+        with open(self.results_path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    def _load_completed(self) -> Set[str]:
+        completed: Set[str] = set()
+        if not self.results_path.exists():
+            return completed
+        with open(self.results_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("success") and record.get("output_path"):
+                    completed.add(record["output_path"])
+        return completed
@@ -0,0 +1,198 @@
+"""Per-phase job checkpoints so a rerun resumes from the last completed phase"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from src.video.fingerprint import fingerprint
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("probe", "analysis", "extraction", "render")
+
+
+def atomic_write_json(path: Path, data: Any):
+    """
+    Write JSON so readers only ever see the old file or the complete new one
+
+    The data goes to a temp file in the same directory, is fsynced, then renamed
+    over the target; the directory is fsynced so the rename itself survives a crash.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def _checksum(phases: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(phases, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class JobCheckpoint:
+    """Artifacts of every completed phase of one job"""
+    key: str
+    input_path: str
+    output_path: str
+    phases: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    variant: str = ""  # the settings the phases were produced with
+    content_key: Optional[str] = None  # input content plus settings; shared by jobs that would do the same work
+
+    def has(self, phase: str) -> bool:
+        return phase in self.phases
+
+    def artifact(self, phase: str) -> Any:
+        return self.phases[phase]["artifact"]
+
+    @property
+    def last_completed(self) -> Optional[str]:
+        done = [p for p in PHASES if p in self.phases]
+        return done[-1] if done else None
+
+
+class CheckpointStore:
+    """
+    One JSON checkpoint file per job under root
+
+    A job is identified by its input's content fingerprint, its output path and
+    its settings (variant), so replacing the input or changing a setting the
+    phases depend on starts a fresh checkpoint while a renamed copy resumes the
+    old one. Each record carries a checksum over its phases; a record that
+    fails to parse or verify is discarded rather than trusted. Phases whose file
+    artifacts have disappeared are dropped on load.
+
+    Jobs on the same content with the same settings (variant) also share work: a
+    new job starts from the phases of the latest such job, found through a
+    content index under root/content. Each record stores its variant, and an
+    index entry is only followed to a job with the same one. The shared render
+    artifact still points at the other job's output, which the caller copies
+    rather than rendering again.
+    """
+
+    def __init__(self, root: str = "./output/checkpoints"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def job_key(self, input_path: str, output_path: str, variant: str = "") -> str:
+        identity = f"{fingerprint(input_path)}|{Path(output_path).resolve()}|{variant}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+
+    def content_key(self, input_path: str, variant: str = "") -> str:
+        identity = f"{fingerprint(input_path)}|{variant}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+
+    def open(self, input_path: str, output_path: str, variant: Optional[str] = None) -> JobCheckpoint:
+        """
+        Load the job's checkpoint, or start one from a job on the same content
+
+        variant identifies the settings the phases depend on; a job never
+        resumes phases done under other settings. None keeps the job to its own
+        checkpoint.
+        """
+        key = self.job_key(input_path, output_path, variant or "")
+        content_key = self.content_key(input_path, variant) if variant is not None else None
+        checkpoint = self._load(key)
+        if checkpoint is None:
+            checkpoint = JobCheckpoint(key=key, input_path=input_path, output_path=output_path,
+                                       variant=variant or "")
+            if content_key is not None:
+                checkpoint.phases = self._shared_phases(content_key, key, variant)
+        checkpoint.content_key = content_key
+
+        self._drop_stale_phases(checkpoint)
+        if checkpoint.last_completed:
+            logger.info(f"Resuming job from checkpoint: last completed phase '{checkpoint.last_completed}'")
+        return checkpoint
+
+    def save_phase(self, checkpoint: JobCheckpoint, phase: str, artifact: Any):
+        """Record a completed phase and persist the whole checkpoint atomically"""
+        checkpoint.phases[phase] = {"artifact": artifact, "completed_at": time.time()}
+        atomic_write_json(self._path(checkpoint.key), {
+            "key": checkpoint.key,
+            "input_path": checkpoint.input_path,
+            "output_path": checkpoint.output_path,
+            "variant": checkpoint.variant,
+            "phases": checkpoint.phases,
+            "checksum": _checksum(checkpoint.phases)
+        })
+        if checkpoint.content_key is not None:
+            atomic_write_json(self._content_path(checkpoint.content_key), {"key": checkpoint.key})
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _content_path(self, content_key: str) -> Path:
+        return self.root / "content" / f"{content_key}.json"
+
+    def _shared_phases(self, content_key: str, key: str, variant: str) -> Dict[str, Dict[str, Any]]:
+        """Phases of the latest job with the same content and settings, if any are still usable"""
+        try:
+            with open(self._content_path(content_key)) as f:
+                other_key = json.load(f)["key"]
+        except (OSError, ValueError, KeyError):
+            return {}
+        other = self._load(other_key) if other_key != key else None
+        if other is None or other.variant != variant:
+            return {}
+        self._drop_stale_phases(other)
+        if other.phases:
+            logger.info(f"Reusing {', '.join(other.phases)} from an earlier job on the same input")
+        return other.phases
+
+    def _load(self, key: str) -> Optional[JobCheckpoint]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("checksum") != _checksum(data.get("phases", {})):
+                raise ValueError("checksum mismatch")
+            return JobCheckpoint(key=key, input_path=data["input_path"], output_path=data["output_path"],
+                                 phases=data["phases"], variant=data.get("variant", ""))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding unusable checkpoint {path.name}: {e}")
+            return None
+
+    def _drop_stale_phases(self, checkpoint: JobCheckpoint):
+        """A phase only counts if the files it produced are still there; later phases depend on it"""
+        valid = True
+        for phase in PHASES:
+            if phase not in checkpoint.phases:
+                continue
+            if valid and not self._artifact_files_exist(phase, checkpoint.phases[phase]["artifact"]):
+                logger.warning(f"Checkpoint phase '{phase}' artifacts are missing; redoing from there")
+                valid = False
+            if not valid:
+                del checkpoint.phases[phase]
+
+    @staticmethod
+    def _artifact_files_exist(phase: str, artifact: Any) -> bool:
+        if phase == "extraction":
+            return all(Path(p).exists() for p in artifact.get("frame_dirs", []))
+        if phase == "render":
+            output = Path(artifact.get("output_path", ""))
+            return output.exists() and output.stat().st_size == artifact.get("size_bytes")
+        return True
+
+
+def frame_dirs_manifest(frame_dirs: List[str]) -> Dict[str, Any]:
+    """Extraction artifact: the segment directories and the frame files in each"""
+    return {
+        "frame_dirs": frame_dirs,
+        "frames": {d: sorted(p.name for p in Path(d).iterdir()) for d in frame_dirs if Path(d).is_dir()}
+    }
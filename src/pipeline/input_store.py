@@ -0,0 +1,81 @@
+"""Content-addressed store for job inputs, so identical uploads become one file"""
+
+import logging
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from src.video.fingerprint import fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredInput:
+    """Where an input lives in the store, and whether an identical one was already there"""
+    path: str
+    fingerprint: str
+    deduplicated: bool
+
+
+class InputStore:
+    """
+    Inputs filed under their content fingerprint: root/<hash prefix>/<fingerprint><suffix>
+
+    Adding a video that is already stored (same bytes, any name) returns the
+    stored copy instead of keeping another, so every submission of the same
+    short has the same input path and fingerprint and shares its checkpoints,
+    frame cache entries and rendered segments. A sampled-fingerprint match is
+    confirmed with a full hash before it's trusted; the rare sampled collision
+    is filed under the full fingerprint instead.
+    """
+
+    def __init__(self, root: str = "./output/inputs"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def add(self, input_path: str, move: bool = False) -> StoredInput:
+        """
+        File input_path in the store; move=True consumes it (e.g. an upload spool file)
+
+        Stored files are never modified, so callers must not write to the
+        returned path.
+        """
+        source = Path(input_path).resolve()
+        key = fingerprint(str(source))
+        existing = self._find(key)
+        if existing is not None and not self._same_content(existing, source):
+            logger.warning(f"Sampled fingerprint collision for {input_path}; filing it under its full hash")
+            key = fingerprint(str(source), full=True)
+            existing = self._find(key)
+
+        if existing is not None:
+            if move and existing != source:
+                source.unlink()
+            logger.info(f"Input {input_path} is already stored as {existing.name}")
+            return StoredInput(str(existing), key, True)
+
+        target = self._path(key, source.suffix.lower())
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f".{target.name}.{os.getpid()}.partial")
+        if move:
+            shutil.move(str(source), partial)
+        else:
+            shutil.copyfile(source, partial)
+        os.replace(partial, target)
+        logger.info(f"Stored input {input_path} as {target.name}")
+        return StoredInput(str(target), key, False)
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / key.rsplit("-", 1)[-1][:2] / f"{key}{suffix}"
+
+    def _find(self, key: str) -> Optional[Path]:
+        matches = sorted(p for p in self._path(key, "").parent.glob(f"{key}*")
+                         if p.name == key or p.name.startswith(f"{key}."))
+        return matches[0] if matches else None
+
+    @staticmethod
+    def _same_content(a: Path, b: Path) -> bool:
+        return a == b or fingerprint(str(a), full=True) == fingerprint(str(b), full=True)
@@ -0,0 +1,215 @@
+"""Embedded persistent job queue backed by SQLite"""
+
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.pipeline.job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("queued", "running", "succeeded", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    input_path TEXT NOT NULL,
+    output_path TEXT,
+    input_host TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    phase TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_expires_at REAL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted_at);
+"""
+
+# Columns added after the first schema; older databases get them on open
+_ADDED_COLUMNS = {
+    "input_host": "TEXT",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "lease_expires_at": "REAL"
+}
+
+
+class JobQueue(JobStore):
+    """
+    FIFO job queue in a single SQLite file: the reference JobStore
+
+    Safe to use from several threads and processes: every call opens its own
+    connection, and leases are taken inside an IMMEDIATE transaction so two
+    workers never take the same job. Workers on several hosts can share it
+    through a common filesystem as long as that filesystem's locking works
+    (local disks do; many network filesystems don't).
+
+    A job whose lease expires max_attempts times is failed instead of requeued,
+    so one video that crashes workers can't take the whole fleet down.
+    """
+
+    def __init__(self, db_path: str = "./output/jobs.db", max_attempts: int = 3, lease_scan: int = 32):
+        self.db_path = Path(db_path)
+        self.max_attempts = max_attempts
+        self.lease_scan = lease_scan
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, definition in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, input_path: str, output_path: Optional[str] = None, job_id: Optional[str] = None,
+               input_host: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, input_path, output_path, input_host, submitted_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, input_path, output_path, input_host, time.time())
+            )
+        logger.info(f"Queued job {job_id}: {input_path}")
+        return job_id
+
+    def lease(self, worker: str, lease_seconds: float,
+              is_local: Optional[Callable[[Dict[str, Any]], bool]] = None,
+              locality_wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                candidates = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY submitted_at LIMIT ?", (self.lease_scan,)
+                ).fetchall()
+                chosen = self._choose(candidates, now, is_local, locality_wait)
+                if chosen is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, lease_expires_at = ?, "
+                        "attempts = attempts + 1, phase = NULL, progress = 0 WHERE id = ?",
+                        (worker, now, now + lease_seconds, chosen["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(chosen["id"]) if chosen is not None else None
+
+    @staticmethod
+    def _choose(candidates: List[sqlite3.Row], now: float,
+                is_local: Optional[Callable[[Dict[str, Any]], bool]], locality_wait: float) -> Optional[sqlite3.Row]:
+        """Oldest local job first, else the oldest job that has waited out locality_wait"""
+        if not candidates or is_local is None:
+            return candidates[0] if candidates else None
+        for row in candidates:
+            if is_local(dict(row)):
+                return row
+        for row in candidates:
+            if now - row["submitted_at"] >= locality_wait:
+                return row
+        return None
+
+    def heartbeat(self, job_id: str, worker: str, lease_seconds: float) -> bool:
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, worker)
+            ).rowcount
+        return updated == 1
+
+    def update_progress(self, job_id: str, worker: str, phase: str, progress: float) -> bool:
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE jobs SET phase = ?, progress = ? WHERE id = ? AND status = 'running' AND worker = ?",
+                (phase, progress, job_id, worker)
+            ).rowcount
+        return updated == 1
+
+    def complete(self, job_id: str, result: Dict[str, Any], worker: Optional[str] = None) -> bool:
+        status = "succeeded" if result.get("success") else "failed"
+        return self._finish(job_id, worker, status, json.dumps(result, default=str), result.get("error_message"))
+
+    def fail(self, job_id: str, error: str, worker: Optional[str] = None) -> bool:
+        return self._finish(job_id, worker, "failed", None, error)
+
+    def _finish(self, job_id: str, worker: Optional[str], status: str, result: Optional[str],
+                error: Optional[str]) -> bool:
+        query = ("UPDATE jobs SET status = ?, progress = CASE WHEN ? = 'succeeded' THEN 1 ELSE progress END, "
+                 "finished_at = ?, lease_expires_at = NULL, result = ?, error = ? WHERE id = ?")
+        params = [status, status, time.time(), result, error, job_id]
+        if worker is not None:
+            query += " AND worker = ? AND status = 'running'"
+            params.append(worker)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount == 1
+
+    def requeue_expired(self) -> int:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            given_up = conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, lease_expires_at = NULL, "
+                "error = 'Lease expired ' || attempts || ' times' "
+                "WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, phase = NULL, progress = 0, "
+                "lease_expires_at = NULL WHERE status = 'running' AND lease_expires_at < ?",
+                (now,)
+            ).rowcount
+            conn.execute("COMMIT")
+        if given_up:
+            logger.error(f"Failed {given_up} job(s) after {self.max_attempts} expired leases")
+        if requeued:
+            logger.warning(f"Requeued {requeued} job(s) with expired leases")
+        return requeued
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY submitted_at DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY submitted_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row, include_result=False) for row in rows]
+
+    def depth(self) -> Dict[str, int]:
+        counts = {status: 0 for status in STATUSES}
+        with self._connect() as conn:
+            for row in conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+                counts[row["status"]] = row["n"]
+        return counts
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row, include_result: bool = True) -> Dict[str, Any]:
+        job = dict(row)
+        result = job.pop("result", None)
+        if include_result and result:
+            job["result"] = json.loads(result)
+        return job
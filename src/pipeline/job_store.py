@@ -0,0 +1,87 @@
+"""Coordination backend interface for job queues shared by many workers"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+
+class JobStore(ABC):
+    """
+    A job queue that workers on any number of hosts pull from with leases
+
+    A leased job belongs to one worker until its lease expires. Workers extend
+    the lease with heartbeat() while they run the job; if a worker dies, its
+    lease runs out and requeue_expired() puts the job back for someone else.
+    complete() and fail() only take effect for the worker still holding the
+    lease, so a worker that lost its lease can't overwrite the new owner's result.
+
+    Jobs are plain dicts with at least id, input_path, output_path, status,
+    phase, progress, worker and input_host.
+    """
+
+    @abstractmethod
+    def submit(self, input_path: str, output_path: Optional[str] = None, job_id: Optional[str] = None,
+               input_host: Optional[str] = None) -> str:
+        """Enqueue a job and return its id"""
+
+    @abstractmethod
+    def lease(self, worker: str, lease_seconds: float,
+              is_local: Optional[Callable[[Dict[str, Any]], bool]] = None,
+              locality_wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        """
+        Take a queued job for worker, or None when there is nothing to take
+
+        Args:
+            is_local: Predicate for jobs whose input is on this worker's disks;
+                those are taken ahead of older non-local jobs
+            locality_wait: Seconds a non-local job waits for a worker that has its
+                input before any worker may take it
+        """
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker: str, lease_seconds: float) -> bool:
+        """Extend the lease; False when worker no longer holds it"""
+
+    @abstractmethod
+    def update_progress(self, job_id: str, worker: str, phase: str, progress: float) -> bool:
+        """Record the job's current phase and overall progress; False when worker no longer holds the lease"""
+
+    @abstractmethod
+    def complete(self, job_id: str, result: Dict[str, Any], worker: Optional[str] = None) -> bool:
+        """Store the ProcessingResult dict; False when worker no longer holds the lease"""
+
+    @abstractmethod
+    def fail(self, job_id: str, error: str, worker: Optional[str] = None) -> bool:
+        """Mark the job failed; False when worker no longer holds the lease"""
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """Return jobs with expired leases to the queue; returns how many were requeued"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """One job including its result, or None"""
+
+    @abstractmethod
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent jobs first, without results"""
+
+    @abstractmethod
+    def depth(self) -> Dict[str, int]:
+        """Job count per status"""
+
+
+def open_job_store(location: str) -> JobStore:
+    """
+    Open a job store from a location string
+
+    "sqlite:///abs/path/jobs.db", "sqlite://rel/jobs.db" or a bare path opens the
+    SQLite reference store. Other
+    backends plug in by implementing JobStore and adding a scheme here.
+    """
+    scheme, sep, rest = location.partition("://")
+    if not sep:
+        scheme, rest = "sqlite", location
+    if scheme == "sqlite":
+        from src.pipeline.job_queue import JobQueue
+        return JobQueue(rest)
+    raise ValueError(f"Unsupported job store: {location}")
@@ -0,0 +1,273 @@
+"""Run each job in a process forked from a warm parent"""
+
+import asyncio
+import contextlib
+import importlib
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Modules every job ends up importing; loading them once in the parent means forked
+# children start with them already in memory (shared copy-on-write)
+WARM_MODULES = (
+    "src.video.editor",
+    "src.video.extractor",
+    "src.video.ffmpeg",
+    "src.video.probe",
+    "src.video.sampling",
+    "src.video.audio_features",
+    "src.video.frame_cache",
+    "src.video.gemini_frame_analyzer",
+    "src.video.request_coalescer",
+    "src.pipeline.checkpoint",
+)
+
+
+class PreforkEditor:
+    """
+    Editor wrapper that imports once, then forks a fresh child per job
+
+    warm_up() loads the modules a job needs (plus ai_proxy_core, and OpenCV when
+    the pre-analysis is on) and then forks a fork server: a single-threaded
+    copy of the warmed-up process that does nothing but fork job children. It
+    must run before the caller starts any threads (HTTP handlers, to_thread
+    workers), so no child can inherit a lock some other thread was holding.
+
+    process_video() sends the job to the fork server over a Unix socket along
+    with two pipes. The fork server forks a child that runs the wrapped editor's
+    process_video under its own event loop and streams progress and the final
+    ProcessingResult back over the first pipe as JSON lines; the fork server
+    reaps the child and reports its pid and exit status on the second. A crash
+    or leak in one job dies with its child; the parent never touches OpenCV or
+    the AI client itself, and never forks once it is serving.
+
+    Each child builds its own AI client, so requests are not coalesced across
+    jobs; use the in-process workers when coalesce_window_ms matters.
+    """
+
+    def __init__(self, editor):
+        self.editor = editor
+        self.config = editor.config
+        self._server: Optional[socket.socket] = None
+        self._server_pid: Optional[int] = None
+        self._send_lock = threading.Lock()
+
+    def warm_up(self):
+        """Import everything a job will need so forked children skip it"""
+        modules = list(WARM_MODULES)
+        if not self.config.ai_replay_dir:
+            modules.append("ai_proxy_core")
+        if self.config.pre_analysis:
+            modules += ["numpy", "cv2", "src.video.heuristic_analyzer"]
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                logger.warning(f"Prefork warm-up could not import {name}: {e}")
+        logger.info(f"Prefork parent warmed up {len(modules)} modules")
+        self.start()
+
+    def start(self):
+        """Fork the fork server; call while this process is still single-threaded"""
+        if self._server is not None:
+            return
+        if threading.active_count() > 1:
+            logger.warning(f"Starting the fork server with {threading.active_count()} threads running; "
+                           f"start it before serving")
+        parent_sock, server_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        pid = os.fork()
+        if pid == 0:
+            parent_sock.close()
+            self._serve_forks(server_sock)
+        server_sock.close()
+        self._server, self._server_pid = parent_sock, pid
+        logger.info(f"Started fork server process {pid}")
+
+    def close(self):
+        """Stop the fork server once the jobs it started have finished"""
+        if self._server is None:
+            return
+        self._server.close()
+        os.waitpid(self._server_pid, 0)
+        self._server = self._server_pid = None
+
+    async def process_video(self, input_path: str, output_path: Optional[str] = None,
+                            progress_callback: Optional[Callable[[str, float, Any], None]] = None):
+        self.start()
+        read_fd, write_fd = os.pipe()
+        status_read_fd, status_write_fd = os.pipe()
+        request = json.dumps({"input_path": input_path, "output_path": output_path}).encode("utf-8")
+        try:
+            with self._send_lock:
+                socket.send_fds(self._server, [request], [write_fd, status_write_fd])
+        except OSError as e:
+            os.close(read_fd)
+            os.close(status_read_fd)
+            return self.editor.make_result(input_path, error_message=f"Fork server unavailable: {e}")
+        finally:
+            os.close(write_fd)
+            os.close(status_write_fd)
+
+        child = {"pid": None}
+        cancelled = threading.Event()
+        try:
+            result, exit_code = await asyncio.to_thread(self._follow_child, input_path, read_fd, status_read_fd,
+                                                        child, cancelled, progress_callback)
+        except asyncio.CancelledError:
+            # The job was called off (e.g. its lease was lost); whichever side learns the pid
+            # last stops the child
+            cancelled.set()
+            self._stop_child(child["pid"], input_path)
+            raise
+        pid = child["pid"]
+        logger.info(f"Worker process {pid} for {input_path} exited with status {exit_code}")
+
+        if result is None:
+            return self.editor.make_result(input_path, error_message=f"Worker process exited with status {exit_code}")
+        if "error" in result:
+            return self.editor.make_result(input_path, error_message=f"Worker process crashed: {result['error']}")
+
+        fields = result["result"]
+        startup = (fields.get("metrics") or {}).get("startup", {})
+        if "first_ffmpeg" in startup:
+            logger.info(f"Worker process {pid} reached its first ffmpeg {startup['first_ffmpeg']:.3f}s after fork")
+        return self.editor.make_result(
+            fields.pop("input_path"), fields.pop("error_message"),
+            **{k: v for k, v in fields.items() if k != "success"})
+
+    def _serve_forks(self, sock: socket.socket):
+        """
+        The fork server's loop: fork a child per request, report each child's exit status
+
+        Never returns. Exits once the parent closes its end of the socket and
+        every child has been reaped.
+        """
+        status = 0
+        try:
+            # Running jobs finish on SIGINT, so the fork server must outlive it to report them
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.set_wakeup_fd(-1)
+            children: Dict[int, int] = {}  # pid -> status pipe
+            accepting = True
+            while accepting or children:
+                if accepting and select.select([sock], [], [], 0.2)[0]:
+                    message, fds, _, _ = socket.recv_fds(sock, 1 << 16, 2)
+                    if not message:
+                        accepting = False
+                        sock.close()
+                    else:
+                        job = json.loads(message)
+                        write_fd, status_fd = fds
+                        pid = os.fork()
+                        if pid == 0:
+                            sock.close()
+                            for fd in list(children.values()) + [status_fd]:
+                                os.close(fd)
+                            self._run_child(write_fd, job["input_path"], job["output_path"])
+                        os.close(write_fd)
+                        # Its own process group, so a cancelled job can be stopped along with its
+                        # ffmpeg runs, and Ctrl-C at the terminal doesn't reach them
+                        os.setpgid(pid, 0)
+                        os.write(status_fd, f"{pid}\n".encode())
+                        children[pid] = status_fd
+                elif not accepting:
+                    select.select([], [], [], 0.2)
+                while children:
+                    pid, wait_status = os.waitpid(-1, os.WNOHANG)
+                    if pid == 0:
+                        break
+                    status_fd = children.pop(pid, None)
+                    if status_fd is not None:
+                        os.write(status_fd, f"{os.waitstatus_to_exitcode(wait_status)}\n".encode())
+                        os.close(status_fd)
+        except BaseException:
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _run_child(self, write_fd: int, input_path: str, output_path: Optional[str]):
+        # Never returns: the child must not fall back into the parent's event loop
+        status = 0
+        try:
+            from src.video.instrumentation import reset_startup, startup_timings
+
+            reset_startup()
+            # The parent drains running jobs on SIGINT, so don't let Ctrl-C kill them here
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.set_wakeup_fd(-1)
+
+            with os.fdopen(write_fd, "w", buffering=1) as pipe:
+                def send(message: Dict[str, Any]):
+                    pipe.write(json.dumps(message, default=str) + "\n")
+
+                def on_progress(phase: str, progress: float, ffmpeg_progress=None):
+                    send({"progress": [phase, progress, asdict(ffmpeg_progress) if ffmpeg_progress else None]})
+
+                try:
+                    result = asyncio.run(self.editor.process_video(input_path, output_path,
+                                                                   progress_callback=on_progress))
+                    if result.metrics is not None:
+                        result.metrics["startup"] = startup_timings()
+                    send({"result": asdict(result)})
+                except Exception as e:
+                    send({"error": str(e)})
+        except BaseException:
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _follow_child(self, input_path: str, read_fd: int, status_fd: int, child: Dict[str, Any],
+                      cancelled: threading.Event, progress_callback) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """The child's final message and exit status (None for whatever never arrived); sets child["pid"]"""
+        with os.fdopen(status_fd) as status:
+            line = status.readline()
+            child["pid"] = int(line) if line else None
+            if cancelled.is_set():
+                self._stop_child(child["pid"], input_path)
+            result = self._read_child(read_fd, progress_callback)
+            line = status.readline()
+        return result, int(line) if line else None
+
+    @staticmethod
+    def _stop_child(pid: Optional[int], input_path: str):
+        """SIGTERM the child's process group, so its ffmpeg runs stop with it"""
+        if pid is None:
+            return
+        logger.warning(f"Stopping worker process {pid} for {input_path}")
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(pid, signal.SIGTERM)
+
+    def _read_child(self, read_fd: int,
+                    progress_callback: Optional[Callable[[str, float, Any], None]]) -> Optional[Dict[str, Any]]:
+        from src.video.ffmpeg import FFmpegProgress
+
+        final = None
+        with os.fdopen(read_fd) as pipe:
+            for line in pipe:
+                message = json.loads(line)
+                if "progress" not in message:
+                    final = message
+                    continue
+                if progress_callback is None:
+                    continue
+                phase, progress, ffmpeg_progress = message["progress"]
+                try:
+                    progress_callback(phase, progress, FFmpegProgress(**ffmpeg_progress) if ffmpeg_progress else None)
+                except Exception as e:
+                    logger.warning(f"Progress callback failed: {e}")
+        return final
@@ -0,0 +1,178 @@
+"""Long-running job service: local HTTP API, persistent queue and warm workers"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.pipeline.job_store import JobStore
+from src.pipeline.worker import JobWorker, run_worker_pool
+
+logger = logging.getLogger(__name__)
+
+
+class JobService:
+    """
+    Serve video jobs from a JobStore with a pool of warm async workers
+
+    All workers share one NanoBananaEditor, so the AI client, coalescer and
+    checkpoint store are initialized once for the life of the service instead
+    of once per video. The HTTP API runs on its own threads and only touches
+    the store; a submission wakes an idle worker immediately. Other hosts can
+    run plain workers (see JobWorker) against the same store. With an
+    InputStore, submitted inputs are filed by content before they're queued.
+
+    Endpoints:
+        POST /jobs          {"input": path, "output": optional path} -> 202 {"id", "status"}
+        GET  /jobs          ?status=queued|running|succeeded|failed&limit=N
+        GET  /jobs/<id>     status, phase, progress and (when finished) the result
+        GET  /queue         job counts per status and busy workers
+        GET  /health        liveness
+    """
+
+    def __init__(self, editor, queue: JobStore, workers: int = 2, output_dir: str = "./output",
+                 poll_interval: float = 1.0, lease_seconds: float = 60.0, input_store=None):
+        self.editor = editor
+        self.queue = queue
+        self.input_store = input_store
+        self.output_dir = Path(output_dir)
+        self.hostname = socket.gethostname()
+        self.workers = [
+            JobWorker(editor, queue, name=f"{self.hostname}:{os.getpid()}:{i}", lease_seconds=lease_seconds,
+                      poll_interval=poll_interval)
+            for i in range(max(1, workers))
+        ]
+        self.started_at = time.time()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        """Run the API and workers until SIGINT/SIGTERM; running jobs finish before exit"""
+        server = self.start_http(host, port)
+        try:
+            await self.run_workers(install_signal_handlers=True)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def start_http(self, host: str, port: int) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer((host, port), _make_handler(self))
+        threading.Thread(target=server.serve_forever, name="job-api", daemon=True).start()
+        logger.info(f"Job API listening on http://{host}:{server.server_address[1]}")
+        return server
+
+    async def run_workers(self, install_signal_handlers: bool = False):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stop = asyncio.Event()
+        await run_worker_pool(self.workers, wake=self._wake, stop=self._stop,
+                              install_signal_handlers=install_signal_handlers)
+
+    def stop(self):
+        """Stop leasing new jobs; safe to call from any thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self.notify()
+
+    def notify(self):
+        """Wake idle workers; called from HTTP threads after a submission"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def submit(self, input_path: str, output_path: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        stem = Path(input_path).stem
+        if self.input_store is not None:
+            # Identical uploads are queued as the same stored file, so they share work
+            input_path = self.input_store.add(input_path).path
+        if not output_path:
+            output_path = str(self.output_dir / f"enhanced_{stem}_{job_id}.{self.editor.config.output_format}")
+        self.queue.submit(input_path, output_path, job_id=job_id, input_host=self.hostname)
+        self.notify()
+        return job_id
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "depth": self.queue.depth(),
+            "workers": len(self.workers),
+            "busy_workers": sum(1 for w in self.workers if w.busy),
+            "uptime_seconds": round(time.time() - self.started_at, 1)
+        }
+
+
+def _make_handler(service: JobService):
+    class JobRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split("/") if p]
+
+            if parts == ["health"]:
+                self._send(200, {"status": "ok"})
+            elif parts == ["queue"]:
+                self._send(200, service.status())
+            elif parts == ["jobs"]:
+                query = parse_qs(url.query)
+                status = query.get("status", [None])[0]
+                limit = int(query.get("limit", ["100"])[0])
+                self._send(200, {"jobs": service.queue.list(status=status, limit=limit)})
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = service.queue.get(parts[1])
+                if job:
+                    self._send(200, job)
+                else:
+                    self._send(404, {"error": f"Unknown job: {parts[1]}"})
+            else:
+                self._send(404, {"error": f"Not found: {url.path}"})
+
+        def do_POST(self):
+            if urlparse(self.path).path.rstrip("/") != "/jobs":
+                self._send(404, {"error": f"Not found: {self.path}"})
+                return
+
+            body, error = self._read_json()
+            if error:
+                self._send(400, {"error": error})
+                return
+
+            input_path = body.get("input")
+            if not input_path:
+                self._send(400, {"error": "'input' is required"})
+                return
+            if not Path(input_path).exists():
+                self._send(400, {"error": f"Input video file not found: {input_path}"})
+                return
+
+            job_id = service.submit(input_path, body.get("output"))
+            self._send(202, {"id": job_id, "status": "queued"})
+
+        def _read_json(self) -> Tuple[Dict[str, Any], Optional[str]]:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError as e:
+                return {}, f"Invalid JSON: {e}"
+            if not isinstance(body, dict):
+                return {}, "Request body must be a JSON object"
+            return body, None
+
+        def _send(self, status: int, payload: Dict[str, Any]):
+            data = json.dumps(payload, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return JobRequestHandler
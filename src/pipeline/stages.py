@@ -0,0 +1,144 @@
+"""Pipelined stage execution: analysis, extraction and rendering overlap across videos"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.video.ffmpeg import ffmpeg_limits
+from src.video.instrumentation import collect
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageConfig:
+    """Worker count per stage and the size of the bounded queue feeding each stage"""
+    analysis_workers: int = 4   # network-bound: Gemini round-trips
+    extraction_workers: int = 2
+    render_workers: int = 2     # CPU-bound: ffmpeg encodes
+    queue_size: int = 2
+
+
+@dataclass
+class _JobState:
+    """A job moving through the stages"""
+    job: Any
+    started_at: float = field(default_factory=time.perf_counter)
+    checkpoint: Any = None
+    metrics: Any = None
+    probe: Any = None
+    ai_analysis: Optional[Dict[str, Any]] = None
+    extracted_frames: List[str] = field(default_factory=list)
+
+
+class StagedPipeline:
+    """
+    Run the editor's phases as stages connected by bounded asyncio queues
+
+    Each stage has its own worker pool, so analysis of video N+1 runs while video N
+    is rendering. Queues between stages are bounded: when rendering falls behind,
+    extraction workers block on put(), then analysis workers do, and no more jobs are
+    admitted until the render stage catches up.
+
+    Jobs need input_path, output_path and job_id attributes (e.g. BatchJob). Each
+    finished job, successful or not, is passed to on_result as (job, ProcessingResult,
+    elapsed_seconds).
+    """
+
+    def __init__(self, editor, config: Optional[StageConfig] = None):
+        self.editor = editor
+        self.config = config or StageConfig()
+
+    async def run(self, jobs: List[Any],
+                  on_result: Optional[Callable[[Any, Any, float], Awaitable[None]]] = None) -> List[Any]:
+        """Push all jobs through the stages; returns ProcessingResults in job order"""
+        results: Dict[int, Any] = {}
+        index_of = {id(job): i for i, job in enumerate(jobs)}
+
+        size = self.config.queue_size
+        analysis_queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        extraction_queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        render_queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+
+        async def finish(state: _JobState, result):
+            if state.metrics is not None:
+                result.metrics = state.metrics.to_dict()
+            results[index_of[id(state.job)]] = result
+            if on_result is not None:
+                await on_result(state.job, result, time.perf_counter() - state.started_at)
+
+        async def fail(state: _JobState, stage: str, error: Exception):
+            message = str(error) if stage == "analysis" else f"{stage.capitalize()} failed: {error}"
+            logger.error(f"Job {state.job.job_id} failed in {stage} stage: {error}")
+            await finish(state, self.editor.make_result(state.job.input_path, error_message=message))
+
+        def stage_limits(state: _JobState):
+            # A fresh deadline per stage: time spent waiting in a queue is backpressure, not a slow job
+            return ffmpeg_limits(self.editor.ffmpeg_limits_for(state.probe))
+
+        async def analyze(state: _JobState):
+            state.checkpoint = self.editor.open_checkpoint(state.job.input_path, state.job.output_path)
+            state.probe = await self.editor.run_probe_phase(state.job.input_path, state.checkpoint)
+            with stage_limits(state):
+                state.ai_analysis = await self.editor.run_analysis_phase(state.job.input_path, state.checkpoint,
+                                                                         state.probe)
+            await extraction_queue.put(state)
+
+        async def extract(state: _JobState):
+            with stage_limits(state):
+                state.extracted_frames = await self.editor.run_extraction_phase(state.job.input_path,
+                                                                                state.ai_analysis, state.checkpoint)
+            await render_queue.put(state)
+
+        async def render(state: _JobState):
+            with stage_limits(state):
+                output_path = await self.editor.run_render_phase(state.job.input_path, state.job.output_path,
+                                                                 state.ai_analysis, state.checkpoint, state.probe)
+            await finish(state, self.editor.make_result(
+                state.job.input_path,
+                output_path=output_path,
+                frames_processed=len(state.extracted_frames),
+                ai_analysis=state.ai_analysis
+            ))
+
+        async def worker(name: str, queue: asyncio.Queue, handle):
+            while True:
+                state = await queue.get()
+                if state is None:
+                    return
+                # Each stage runs in a different task; resume the job's own metrics in each
+                with collect(state.metrics) as state.metrics:
+                    try:
+                        await handle(state)
+                    except Exception as e:
+                        await fail(state, name, e)
+
+        def start(name: str, queue: asyncio.Queue, handle, count: int) -> List[asyncio.Task]:
+            return [asyncio.create_task(worker(name, queue, handle)) for _ in range(max(1, count))]
+
+        analysis_tasks = start("analysis", analysis_queue, analyze, self.config.analysis_workers)
+        extraction_tasks = start("extraction", extraction_queue, extract, self.config.extraction_workers)
+        render_tasks = start("render", render_queue, render, self.config.render_workers)
+
+        logger.info(f"Pipeline: {len(jobs)} jobs through {len(analysis_tasks)} analysis, "
+                    f"{len(extraction_tasks)} extraction and {len(render_tasks)} render workers")
+
+        for job in jobs:
+            if not Path(job.input_path).exists():
+                await finish(_JobState(job), self.editor.make_result(
+                    job.input_path, error_message=f"Input video file not found: {job.input_path}"))
+                continue
+            await analysis_queue.put(_JobState(job))
+
+        # Drain stage by stage: a stage is only told to stop once everything upstream is done
+        for queue, tasks in ((analysis_queue, analysis_tasks), (extraction_queue, extraction_tasks),
+                             (render_queue, render_tasks)):
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+
+        return [results[i] for i in range(len(jobs))]
+
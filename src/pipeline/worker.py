@@ -0,0 +1,170 @@
+"""Workers that lease jobs from a JobStore and run them through a warm editor"""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def locality_check(hostname: Optional[str] = None,
+                   local_roots: Sequence[str] = ()) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Predicate for jobs whose input this host can read from its own disks
+
+    A job is local when it was submitted from this host (input_host) or its input
+    lives under one of local_roots, e.g. a node's local scratch volume as opposed
+    to a network mount every node can see.
+    """
+    hostname = hostname or socket.gethostname()
+    roots = [Path(r).resolve() for r in local_roots]
+
+    def is_local(job: Dict[str, Any]) -> bool:
+        if job.get("input_host") == hostname:
+            return True
+        input_path = Path(job["input_path"]).resolve()
+        return any(input_path.is_relative_to(root) for root in roots)
+
+    return is_local
+
+
+class JobWorker:
+    """
+    One worker loop: lease a job, run it with heartbeats, report the result
+
+    Several JobWorkers in one process share the editor, so the AI client and its
+    coalescer stay warm across jobs. The lease is renewed every lease_seconds / 3
+    while the job runs. If a renewal or progress update fails (the store gave the
+    job to someone else after this worker stalled), the job is cancelled: an
+    ffmpeg run already in progress finishes, but no further phase starts and
+    nothing is written back.
+    """
+
+    def __init__(self, editor, store, name: Optional[str] = None, lease_seconds: float = 60.0,
+                 poll_interval: float = 1.0, is_local: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 locality_wait: float = 30.0):
+        self.editor = editor
+        self.store = store
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.is_local = is_local
+        self.locality_wait = locality_wait
+        self.busy = False
+        self.jobs_run = 0
+
+    async def run(self, stop: asyncio.Event, wake: Optional[asyncio.Event] = None, exit_when_idle: bool = False):
+        """Work until stop is set, or until the queue is empty when exit_when_idle"""
+        while not stop.is_set():
+            await asyncio.to_thread(self.store.requeue_expired)
+            job = await asyncio.to_thread(self.store.lease, self.name, self.lease_seconds,
+                                          self.is_local, self.locality_wait)
+            if job is None:
+                if exit_when_idle and (await asyncio.to_thread(self.store.depth))["queued"] == 0:
+                    return
+                await self._idle(stop, wake)
+                continue
+
+            self.busy = True
+            try:
+                await self._run_job(job)
+            finally:
+                self.busy = False
+                self.jobs_run += 1
+
+    async def _idle(self, stop: asyncio.Event, wake: Optional[asyncio.Event]):
+        event = wake or stop
+        if wake is not None:
+            wake.clear()
+        try:
+            await asyncio.wait_for(event.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_job(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        logger.info(f"{self.name} leased job {job_id}: {job['input_path']} (attempt {job['attempts']})")
+        loop = asyncio.get_running_loop()
+        lease_lost = asyncio.Event()
+
+        def stop_job():
+            if not lease_lost.is_set():
+                lease_lost.set()
+                processing.cancel()
+
+        def record_progress(phase: str, progress: float):
+            if not self.store.update_progress(job_id, self.name, phase, progress):
+                loop.call_soon_threadsafe(stop_job)
+
+        # Phase reports arrive on the loop; a contended store must not block it (or the heartbeat),
+        # so one writer task takes them to a thread, keeping only the newest one pending
+        latest: Dict[str, Any] = {}
+        writer: Optional[asyncio.Task] = None
+
+        async def write_progress():
+            while latest and not lease_lost.is_set():
+                await asyncio.to_thread(record_progress, *latest.pop("progress"))
+
+        def on_progress(phase: str, progress: float, ffmpeg_progress=None):
+            nonlocal writer
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # An ffmpeg reader thread: already off the loop
+                record_progress(phase, progress)
+                return
+            latest["progress"] = (phase, progress)
+            if writer is None or writer.done():
+                writer = loop.create_task(write_progress())
+
+        processing = asyncio.create_task(self.editor.process_video(job["input_path"], job["output_path"],
+                                                                   progress_callback=on_progress))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, stop_job))
+        try:
+            result = await processing
+            if writer is not None:
+                await writer
+            recorded = await asyncio.to_thread(self.store.complete, job_id, asdict(result), self.name)
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                raise
+            recorded = False
+        except Exception as e:
+            # process_video reports its own failures; this only catches bugs outside it
+            logger.error(f"Job {job_id} crashed: {e}")
+            recorded = await asyncio.to_thread(self.store.fail, job_id, f"Job crashed: {e}", self.name)
+        finally:
+            heartbeat.cancel()
+
+        if lease_lost.is_set():
+            logger.warning(f"{self.name} lost the lease on job {job_id}; stopped it")
+        elif not recorded:
+            logger.warning(f"{self.name} lost the lease on job {job_id}; result discarded")
+
+    async def _heartbeat(self, job_id: str, on_lost: Callable[[], None]):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await asyncio.to_thread(self.store.heartbeat, job_id, self.name, self.lease_seconds):
+                logger.warning(f"{self.name} could not renew the lease on job {job_id}")
+                on_lost()
+                return
+
+
+async def run_worker_pool(workers: List[JobWorker], exit_when_idle: bool = False,
+                          wake: Optional[asyncio.Event] = None, stop: Optional[asyncio.Event] = None,
+                          install_signal_handlers: bool = True):
+    """Run workers until SIGINT/SIGTERM or stop (or an idle queue); running jobs finish before exit"""
+    stop = stop or asyncio.Event()
+    if install_signal_handlers:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+    logger.info(f"Starting {len(workers)} workers")
+    await asyncio.gather(*(w.run(stop, wake=wake, exit_when_idle=exit_when_idle) for w in workers))
+    logger.info(f"Workers stopped after {sum(w.jobs_run for w in workers)} jobs")
@@ -0,0 +1,202 @@
+"""Append-only ledger of AI calls: payload, tokens, latency and cache hits per call"""
+
+import json
+import logging
+import os
+import socket
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .request_coalescer import part_bytes
+
+logger = logging.getLogger(__name__)
+
+# Fields inner clients can fill in for the call in flight (see note_call)
+_call: ContextVar[Optional[Dict[str, Any]]] = ContextVar("ai_ledger_call", default=None)
+# (input path, video duration) of the job making calls
+_job: ContextVar[Optional[Dict[str, Any]]] = ContextVar("ai_ledger_job", default=None)
+
+
+def note_call(**fields):
+    """
+    Annotate the ledger record of the AI call in flight
+
+    Clients wrapped by LedgerClient call this for what only they can see, e.g.
+    cache_hit=True from the replay client.
+    A no-op when no ledger is recording.
+    """
+    record = _call.get()
+    if record is not None:
+        record.update(fields)
+
+
+@contextmanager
+def ledger_job(input_path: str, duration: Optional[float] = None) -> Iterator[None]:
+    """Attribute AI calls in the enclosed block to one video"""
+    token = _job.set({"video": input_path, "video_seconds": duration})
+    try:
+        yield
+    finally:
+        _job.reset(token)
+
+
+def default_batch_id() -> str:
+    """One batch per process run: start time, host and pid"""
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{socket.gethostname()}-{os.getpid()}"
+
+
+def message_stats(messages: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Image count and approximate payload bytes of a chat request"""
+    images = payload = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            payload += len(content)
+            continue
+        for part in content or []:
+            images += part.get("type") == "image_url"
+            payload += part_bytes(part)
+    return {"images": images, "payload_bytes": payload}
+
+
+class LedgerClient:
+    """
+    create_completion wrapper that appends one JSON line per call to a ledger file
+
+    Each record holds the batch id, video, model, image count, payload bytes,
+    prompt/completion tokens (from the response's usage block when the provider
+    returns one), latency and whether the response came from the replay corpus. Lines are written with a single O_APPEND write, so several
+    workers or forked processes can share one ledger.
+    """
+
+    def __init__(self, inner, path: str, batch_id: Optional[str] = None):
+        self.inner = inner
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_id = batch_id or default_batch_id()
+
+    async def create_completion(self, messages: List[Dict[str, Any]], model: str, **kwargs) -> Dict[str, Any]:
+        record: Dict[str, Any] = {
+            "batch": self.batch_id,
+            **(_job.get() or {"video": None, "video_seconds": None}),
+            "model": model,
+            **message_stats(messages),
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "cache_hit": False
+        }
+        token = _call.set(record)
+        start = time.perf_counter()
+        try:
+            response = await self.inner.create_completion(messages=messages, model=model, **kwargs)
+        except Exception as e:
+            record["error"] = str(e)
+            raise
+        else:
+            usage = response.get("usage") or {}
+            record["prompt_tokens"] = usage.get("prompt_tokens", record["prompt_tokens"])
+            record["completion_tokens"] = usage.get("completion_tokens", record["completion_tokens"])
+            return response
+        finally:
+            _call.reset(token)
+            record["latency_seconds"] = round(time.perf_counter() - start, 6)
+            record["at"] = time.time()
+            self._append(record)
+
+    def _append(self, record: Dict[str, Any]):
+        line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.warning(f"Could not write AI ledger record to {self.path}: {e}")
+
+
+def read_ledger(path: str) -> List[Dict[str, Any]]:
+    """All records in a ledger, skipping a torn last line"""
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile (q in 0..100) of values, None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Totals and latency percentiles per batch
+
+    Per-minute rates divide by the summed durations of the distinct videos that
+    made calls in the batch.
+    """
+    batches: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        batches.setdefault(record.get("batch") or "unknown", []).append(record)
+
+    summary = {}
+    for batch, calls in batches.items():
+        def total(key: str) -> int:
+            return sum(c.get(key) or 0 for c in calls)
+
+        latencies = [c["latency_seconds"] for c in calls if c.get("latency_seconds") is not None]
+        videos = {c["video"]: c.get("video_seconds") or 0 for c in calls if c.get("video")}
+        minutes = sum(videos.values()) / 60
+
+        stats: Dict[str, Any] = {
+            "calls": len(calls),
+            "errors": sum(1 for c in calls if c.get("error")),
+            "cache_hits": sum(1 for c in calls if c.get("cache_hit")),
+            "videos": len(videos),
+            "video_minutes": round(minutes, 3),
+            "images": total("images"),
+            "payload_bytes": total("payload_bytes"),
+            "prompt_tokens": total("prompt_tokens"),
+            "completion_tokens": total("completion_tokens"),
+            "latency_seconds": {f"p{q}": percentile(latencies, q) for q in (50, 90, 99)},
+            "latency_total_seconds": round(sum(latencies), 6),
+            "models": sorted({c.get("model") for c in calls if c.get("model")})
+        }
+        if minutes:
+            stats["images_per_minute"] = round(stats["images"] / minutes, 3)
+            stats["payload_bytes_per_minute"] = round(stats["payload_bytes"] / minutes, 1)
+        summary[batch] = stats
+    return summary
+
+
+def format_summary(summary: Dict[str, Dict[str, Any]]) -> str:
+    """Human-readable report of summarize() output"""
+    def seconds(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.2f}s"
+
+    lines = []
+    for batch, s in summary.items():
+        latency = s["latency_seconds"]
+        lines.append(f"Batch {batch}: {s['calls']} calls ({s['errors']} failed, {s['cache_hits']} cache hits) "
+                     f"for {s['videos']} videos / {s['video_minutes']:.2f} min")
+        lines.append(f"  sent {s['images']} images, {s['payload_bytes'] / 1e6:.2f} MB; "
+                     f"tokens {s['prompt_tokens']} in / {s['completion_tokens']} out")
+        if "images_per_minute" in s:
+            lines.append(f"  per video minute: {s['images_per_minute']:.1f} images, "
+                         f"{s['payload_bytes_per_minute'] / 1e6:.2f} MB")
+        lines.append(f"  latency p50 {seconds(latency['p50'])}, p90 {seconds(latency['p90'])}, "
+                     f"p99 {seconds(latency['p99'])}, total {s['latency_total_seconds']:.1f}s")
+    return "\n".join(lines)
@@ -0,0 +1,143 @@
+"""Streaming audio features: RMS energy, onsets and silence spans from decoded PCM blocks"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Mono float PCM rate the demux pass resamples audio to; plenty for energy and onsets
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class AudioFeatures:
+    """
+    Audio features of one video on the hop grid
+
+    rms holds one value per hop_seconds (linear, 0-1 full scale); onsets are
+    timestamps where energy jumps (speech starts, beats, hits); silences are
+    (start, end) spans quieter than the extractor's silence floor.
+    """
+    duration: float = 0.0
+    hop_seconds: float = 0.01
+    rms: Any = None  # numpy array; not serialised
+    onsets: List[float] = field(default_factory=list)
+    silences: List[Tuple[float, float]] = field(default_factory=list)
+
+    def snap(self, timestamp: float, max_shift: float = 0.25) -> float:
+        """The onset nearest to timestamp when one is within max_shift, else timestamp unchanged"""
+        import bisect
+
+        i = bisect.bisect_left(self.onsets, timestamp)
+        candidates = self.onsets[max(0, i - 1):i + 1]
+        if not candidates:
+            return timestamp
+        nearest = min(candidates, key=lambda t: abs(t - timestamp))
+        return nearest if abs(nearest - timestamp) <= max_shift else timestamp
+
+    def silent_between(self, start: float, end: float) -> float:
+        """Seconds of silence inside [start, end)"""
+        return sum(max(0.0, min(end, s1) - max(start, s0)) for s0, s1 in self.silences)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "duration": round(self.duration, 3),
+            "hop_seconds": self.hop_seconds,
+            "onsets": [round(t, 3) for t in self.onsets],
+            "silences": [[round(s, 3), round(e, 3)] for s, e in self.silences]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["AudioFeatures"]:
+        if not data:
+            return None
+        return cls(duration=float(data.get("duration", 0.0)), hop_seconds=float(data.get("hop_seconds", 0.01)),
+                   onsets=[float(t) for t in data.get("onsets", [])],
+                   silences=[(float(s), float(e)) for s, e in data.get("silences", [])])
+
+
+class AudioFeatureExtractor:
+    """
+    Accumulates RMS energy from PCM blocks as they are decoded, then derives onsets and silences
+
+    feed() takes float32 mono blocks of any length; samples are grouped into
+    hops and reduced with one reshape per block, and a partial hop carries
+    over to the next block. finish() works on the RMS envelope (100 values a
+    second at the default hop), so it is cheap however long the audio is.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, hop_seconds: float = 0.01, silence_db: float = -45.0,
+                 min_silence: float = 0.5, onset_db: float = 6.0, min_onset_gap: float = 0.1):
+        """
+        Args:
+            sample_rate: Rate of the PCM passed to feed()
+            hop_seconds: Resolution of the RMS envelope
+            silence_db: Hops quieter than this (dBFS) count as silent
+            min_silence: Shortest silent run reported as a silence span
+            onset_db: Energy rise over two hops (dB) that marks an onset
+            min_onset_gap: Onsets closer than this keep only the stronger one
+        """
+        self.sample_rate = sample_rate
+        self.hop = max(1, int(round(sample_rate * hop_seconds)))
+        self.hop_seconds = self.hop / sample_rate
+        self.silence_db = silence_db
+        self.min_silence = min_silence
+        self.onset_db = onset_db
+        self.min_onset_gap = min_onset_gap
+        self._blocks: List[Any] = []
+        self._carry = None
+        self.samples = 0
+
+    def feed(self, block):
+        """Add a block of float32 mono samples; the block may be reused by the caller afterwards"""
+        import numpy as np
+
+        self.samples += len(block)
+        if self._carry is not None and len(self._carry):
+            block = np.concatenate((self._carry, block))
+        whole = len(block) // self.hop * self.hop
+        if whole:
+            hops = block[:whole].reshape(-1, self.hop)
+            self._blocks.append(np.sqrt(np.einsum("ij,ij->i", hops, hops) / self.hop))
+        self._carry = block[whole:].copy()
+
+    def finish(self) -> AudioFeatures:
+        import numpy as np
+
+        if self._carry is not None and len(self._carry):
+            self._blocks.append(np.sqrt(np.array([np.mean(self._carry ** 2)])))
+            self._carry = None
+        rms = np.concatenate(self._blocks).astype(np.float32) if self._blocks else np.zeros(0, np.float32)
+        level = 20.0 * np.log10(np.maximum(rms, 1e-6))
+        return AudioFeatures(duration=self.samples / self.sample_rate, hop_seconds=self.hop_seconds, rms=rms,
+                             onsets=self._onsets(level), silences=self._silences(level))
+
+    def _onsets(self, level) -> List[float]:
+        """Local maxima of the two-hop energy rise that clear onset_db and the silence floor"""
+        import numpy as np
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        if len(level) < 3:
+            return []
+        rise = np.zeros_like(level)
+        rise[2:] = level[2:] - level[:-2]
+        gap = max(1, int(round(self.min_onset_gap / self.hop_seconds)))
+        padded = np.pad(rise, gap, mode="constant", constant_values=-np.inf)
+        local_max = sliding_window_view(padded, 2 * gap + 1).max(axis=1)
+        peaks = (rise >= self.onset_db) & (rise == local_max) & (level > self.silence_db)
+        indices = np.flatnonzero(peaks)
+        # A step shows up in two consecutive two-hop rises; keep the first, where the step is
+        if len(indices):
+            indices = indices[np.concatenate(([True], np.diff(indices) > gap))]
+        return [round(float(i) * self.hop_seconds, 3) for i in indices]
+
+    def _silences(self, level) -> List[Tuple[float, float]]:
+        import numpy as np
+
+        quiet = np.concatenate(([False], level < self.silence_db, [False]))
+        edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+        starts, ends = edges[::2], edges[1::2]
+        keep = (ends - starts) * self.hop_seconds >= self.min_silence
+        return [(round(float(s) * self.hop_seconds, 3), round(float(e) * self.hop_seconds, 3))
+                for s, e in zip(starts[keep], ends[keep])]
@@ -0,0 +1,138 @@
+"""Tile sampled frames into labeled contact-sheet images so one image carries many samples"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ContactSheetCell:
+    """One tile of a contact sheet; cell numbers are 1-based and global across sheets"""
+    cell: int
+    timestamp: float
+    frame_path: str
+
+
+@dataclass
+class ContactSheet:
+    """A grid image of downscaled frames with the cell number and timestamp burned into each tile"""
+    image_path: str
+    rows: int
+    cols: int
+    cells: List[ContactSheetCell] = field(default_factory=list)
+
+    @property
+    def first_cell(self) -> int:
+        return self.cells[0].cell if self.cells else 0
+
+    @property
+    def last_cell(self) -> int:
+        return self.cells[-1].cell if self.cells else 0
+
+
+def build_contact_sheets(frame_paths: List[str], timestamps: List[float], output_dir: str,
+                         grid: Tuple[int, int] = (3, 3), cell_width: int = 320,
+                         jpeg_quality: int = 85) -> List[ContactSheet]:
+    """
+    Tile frames into as many rows x cols sheets as needed
+
+    Args:
+        frame_paths: Extracted frame images, index-aligned with timestamps
+        timestamps: Timestamp in seconds of each frame
+        output_dir: Where to write the sheet JPEGs
+        grid: (rows, cols) per sheet
+        cell_width: Width in pixels of each tile; height follows the first frame's aspect ratio
+    """
+    import cv2
+    import numpy as np
+
+    rows, cols = grid
+    per_sheet = rows * cols
+    sheets = []
+    cell_height = None
+
+    for sheet_index, offset in enumerate(range(0, len(frame_paths), per_sheet)):
+        chunk = list(zip(frame_paths[offset:offset + per_sheet], timestamps[offset:offset + per_sheet]))
+        canvas = None
+        sheet = ContactSheet(image_path=str(Path(output_dir) / f"contact_sheet_{sheet_index:03d}.jpg"),
+                             rows=rows, cols=cols)
+
+        for position, (frame_path, timestamp) in enumerate(chunk):
+            frame = cv2.imread(frame_path)
+            if frame is None:
+                logger.warning(f"Skipping unreadable frame for contact sheet: {frame_path}")
+                continue
+            if cell_height is None:
+                cell_height = max(1, round(frame.shape[0] * cell_width / frame.shape[1]))
+            if canvas is None:
+                canvas = np.zeros((rows * cell_height, cols * cell_width, 3), dtype=np.uint8)
+
+            cell = offset + position + 1
+            tile = cv2.resize(frame, (cell_width, cell_height), interpolation=cv2.INTER_AREA)
+            _draw_label(tile, f"#{cell} {timestamp:.1f}s")
+
+            y, x = (position // cols) * cell_height, (position % cols) * cell_width
+            canvas[y:y + cell_height, x:x + cell_width] = tile
+            sheet.cells.append(ContactSheetCell(cell=cell, timestamp=timestamp, frame_path=frame_path))
+
+        if canvas is None:
+            continue
+        cv2.imwrite(sheet.image_path, canvas, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+        sheets.append(sheet)
+
+    logger.info(f"Tiled {sum(len(s.cells) for s in sheets)} frames into {len(sheets)} contact sheet(s)")
+    return sheets
+
+
+def _draw_label(tile, label: str):
+    """Burn a label into the top-left corner of a tile on a dark box"""
+    import cv2
+
+    scale = max(0.4, tile.shape[1] / 640.0)
+    thickness = max(1, round(scale * 1.5))
+    (text_w, text_h), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    cv2.rectangle(tile, (0, 0), (text_w + 8, text_h + baseline + 8), (0, 0, 0), -1)
+    cv2.putText(tile, label, (4, text_h + 4), cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+
+
+def cell_timestamps(sheets: List[ContactSheet]) -> Dict[int, float]:
+    """Map global cell number -> exact frame timestamp"""
+    return {cell.cell: cell.timestamp for sheet in sheets for cell in sheet.cells}
+
+
+def resolve_cell_references(edits: List[Dict[str, Any]], sheets: List[ContactSheet]) -> List[Dict[str, Any]]:
+    """
+    Replace the model's cell references with exact timestamps
+
+    Accepts "cell": 4, "cell": "#4" or a per-sheet "sheet" + "cell" pair (both 1-based).
+    Edits that reference an unknown cell keep whatever timestamp the model gave.
+    """
+    timestamps = cell_timestamps(sheets)
+
+    for edit in edits:
+        cell = _parse_cell(edit.get("cell"))
+        if cell is None:
+            continue
+        sheet = _parse_cell(edit.get("sheet"))
+        if sheet is not None and 1 <= sheet <= len(sheets) and cell <= len(sheets[sheet - 1].cells):
+            cell = sheets[sheet - 1].first_cell + cell - 1
+        if cell in timestamps:
+            edit["timestamp"] = timestamps[cell]
+        else:
+            logger.warning(f"Model referenced unknown contact sheet cell: {edit.get('cell')}")
+
+    return edits
+
+
+def _parse_cell(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        digits = value.strip().lstrip("#")
+        return int(digits) if digits.isdigit() else None
+    return None
@@ -0,0 +1,176 @@
+"""Edit decision list: typed, time-sorted edits with an interval index"""
+
+import bisect
+import logging
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TEXT_OVERLAY = "text_overlay"
+EFFECT_ENHANCEMENT = "effect_enhancement"
+SCENE_TRANSITION = "scene_transition"
+
+# How long a text overlay stays up when the analysis gives only a timestamp
+DEFAULT_TEXT_SECONDS = 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class Edit:
+    """One edit over [start, end) seconds; text and position only apply to text overlays"""
+    start: float
+    end: float
+    kind: str
+    text: Optional[str] = None
+    position: Optional[str] = None
+
+    @property
+    def merge_key(self):
+        # Overlays with different text can't become one overlay
+        return (self.kind, self.text, self.position)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+class EditList:
+    """
+    Immutable, time-sorted edit decision list
+
+    Construction clamps edits to [0, duration] (dropping those left empty),
+    merges overlapping or touching edits with the same kind (and text), and
+    builds an interval index: start times plus a running maximum of end times,
+    so active(t0, t1) bisects to the few candidates instead of scanning.
+    """
+
+    __slots__ = ("edits", "duration", "_starts", "_max_ends")
+
+    def __init__(self, edits: Iterable[Edit] = (), duration: Optional[float] = None):
+        self.duration = duration
+        self.edits: List[Edit] = _merge(_clamp(edits, duration))
+        self._starts = [e.start for e in self.edits]
+        self._max_ends: List[float] = []
+        for edit in self.edits:
+            self._max_ends.append(max(edit.end, self._max_ends[-1]) if self._max_ends else edit.end)
+
+    def __len__(self) -> int:
+        return len(self.edits)
+
+    def __iter__(self) -> Iterator[Edit]:
+        return iter(self.edits)
+
+    def __bool__(self) -> bool:
+        return bool(self.edits)
+
+    def active(self, t0: float, t1: float) -> List[Edit]:
+        """Edits overlapping [t0, t1), in start order"""
+        hi = bisect.bisect_left(self._starts, t1)
+        # _max_ends is non-decreasing: everything before lo ends at or before t0
+        lo = bisect.bisect_right(self._max_ends, t0, 0, hi)
+        return [e for e in self.edits[lo:hi] if e.end > t0]
+
+    def of_kind(self, kind: str) -> List[Edit]:
+        return [e for e in self.edits if e.kind == kind]
+
+    def snapped(self, snap: Callable[[float], float]) -> "EditList":
+        """
+        Move every start and end through snap (e.g. AudioFeatures.snap to land cuts on onsets)
+
+        An edit whose snapped boundaries would leave it empty keeps its original times.
+        """
+        edits = []
+        for edit in self.edits:
+            start, end = snap(edit.start), snap(edit.end)
+            edits.append(replace(edit, start=start, end=end) if end > start else edit)
+        return EditList(edits, self.duration)
+
+    def shifted(self, offset: float, duration: Optional[float] = None) -> "EditList":
+        """Every edit moved by offset seconds, re-clamped to the new duration (e.g. after a trim)"""
+        return EditList((replace(e, start=e.start + offset, end=e.end + offset) for e in self.edits), duration)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [e.to_dict() for e in self.edits]
+
+    @classmethod
+    def from_dicts(cls, records: Iterable[Dict[str, Any]], duration: Optional[float] = None) -> "EditList":
+        edits = []
+        for record in records:
+            try:
+                edits.append(Edit(start=float(record["start"]), end=float(record["end"]), kind=record["kind"],
+                                  text=record.get("text"), position=record.get("position")))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping malformed edit {record}: {e}")
+        return cls(edits, duration)
+
+    @classmethod
+    def from_ai_edits(cls, edits_to_apply: Iterable[Dict[str, Any]], duration: Optional[float] = None) -> "EditList":
+        """Build from the model's edits_to_apply; only text overlays carry enough to render"""
+        edits = []
+        for edit in edits_to_apply:
+            if edit.get("edit_type") == TEXT_OVERLAY and edit.get("text"):
+                timestamp = float(edit.get("timestamp", 0))
+                edits.append(Edit(start=timestamp, end=timestamp + DEFAULT_TEXT_SECONDS, kind=TEXT_OVERLAY,
+                                  text=edit["text"], position=edit.get("position", "center")))
+        return cls(edits, duration)
+
+    @classmethod
+    def from_analysis(cls, analysis: Dict[str, Any], duration: Optional[float] = None) -> "EditList":
+        """
+        Read the edit list out of an analysis result
+
+        Uses its edit_list when present. Otherwise falls back to the older
+        frames_to_edit / text_overlay_suggestions shape (top level, or under
+        "analysis" as the heuristic results nest it). A text_overlay segment in
+        frames_to_edit that a suggestion overlaps only mirrors that suggestion
+        and is skipped; one no suggestion covers is kept (without text).
+        """
+        if "edit_list" in analysis:
+            return cls.from_dicts(analysis["edit_list"], duration)
+
+        source = analysis
+        if "frames_to_edit" not in analysis and isinstance(analysis.get("analysis"), dict):
+            source = analysis["analysis"]
+
+        edits = []
+        for suggestion in source.get("text_overlay_suggestions", []):
+            timestamp = float(suggestion.get("timestamp", 0))
+            edits.append(Edit(start=timestamp, end=timestamp + float(suggestion.get("duration", DEFAULT_TEXT_SECONDS)),
+                              kind=TEXT_OVERLAY, text=suggestion.get("text", ""),
+                              position=suggestion.get("position", "center")))
+        suggestions = list(edits)
+        for segment in source.get("frames_to_edit", []):
+            if isinstance(segment, dict):
+                start = float(segment.get("start", 0))
+                end, kind = float(segment.get("end", start + 2)), segment.get("type", "unknown")
+            else:
+                start, end, kind = float(segment), float(segment) + 1, "unknown"
+            if kind == TEXT_OVERLAY and any(e.start < end and e.end > start for e in suggestions):
+                continue
+            edits.append(Edit(start=start, end=end, kind=kind))
+        return cls(edits, duration)
+
+
+def _clamp(edits: Iterable[Edit], duration: Optional[float]) -> List[Edit]:
+    clamped = []
+    for edit in edits:
+        start = max(0.0, edit.start)
+        end = edit.end if duration is None else min(edit.end, duration)
+        if end > start:
+            clamped.append(edit if (start, end) == (edit.start, edit.end) else replace(edit, start=start, end=end))
+    return clamped
+
+
+def _merge(edits: List[Edit]) -> List[Edit]:
+    edits = sorted(edits, key=lambda e: (e.start, e.end))
+    merged: List[Edit] = []
+    # Last merged edit per key; an edit only ever extends the latest one of its key
+    open_by_key: Dict[Any, int] = {}
+    for edit in edits:
+        index = open_by_key.get(edit.merge_key)
+        if index is not None and edit.start <= merged[index].end:
+            if edit.end > merged[index].end:
+                merged[index] = replace(merged[index], end=edit.end)
+            continue
+        open_by_key[edit.merge_key] = len(merged)
+        merged.append(edit)
+    return merged
@@ -4,9 +4,12 @@ import subprocess
 import json
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import tempfile
 
+from .edit_list import EFFECT_ENHANCEMENT, SCENE_TRANSITION, TEXT_OVERLAY, EditList
+from .ffmpeg import run_ffmpeg
+
 logger = logging.getLogger(__name__)
 
 class VideoEditor:
@@ -70,144 +73,178 @@ class VideoEditor:
         
         try:
             logger.info(f"Adding {len(overlays)} text overlays to video")
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = run_ffmpeg(cmd)
             logger.info("Text overlays added successfully")
             return True
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to add text overlays: {e.stderr}")
             return False
     
-    def apply_effects_at_timestamps(self, input_video: str, output_video: str, effects: List[Dict[str, Any]]) -> bool:
+    def apply_effects_at_timestamps(self, input_video: str, output_video: str, effects: List[Dict[str, Any]],
+                                    probe=None) -> bool:
         """
         Apply visual effects at specific timestamps
         
+        Only the keyframe-aligned ranges around the effects are decoded and
+        re-encoded (see EffectEngine); the rest of the video is stream-copied.
+        
         Args:
             input_video: Path to input video
             output_video: Path to output video  
-            effects: List of effect configs with start, end, type
+            effects: List of effect configs with start, end, type and optional
+                effect parameters (any registered effect name is a valid type)
+            probe: VideoProbe of the input, probed when omitted
         """
+        from .effect_engine import EffectEngine, EffectRange
+        
         if not effects:
             logger.warning("No effects to apply")
             return False
         
-        effect_filters = []
-        
+        ranges = []
         for effect in effects:
             start = effect.get('start', 0)
-            end = effect.get('end', start + 2)
-            effect_type = effect.get('type', 'blur')
-            
-            if effect_type == 'blur':
-                # Apply blur effect during specified time
-                filter_str = f"boxblur=5:enable='between(t,{start},{end})'"
-            elif effect_type == 'brightness':
-                # Increase brightness
-                filter_str = f"eq=brightness=0.3:enable='between(t,{start},{end})'"
-            elif effect_type == 'contrast':
-                # Increase contrast
-                filter_str = f"eq=contrast=1.5:enable='between(t,{start},{end})'"
-            elif effect_type == 'zoom':
-                # Zoom in effect
-                filter_str = f"zoompan=z='if(between(t,{start},{end}),min(zoom+0.01,1.5),1)':d=1:s=640x480"
-            else:
-                continue
-            
-            effect_filters.append(filter_str)
-        
-        if not effect_filters:
-            return False
-        
-        filter_complex = ','.join(effect_filters)
-        
-        cmd = [
-            'ffmpeg', '-i', input_video,
-            '-vf', filter_complex,
-            '-c:a', 'copy',
-            '-y', output_video
-        ]
+            ranges.append(EffectRange(
+                start=start,
+                end=effect.get('end', start + 2),
+                effect=effect.get('type', 'blur'),
+                params={k: v for k, v in effect.items() if k not in ('start', 'end', 'type')}
+            ))
         
         try:
             logger.info(f"Applying {len(effects)} effects to video")
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            stats = EffectEngine(temp_dir=self.temp_dir).apply(input_video, output_video, ranges, probe=probe)
             logger.info("Effects applied successfully")
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to apply effects: {e.stderr}")
+            return stats["segments"] > 0
+        except (subprocess.CalledProcessError, ValueError) as e:
+            logger.error(f"Failed to apply effects: {getattr(e, 'stderr', None) or e}")
             return False
     
-    def create_enhanced_video(self, input_video: str, output_video: str, ai_analysis: Dict[str, Any]) -> bool:
+    def build_filters(self, edits: EditList) -> List[str]:
         """
-        Create enhanced video by applying all edits from AI analysis
+        One -vf filter chain for an edit list
         
-        This is the main method that combines text overlays and effects
+        Each text overlay needs its own drawtext and each transition its own fade,
+        but every brightness segment shares a single eq filter enabled over all of
+        its intervals.
         """
-        logger.info("Creating enhanced video with AI-suggested edits")
-        
-        # Extract edit instructions from AI analysis
-        frames_to_edit = ai_analysis.get('frames_to_edit', [])
-        text_suggestions = ai_analysis.get('text_overlay_suggestions', [])
-        
-        # Build combined filter chain
         filters = []
         
-        # Add text overlays
-        for suggestion in text_suggestions:
-            timestamp = suggestion.get('timestamp', 0)
-            text = suggestion.get('text', '')
-            position = suggestion.get('position', 'center')
-            
-            if position == 'center':
+        for edit in edits.of_kind(TEXT_OVERLAY):
+            if edit.text is None:
+                # A segment marked for text without any text to draw
+                continue
+            if edit.position == 'center':
                 x, y = '(w-text_w)/2', '(h-text_h)/2'
-            elif position == 'bottom':
+            elif edit.position == 'bottom':
                 x, y = '(w-text_w)/2', 'h-text_h-50'
             else:
                 x, y = '(w-text_w)/2', '50'
             
-            filter_str = (
-                f"drawtext=text='{text}':fontsize=48:fontcolor=white:"
+            filters.append(
+                f"drawtext=text='{edit.text}':fontsize=48:fontcolor=white:"
                 f"box=1:boxcolor=black@0.5:boxborderw=5:"
                 f"x={x}:y={y}:"
-                f"enable='between(t,{timestamp},{timestamp + 2})'"
+                f"enable='between(t,{edit.start},{edit.end})'"
             )
-            filters.append(filter_str)
         
-        # Add effects for specific segments
-        for segment in frames_to_edit:
-            start = segment.get('start', 0)
-            end = segment.get('end', start + 2)
-            edit_type = segment.get('type', '')
-            
-            if edit_type == 'effect_enhancement':
-                # Add a subtle brightness boost
-                filters.append(f"eq=brightness=0.1:enable='between(t,{start},{end})'")
-            elif edit_type == 'scene_transition':
-                # Add fade effect
-                filters.append(f"fade=t=in:st={start}:d=0.5")
-        
-        if not filters:
-            logger.warning("No edits to apply, copying original video")
-            subprocess.run(['cp', input_video, output_video], check=True)
+        enhancements = edits.of_kind(EFFECT_ENHANCEMENT)
+        if enhancements:
+            # A subtle brightness boost over every enhanced segment
+            enable = '+'.join(f"between(t,{e.start},{e.end})" for e in enhancements)
+            filters.append(f"eq=brightness=0.1:enable='{enable}'")
+        
+        for edit in edits.of_kind(SCENE_TRANSITION):
+            filters.append(f"fade=t=in:st={edit.start}:d=0.5")
+        
+        return filters
+    
+    def render_incremental(self, input_video: str, output_video: str,
+                           ai_analysis: Union[Dict[str, Any], EditList], state_dir: str,
+                           pre_filters: Optional[List[str]] = None, probe=None,
+                           source: Optional[str] = None, packaging=None) -> bool:
+        """
+        create_enhanced_video, re-encoding only the segments whose edits changed since the last render
+        
+        state_dir keeps this output's segments and segment map between renders
+        (see IncrementalRenderer). The joined output gets packaging's MP4
+        layout; an HLS ladder needs a full render. Falls back to a full render
+        if it fails.
+        """
+        from .incremental import IncrementalRenderer
+        
+        edits = ai_analysis if isinstance(ai_analysis, EditList) else EditList.from_analysis(ai_analysis)
+        try:
+            IncrementalRenderer(self).render(input_video, output_video, edits, state_dir,
+                                             pre_filters=pre_filters, probe=probe, source=source,
+                                             movflags=packaging.movflags(output_video) if packaging else None)
             return True
+        except (subprocess.CalledProcessError, ValueError) as e:
+            logger.error(f"Incremental render failed, rendering in full: {getattr(e, 'stderr', None) or e}")
+            return self.create_enhanced_video(input_video, output_video, edits, pre_filters, packaging, probe)
+    
+    def create_enhanced_video(self, input_video: str, output_video: str,
+                              ai_analysis: Union[Dict[str, Any], EditList],
+                              pre_filters: Optional[List[str]] = None, packaging=None, probe=None) -> bool:
+        """
+        Create enhanced video by applying all edits from AI analysis
         
-        # Combine all filters
-        filter_complex = ','.join(filters)
+        This is the main method that combines text overlays and effects. Takes
+        the analysis result (read through EditList.from_analysis) or an EditList.
+        pre_filters (e.g. the auto-reframe crop) run first in the same pass, so
+        overlays are laid out on the final frame. packaging (a Packaging,
+        faststart MP4 by default) is applied by this same pass; an HLS ladder
+        needs the input's probe for its height and audio.
+        """
+        from .packaging import Packaging
         
-        # Run ffmpeg with all filters
-        cmd = [
-            'ffmpeg', '-i', input_video,
-            '-vf', filter_complex,
+        logger.info("Creating enhanced video with AI-suggested edits")
+        
+        packaging = packaging or Packaging()
+        edits = ai_analysis if isinstance(ai_analysis, EditList) else EditList.from_analysis(ai_analysis)
+        filters = list(pre_filters or []) + self.build_filters(edits)
+        hls = packaging.hls_outputs(f"[0:v]{','.join(filters) or 'null'},", probe)
+        
+        if not filters and hls is None:
+            logger.warning("No edits to apply, copying original video")
+            self.copy_packaged(input_video, output_video, packaging)
+            return True
+        
+        cmd = ['ffmpeg', '-i', input_video]
+        if hls is not None:
+            graph, hls_args = hls
+            cmd += ['-filter_complex', graph, '-map', '[main]', '-map', '0:a?']
+        else:
+            # Combine all filters
+            cmd += ['-vf', ','.join(filters)]
+        cmd += [
             '-c:a', 'copy',  # Preserve audio
             '-preset', 'fast',  # Faster encoding
+            *packaging.mp4_args(output_video),
             '-y', output_video
         ]
+        if hls is not None:
+            Path(packaging.hls_dir).mkdir(parents=True, exist_ok=True)
+            cmd += hls_args
         
         try:
             logger.info(f"Applying {len(filters)} edits to video")
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = run_ffmpeg(cmd)
             logger.info(f"Enhanced video created successfully: {output_video}")
             return True
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to create enhanced video: {e.stderr}")
             # Fallback: copy original
-            subprocess.run(['cp', input_video, output_video], check=True)
-            return False
\ No newline at end of file
+            self.copy_packaged(input_video, output_video, packaging)
+            return False
+    
+    def copy_packaged(self, input_video: str, output_video: str, packaging) -> None:
+        """Copy input_video to output_video, remuxing it into packaging's MP4 layout when it has one"""
+        if packaging.movflags(output_video):
+            try:
+                run_ffmpeg(['ffmpeg', '-v', 'error', '-i', input_video, '-map', '0', '-c', 'copy',
+                            *packaging.mp4_args(output_video), '-y', output_video])
+                return
+            except subprocess.CalledProcessError as e:
+                logger.warning(f"Remuxing {input_video} failed, copying it as is: {e.stderr}")
+        subprocess.run(['cp', input_video, output_video], check=True)
@@ -0,0 +1,321 @@
+"""
+Frame effects applied in Python to just the frame ranges that need them
+
+Affected ranges are widened to keyframes, decoded through a rawvideo pipe,
+run through batched NumPy/OpenCV effect functions and piped back into an
+encoder; everything between them is stream-copied, and the pieces are
+concatenated with the original audio muxed back on top.
+"""
+
+import bisect
+import logging
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .ffmpeg import ffmpeg_pipe, run_ffmpeg
+from .instrumentation import count, span
+
+logger = logging.getLogger(__name__)
+
+# name -> function(frames, **params) -> frames, where frames is a uint8 (N, H, W, 3) BGR batch.
+# Functions may modify frames in place and return it, or return a new array of the same shape.
+EffectFunction = Callable[..., Any]
+_EFFECTS: Dict[str, EffectFunction] = {}
+
+# H.264 profiles (as ffprobe reports them) of 8-bit 4:2:0 sources, and the libx264
+# profile that re-encoded pieces need to concatenate with stream-copied ones
+_CONCAT_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high"}
+
+
+def register_effect(name: str) -> Callable[[EffectFunction], EffectFunction]:
+    """Decorator registering a batched effect under name (replacing any existing one)"""
+    def decorator(fn: EffectFunction) -> EffectFunction:
+        _EFFECTS[name] = fn
+        return fn
+    return decorator
+
+
+def effect_names() -> List[str]:
+    return sorted(_EFFECTS)
+
+
+@dataclass(slots=True)
+class EffectRange:
+    """Apply effect with params to frames in [start, end) seconds"""
+    start: float
+    end: float
+    effect: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class Segment:
+    """A stretch of the output: stream-copied, or decoded and re-encoded with effects"""
+    start: float
+    end: float
+    reencode: bool
+
+
+def plan_segments(ranges: Sequence[Tuple[float, float]], keyframes: Sequence[float],
+                  duration: float) -> List[Segment]:
+    """
+    Cover [0, duration] with copy segments and keyframe-aligned re-encode segments
+
+    Each range is widened back to the keyframe at or before its start and forward
+    to the keyframe at or after its end, so every copy segment starts on a
+    keyframe and can be cut without decoding. Widened ranges that touch merge.
+    With no keyframes the whole video is one re-encode segment.
+    """
+    keyframes = sorted(keyframes)
+    widened: List[List[float]] = []
+    for start, end in sorted(ranges):
+        i = bisect.bisect_right(keyframes, start) - 1
+        j = bisect.bisect_left(keyframes, end)
+        lo = keyframes[i] if i >= 0 else 0.0
+        hi = keyframes[j] if j < len(keyframes) else duration
+        if widened and lo <= widened[-1][1]:
+            widened[-1][1] = max(widened[-1][1], hi)
+        else:
+            widened.append([lo, hi])
+
+    segments = []
+    cursor = 0.0
+    for lo, hi in widened:
+        if lo > cursor:
+            segments.append(Segment(cursor, lo, reencode=False))
+        segments.append(Segment(lo, hi, reencode=True))
+        cursor = hi
+    if cursor < duration:
+        segments.append(Segment(cursor, duration, reencode=False))
+    return segments
+
+
+def copy_entry(input_video: str, start: float, end: float, decode_times: Dict[float, float],
+               duration: float) -> str:
+    """
+    Concat-list entry that stream-copies [start, end) straight out of the source
+
+    start and end are keyframe presentation times (end may be the duration).
+    The demuxer stops at a decoding time, so the cut lands at the end
+    keyframe's dts from decode_times: stopping at its pts would let packets
+    decoded before it (it and any reordered frames) leak in. duration keeps
+    the next piece's timestamps on the presentation timeline.
+    """
+    entry = f"file '{Path(input_video).resolve()}'\ninpoint {start}\n"
+    if end < duration:
+        entry += f"outpoint {decode_times.get(end, end)}\n"
+    return entry + f"duration {end - start}\n"
+
+
+def concat_segments(entries: List[str], audio_source: str, output_video: str, list_path: Path,
+                    movflags: Optional[str] = None):
+    """
+    Video pieces from concat-list entries back to back, with audio_source's untouched audio on top
+
+    movflags (e.g. "+faststart") lays out the MP4 while it's written, sparing a remux.
+    """
+    list_path.write_text("".join(entries))
+    run_ffmpeg([
+        'ffmpeg', '-v', 'error',
+        '-f', 'concat', '-safe', '0', '-i', str(list_path),
+        '-i', audio_source,
+        '-map', '0:v', '-map', '1:a?', '-c', 'copy',
+        *(['-movflags', movflags] if movflags else []),
+        '-y', output_video
+    ])
+
+
+class EffectEngine:
+    """
+    Applies registered effects to time ranges of a video
+
+    Frames are decoded at source size and rate, gathered into batches of
+    batch_size and handed to each effect as one (N, H, W, 3) array slice. Only
+    8-bit 4:2:0 H.264 sources are range-limited: re-encoded pieces are encoded
+    with the source's profile and pixel format, so they concatenate with
+    stream-copied ones. Other sources (other codecs, 10-bit, 4:2:2 or 4:4:4,
+    or an unknown pixel format or profile) are re-encoded whole.
+    """
+
+    def __init__(self, batch_size: int = 16, encoder: str = "libx264", preset: str = "fast", crf: int = 18,
+                 temp_dir: Optional[str] = None):
+        self.batch_size = batch_size
+        self.encoder = encoder
+        self.preset = preset
+        self.crf = crf
+        self.temp_dir = temp_dir
+
+    def apply(self, input_video: str, output_video: str, ranges: Sequence[EffectRange], probe=None,
+              keyframes: Optional[Sequence[Tuple[float, float]]] = None) -> Dict[str, Any]:
+        """
+        Render output_video with every range's effect applied; returns segment statistics
+
+        Args:
+            input_video: Path to input video
+            output_video: Path to output video
+            ranges: Effects and the time ranges they apply to
+            probe: VideoProbe of the input (probed here when omitted)
+            keyframes: (pts, dts) of the input's keyframes (read with ffprobe when omitted)
+        """
+        from .frame_processor import FrameProcessor
+        from .probe import keyframe_times, probe_video
+
+        probe = probe or probe_video(input_video)
+        if probe is None or not probe.duration or not probe.fps:
+            raise ValueError(f"Effects need the duration and frame rate of {input_video}")
+
+        ranges = [r for r in ranges if self._known(r) and min(r.end, probe.duration) > max(r.start, 0.0)]
+        if not ranges:
+            logger.warning("No effect ranges to apply, copying original video")
+            shutil.copyfile(input_video, output_video)
+            return {"segments": 0, "reencoded_seconds": 0.0, "copied_seconds": probe.duration}
+
+        profile = self._concat_profile(probe)
+        if profile is None:
+            keyframes = []
+        elif keyframes is None:
+            keyframes = keyframe_times(input_video)
+        segments = plan_segments([(r.start, r.end) for r in ranges], [pts for pts, _ in keyframes], probe.duration)
+        decode_times = dict(keyframes)
+
+        work_dir = Path(tempfile.mkdtemp(prefix="nano_effects_", dir=self.temp_dir))
+        processor = FrameProcessor()
+        try:
+            entries = []
+            for i, segment in enumerate(segments):
+                if not segment.reencode:
+                    entries.append(copy_entry(input_video, segment.start, segment.end, decode_times, probe.duration))
+                    continue
+                part = work_dir / f"segment_{i:04d}.mp4"
+                active = [r for r in ranges if r.start < segment.end and r.end > segment.start]
+                with span("effect_segment", start=segment.start, end=segment.end):
+                    self._render_segment(processor, input_video, str(part), segment, active, probe, profile)
+                entries.append(f"file '{part}'\n")
+            concat_segments(entries, input_video, output_video, work_dir / "segments.txt")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        reencoded = sum(s.end - s.start for s in segments if s.reencode)
+        logger.info(f"Applied {len(ranges)} effects: re-encoded {reencoded:.2f}s of {probe.duration:.2f}s "
+                    f"in {sum(s.reencode for s in segments)} of {len(segments)} segments")
+        return {"segments": len(segments), "reencoded_seconds": reencoded, "copied_seconds": probe.duration - reencoded}
+
+    def _concat_profile(self, probe) -> Optional[str]:
+        """libx264 profile matching the source, or None when its pieces can't be mixed with re-encoded ones"""
+        if probe.video_codec != "h264" or self.encoder != "libx264":
+            return None
+        if probe.pix_fmt != "yuv420p" or probe.profile not in _CONCAT_PROFILES:
+            logger.info(f"Re-encoding the whole video: {probe.pix_fmt or 'unknown'} pixel format, "
+                        f"{probe.profile or 'unknown'} profile can't be mixed with yuv420p re-encodes")
+            return None
+        return _CONCAT_PROFILES[probe.profile]
+
+    def _known(self, effect_range: EffectRange) -> bool:
+        if effect_range.effect in _EFFECTS:
+            return True
+        logger.warning(f"Skipping unknown effect '{effect_range.effect}' (registered: {effect_names()})")
+        return False
+
+    def _render_segment(self, processor, input_video: str, part: str, segment: Segment,
+                        ranges: List[EffectRange], probe, profile: Optional[str] = None):
+        import numpy as np
+
+        width, height = probe.width, probe.height
+        batch = np.empty((self.batch_size, height, width, 3), dtype=np.uint8)
+        times = np.empty(self.batch_size, dtype=np.float64)
+
+        encoder_cmd = [
+            'ffmpeg', '-v', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f"{width}x{height}", '-r', f"{probe.fps:g}",
+            '-i', 'pipe:0',
+            '-c:v', self.encoder, '-preset', self.preset, '-crf', str(self.crf), '-pix_fmt', 'yuv420p',
+            *(['-profile:v', profile] if profile else []),
+            '-y', part
+        ]
+        with ffmpeg_pipe(encoder_cmd, write=True) as encoder:
+            n = 0
+            for timestamp, frame in processor.iter_frames(input_video, start=segment.start, end=segment.end,
+                                                          width=width, height=height, ring_size=2, probe=probe):
+                batch[n] = frame
+                times[n] = timestamp
+                n += 1
+                if n == self.batch_size:
+                    self._flush(encoder.stdin, batch, times, n, ranges)
+                    n = 0
+            if n:
+                self._flush(encoder.stdin, batch, times, n, ranges)
+
+    def _flush(self, stdin, batch, times, n: int, ranges: List[EffectRange]):
+        import numpy as np
+
+        for effect_range in ranges:
+            # Timestamps increase through the batch, so each range covers one contiguous slice
+            lo = int(np.searchsorted(times[:n], effect_range.start, side="left"))
+            hi = int(np.searchsorted(times[:n], effect_range.end, side="left"))
+            if lo >= hi:
+                continue
+            frames = batch[lo:hi]
+            result = _EFFECTS[effect_range.effect](frames, **effect_range.params)
+            if result is not frames:
+                frames[...] = result
+            count("effect_frames", hi - lo)
+
+        view = memoryview(batch[:n]).cast("B")
+        written = 0
+        while written < len(view):
+            written += stdin.write(view[written:])
+
+
+def _lut(values) -> Any:
+    import numpy as np
+    return np.clip(values, 0, 255).astype(np.uint8)
+
+
+@register_effect("brightness")
+def brightness(frames, amount: float = 0.3):
+    """Add amount (a fraction of full scale) to every channel"""
+    import numpy as np
+    lut = _lut(np.arange(256) + amount * 255)
+    return lut[frames]
+
+
+@register_effect("contrast")
+def contrast(frames, factor: float = 1.5):
+    """Stretch channel values away from mid-grey by factor"""
+    import numpy as np
+    lut = _lut((np.arange(256) - 128.0) * factor + 128.0)
+    return lut[frames]
+
+
+@register_effect("grayscale")
+def grayscale(frames):
+    """Replace every channel with BT.601 luma"""
+    import numpy as np
+    luma = frames @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+    frames[...] = luma.astype(np.uint8)[..., None]
+    return frames
+
+
+@register_effect("blur")
+def blur(frames, radius: int = 5):
+    """Box blur of the given radius"""
+    import cv2
+    size = 2 * int(radius) + 1
+    for frame in frames:
+        cv2.blur(frame, (size, size), dst=frame)
+    return frames
+
+
+@register_effect("zoom")
+def zoom(frames, factor: float = 1.5):
+    """Crop the centre 1/factor of the frame and scale it back up"""
+    import cv2
+    height, width = frames.shape[1:3]
+    crop_w, crop_h = max(1, int(width / factor)), max(1, int(height / factor))
+    x, y = (width - crop_w) // 2, (height - crop_h) // 2
+    for frame in frames:
+        frame[...] = cv2.resize(frame[y:y + crop_h, x:x + crop_w], (width, height), interpolation=cv2.INTER_LINEAR)
+    return frames
@@ -0,0 +1,272 @@
+"""Single entry point for running ffmpeg and ffprobe, to completion or as a stream"""
+
+import glob
+import logging
+import re
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from .instrumentation import count, mark_startup
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FFmpegProgress:
+    """One block of ffmpeg's -progress output"""
+    frame: int = 0
+    fps: float = 0.0
+    speed: Optional[float] = None  # x realtime; None while ffmpeg reports N/A
+    out_time: float = 0.0          # seconds of output written
+    total_size: int = 0
+    done: bool = False
+
+
+@dataclass
+class FFmpegLimits:
+    """
+    Job-wide limits and progress hook for every ffmpeg run inside ffmpeg_limits()
+
+    Args:
+        deadline: time.monotonic() value after which any running encode is killed
+        stall_seconds: Kill an encode that reports no progress for this long, or
+            whose speed stays below min_speed for this long
+        min_speed: Slowest acceptable speed (x realtime); 0 disables the speed check
+        on_progress: Called from a reader thread with each FFmpegProgress
+    """
+    deadline: Optional[float] = None
+    stall_seconds: Optional[float] = 60.0
+    min_speed: float = 0.0
+    on_progress: Optional[Callable[[FFmpegProgress], None]] = None
+
+    @classmethod
+    def for_duration(cls, duration: Optional[float], seconds_per_media_second: float, min_timeout: float,
+                     **kwargs) -> "FFmpegLimits":
+        """Limits whose deadline scales with the video's probed duration (no deadline if unknown)"""
+        deadline = None
+        if duration:
+            deadline = time.monotonic() + max(min_timeout, duration * seconds_per_media_second)
+        return cls(deadline=deadline, **kwargs)
+
+
+class FFmpegAborted(subprocess.SubprocessError):
+    """ffmpeg was killed for missing the job deadline or stalling"""
+
+    def __init__(self, cmd: List[str], reason: str, progress: FFmpegProgress):
+        super().__init__(reason)
+        self.cmd = cmd
+        self.reason = reason
+        self.progress = progress
+
+    def __str__(self) -> str:
+        return f"ffmpeg aborted: {self.reason}"
+
+
+_limits: ContextVar[Optional[FFmpegLimits]] = ContextVar("ffmpeg_limits", default=None)
+
+
+@contextmanager
+def ffmpeg_limits(limits: Optional[FFmpegLimits]) -> Iterator[Optional[FFmpegLimits]]:
+    """Apply limits to ffmpeg runs in the enclosed block, including threads started with asyncio.to_thread"""
+    token = _limits.set(limits)
+    try:
+        yield limits
+    finally:
+        _limits.reset(token)
+
+
+def run_ffmpeg(cmd: List[str], check: bool = True) -> subprocess.CompletedProcess:
+    """
+    Run an ffmpeg or ffprobe command and feed the job's counters
+
+    ffmpeg runs with -progress on a pipe that is parsed as it arrives, so the
+    active FFmpegLimits can report progress and kill a run that stalls or misses
+    the job deadline (raising FFmpegAborted). ffprobe runs to completion with its
+    output captured as text. Counts invocations and wall time per tool, bytes of
+    the input files read and bytes of the output written (image-sequence patterns
+    like frame_%04d.jpg are summed over the matching files).
+    """
+    tool = Path(cmd[0]).name
+    mark_startup(f"first_{tool}")
+    count(f"{tool}_invocations")
+    count("bytes_read", _input_bytes(cmd))
+
+    start = time.perf_counter()
+    try:
+        if tool == "ffmpeg":
+            return _run_with_progress(cmd, _limits.get() or FFmpegLimits(), check)
+        return subprocess.run(cmd, capture_output=True, text=True, check=check)
+    finally:
+        count(f"{tool}_seconds", time.perf_counter() - start)
+        if tool == "ffmpeg":
+            count("bytes_written", _output_bytes(cmd))
+
+
+@contextmanager
+def ffmpeg_pipe(cmd: List[str], write: bool = False, pass_fds: Sequence[int] = ()) -> Iterator[subprocess.Popen]:
+    """
+    Run ffmpeg with a pipe the caller streams through
+
+    Reads from ffmpeg's stdout by default, or writes to its stdin with write=True
+    (e.g. raw frames into an encoder). The pipe is unbuffered so readinto() fills
+    the caller's buffers directly. The caller sets the pace, so the job's deadline
+    and stall limits don't apply. Leaving the block early (an exception, or a
+    generator closed mid-stream) terminates ffmpeg; leaving normally closes the
+    input side, waits, and raises CalledProcessError if ffmpeg failed. Feeds the
+    same counters as run_ffmpeg. pass_fds are inherited by ffmpeg under the same
+    numbers, for extra outputs written to pipe:N.
+    """
+    tool = Path(cmd[0]).name
+    mark_startup(f"first_{tool}")
+    count(f"{tool}_invocations")
+    count("bytes_read", _input_bytes(cmd))
+
+    start = time.perf_counter()
+    # Only a reader can promise ffmpeg that stdin is unused
+    full_cmd = cmd if write else [cmd[0], '-nostdin'] + cmd[1:]
+    proc = subprocess.Popen(full_cmd,
+                            stdin=subprocess.PIPE if write else subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL if write else subprocess.PIPE,
+                            stderr=subprocess.PIPE, bufsize=0, pass_fds=tuple(pass_fds))
+    pipe = proc.stdin if write else proc.stdout
+    stderr_chunks: List[bytes] = []
+    reader = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    reader.start()
+    try:
+        yield proc
+        if write:
+            pipe.close()
+        proc.wait()
+        reader.join()
+        if proc.returncode != 0:
+            stderr = b"".join(stderr_chunks).decode("utf-8", "replace")
+            raise subprocess.CalledProcessError(proc.returncode, cmd, output="", stderr=stderr)
+    finally:
+        # Close our end first: ffmpeg blocked on a full (or empty) pipe only notices it breaking
+        pipe.close()
+        if proc.poll() is None:
+            _terminate(proc)
+        count(f"{tool}_seconds", time.perf_counter() - start)
+        if write:
+            count("bytes_written", _output_bytes(cmd))
+
+
+def _run_with_progress(cmd: List[str], limits: FFmpegLimits, check: bool) -> subprocess.CompletedProcess:
+    full_cmd = [cmd[0], '-nostdin', '-progress', 'pipe:1', '-nostats'] + cmd[1:]
+    proc = subprocess.Popen(full_cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, bufsize=1)
+
+    state = {"progress": FFmpegProgress(), "updated_at": time.monotonic()}
+    stderr_chunks: List[str] = []
+
+    def read_progress():
+        block: Dict[str, str] = {}
+        for line in proc.stdout:
+            key, _, value = line.strip().partition("=")
+            block[key] = value
+            if key == "progress":
+                progress = _parse_progress(block)
+                state["progress"], state["updated_at"] = progress, time.monotonic()
+                block = {}
+                if limits.on_progress is not None:
+                    try:
+                        limits.on_progress(progress)
+                    except Exception as e:
+                        logger.warning(f"ffmpeg progress callback failed: {e}")
+
+    readers = [threading.Thread(target=read_progress, daemon=True),
+               threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)]
+    for reader in readers:
+        reader.start()
+
+    slow_since: Optional[float] = None
+    while True:
+        try:
+            proc.wait(timeout=0.25)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+
+        now = time.monotonic()
+        progress = state["progress"]
+        reason = None
+        if limits.deadline is not None and now > limits.deadline:
+            reason = "job deadline exceeded"
+        elif limits.stall_seconds and now - state["updated_at"] > limits.stall_seconds:
+            reason = f"no progress for {limits.stall_seconds:g}s"
+        elif limits.min_speed and progress.speed is not None and progress.speed < limits.min_speed:
+            slow_since = slow_since or now
+            if limits.stall_seconds and now - slow_since > limits.stall_seconds:
+                reason = f"speed {progress.speed:g}x below {limits.min_speed:g}x for {limits.stall_seconds:g}s"
+        else:
+            slow_since = None
+
+        if reason:
+            # Readers are daemon threads and finish once the pipes close; don't wait on
+            # them in case a grandchild process still holds the pipe open
+            _terminate(proc)
+            logger.error(f"Killed ffmpeg ({reason}) at frame {progress.frame}, {progress.out_time:.1f}s written")
+            count("ffmpeg_aborted")
+            raise FFmpegAborted(cmd, reason, progress)
+
+    for reader in readers:
+        reader.join()
+    stderr = "".join(stderr_chunks)
+    if check and proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, output="", stderr=stderr)
+    return subprocess.CompletedProcess(cmd, proc.returncode, "", stderr)
+
+
+def _terminate(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _parse_progress(block: Dict[str, str]) -> FFmpegProgress:
+    def number(key: str, cast=float, default=0):
+        try:
+            return cast(block.get(key, default))
+        except ValueError:
+            return default
+
+    try:
+        speed: Optional[float] = float(block.get("speed", "").rstrip("x"))
+    except ValueError:
+        speed = None  # "N/A" until ffmpeg has timed enough output
+    # out_time_us is microseconds; out_time_ms is too, despite its name
+    out_time_us = number("out_time_us", int) or number("out_time_ms", int)
+    return FFmpegProgress(
+        frame=number("frame", int),
+        fps=number("fps"),
+        speed=speed,
+        out_time=max(0.0, out_time_us / 1_000_000),
+        total_size=number("total_size", int),
+        done=block.get("progress") == "end"
+    )
+
+
+def _input_bytes(cmd: List[str]) -> int:
+    # ffprobe only reads headers and indexes, so only ffmpeg's -i inputs count as read
+    return sum(Path(value).stat().st_size for flag, value in zip(cmd, cmd[1:])
+               if flag == "-i" and Path(value).is_file())
+
+
+def _output_bytes(cmd: List[str]) -> int:
+    output = cmd[-1]
+    if output.startswith("-") or output.startswith("pipe:"):
+        return 0
+    if "%" in output:
+        pattern = re.sub(r"%0?\d*d", "*", output)
+        return sum(Path(p).stat().st_size for p in glob.glob(pattern))
+    path = Path(output)
+    return path.stat().st_size if path.is_file() else 0
@@ -0,0 +1,213 @@
+"""Shared cache of encoded frames, keyed by video content, timestamp, size and format"""
+
+import hashlib
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from .ffmpeg import run_ffmpeg
+from .fingerprint import fingerprint
+from .instrumentation import count
+
+logger = logging.getLogger(__name__)
+
+# format -> (ffmpeg encoder, encoder options, file suffix)
+FORMATS = {
+    "jpeg": ("mjpeg", ["-q:v", "2"], ".jpg"),
+    "png": ("png", [], ".png"),
+}
+_SUFFIX_FORMATS = {".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png"}
+
+
+def frame_key(video_id: str, timestamp: float, max_width: Optional[int], fmt: str) -> str:
+    """video_id is the video's content fingerprint, so copies under other names share frames"""
+    return f"{video_id}:{timestamp:.3f}:{max_width or 0}:{fmt}"
+
+
+class FrameCache:
+    """
+    Two-tier LRU cache of encoded frames
+
+    The memory tier holds up to memory_bytes of frame bytes. The optional disk
+    tier keeps up to disk_bytes in disk_dir, survives restarts and can be
+    shared by processes on the same host; a disk hit is promoted to memory.
+    Both tiers evict least recently used frames first. Disk recency is kept in
+    file mtimes, so a restarted process picks up the order where it was left
+    (frames another live process adds are only seen once they are read).
+    Thread-safe: stages call it from asyncio.to_thread workers.
+    """
+
+    def __init__(self, memory_bytes: int = 64 << 20, disk_dir: Optional[str] = None, disk_bytes: int = 1 << 30):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # file name -> size, least recent first
+        self._disk_used = 0
+        self._lock = threading.Lock()
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            for path in sorted(self.disk_dir.glob("*.frame"), key=lambda p: p.stat().st_mtime):
+                size = path.stat().st_size
+                self._disk[path.name] = size
+                self._disk_used += size
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                name = self._disk_name(key)
+                if name in self._disk:
+                    self._disk.move_to_end(name)
+                count("frame_cache_memory_hits")
+                return data
+        data = self._disk_get(key)
+        if data is not None:
+            count("frame_cache_disk_hits")
+            self._memory_put(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        self._memory_put(key, data)
+        self._disk_put(key, data)
+
+    def frame(self, video_path: str, timestamp: float, max_width: Optional[int] = None,
+              fmt: str = "jpeg") -> Optional[bytes]:
+        """Encoded frame at timestamp, at most max_width wide; decoded with ffmpeg only on a miss"""
+        key = frame_key(fingerprint(video_path), timestamp, max_width, fmt)
+        data = self.get(key)
+        if data is not None:
+            return data
+
+        count("frame_cache_misses")
+        encoder, options, suffix = FORMATS[fmt]
+        with tempfile.TemporaryDirectory(prefix="nano_frame_") as tmp:
+            output_path = Path(tmp) / f"frame{suffix}"
+            cmd = ['ffmpeg', '-ss', str(timestamp), '-i', video_path, '-frames:v', '1']
+            if max_width:
+                cmd += ['-vf', f"scale='min(iw,{max_width})':-2"]
+            cmd += ['-c:v', encoder] + options + ['-y', str(output_path)]
+            try:
+                run_ffmpeg(cmd)
+                data = output_path.read_bytes()
+            except (subprocess.CalledProcessError, OSError) as e:
+                logger.error(f"Failed to extract frame at {timestamp}s from {video_path}: {e}")
+                return None
+        if not data:
+            logger.error(f"No frame at {timestamp}s in {video_path}")
+            return None
+        self.put(key, data)
+        return data
+
+    def frame_to_file(self, video_path: str, timestamp: float, output_path: str,
+                      max_width: Optional[int] = None) -> bool:
+        """
+        Write the frame at timestamp to output_path, in the format its suffix names
+
+        Formats the cache doesn't hold (anything but JPEG and PNG) are extracted
+        straight to output_path. Returns False when extraction fails.
+        """
+        fmt = _SUFFIX_FORMATS.get(Path(output_path).suffix.lower())
+        if fmt is None:
+            count("frame_cache_bypassed")
+            cmd = ['ffmpeg', '-ss', str(timestamp), '-i', video_path, '-frames:v', '1']
+            if max_width:
+                cmd += ['-vf', f"scale='min(iw,{max_width})':-2"]
+            try:
+                run_ffmpeg(cmd + ['-y', output_path])
+                return True
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Failed to extract frame at {timestamp}s from {video_path}: {e}")
+                return False
+        data = self.frame(video_path, timestamp, max_width, fmt)
+        if data is None:
+            return False
+        Path(output_path).write_bytes(data)
+        return True
+
+    def _memory_put(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_used -= len(previous)
+            self._memory[key] = data
+            self._memory_used += len(data)
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+
+    def _disk_name(self, key: str) -> str:
+        return f"{hashlib.sha1(key.encode()).hexdigest()}.frame"
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if self.disk_dir is None:
+            return None
+        name = self._disk_name(key)
+        path = self.disk_dir / name
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        with self._lock:
+            if name not in self._disk:
+                self._disk_used += len(data)
+            self._disk[name] = len(data)
+            self._disk.move_to_end(name)
+        return data
+
+    def _disk_put(self, key: str, data: bytes):
+        if self.disk_dir is None or len(data) > self.disk_bytes:
+            return
+        name = self._disk_name(key)
+        partial = self.disk_dir / f".{name}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            partial.write_bytes(data)
+            os.replace(partial, self.disk_dir / name)
+        except OSError as e:
+            logger.warning(f"Frame cache write failed: {e}")
+            return
+        evict = []
+        with self._lock:
+            self._disk_used += len(data) - self._disk.pop(name, 0)
+            self._disk[name] = len(data)
+            while self._disk_used > self.disk_bytes and len(self._disk) > 1:
+                evicted, size = self._disk.popitem(last=False)
+                self._disk_used -= size
+                evict.append(evicted)
+        for evicted in evict:
+            (self.disk_dir / evicted).unlink(missing_ok=True)
+
+
+_shared: Optional[FrameCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_frame_cache() -> FrameCache:
+    """The process-wide cache every stage consults (memory-only until configure_frame_cache)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = FrameCache()
+        return _shared
+
+
+def configure_frame_cache(memory_bytes: int = 64 << 20, disk_dir: Optional[str] = None,
+                          disk_bytes: int = 1 << 30) -> FrameCache:
+    """Replace the shared cache, e.g. to add a disk tier; a cache with the same settings is kept as it is"""
+    global _shared
+    with _shared_lock:
+        current = _shared
+        if (current is None or current.memory_bytes != memory_bytes or current.disk_bytes != disk_bytes
+                or current.disk_dir != (Path(disk_dir) if disk_dir else None)):
+            _shared = FrameCache(memory_bytes, disk_dir, disk_bytes)
+        return _shared
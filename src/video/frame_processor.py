@@ -4,12 +4,18 @@ import subprocess
 import logging
 import base64
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import json
 import os
+import threading
+
+from .ffmpeg import ffmpeg_pipe, run_ffmpeg
 
 logger = logging.getLogger(__name__)
 
+# Bytes per pixel of the raw formats iter_frames can decode to
+PIXEL_FORMATS = {"rgb24": 3, "bgr24": 3, "gray": 1, "rgba": 4, "bgra": 4}
+
 class FrameProcessor:
     """Extracts actual frames from video and processes them"""
     
@@ -26,22 +32,158 @@ class FrameProcessor:
             timestamp: Time in seconds to extract frame
             output_path: Where to save the extracted frame
         """
-        cmd = [
-            'ffmpeg',
-            '-ss', str(timestamp),  # Seek to timestamp
-            '-i', video_path,
-            '-frames:v', '1',  # Extract only 1 frame
-            '-y',  # Overwrite output
-            output_path
-        ]
+        from .frame_cache import shared_frame_cache
         
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        # Frames already decoded by another stage come from the shared cache
+        if shared_frame_cache().frame_to_file(video_path, timestamp, output_path):
             logger.info(f"Extracted frame at {timestamp}s to {output_path}")
             return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to extract frame: {e.stderr}")
-            return False
+        return False
+    
+    def iter_frames(self, video_path: str, start: float = 0.0, end: Optional[float] = None,
+                    width: Optional[int] = None, height: Optional[int] = None, pix_fmt: str = "bgr24",
+                    fps: Optional[float] = None, ring_size: int = 4, probe=None,
+                    audio=None) -> Iterator[Tuple[float, Any]]:
+        """
+        Stream decoded frames as (timestamp, numpy array) from an ffmpeg rawvideo pipe
+        
+        ffmpeg seeks to start, decodes until end, and does the resampling to fps,
+        the downscale and the pixel-format conversion itself. Frames are read with
+        readinto() straight into a ring of ring_size preallocated arrays, so nothing
+        is allocated per frame: a yielded array is overwritten ring_size frames
+        later, and callers that keep frames longer must copy them.
+        
+        Args:
+            video_path: Path to input video
+            start: First timestamp in seconds
+            end: Stop before this timestamp (None for the end of the video)
+            width, height: Output size; give one to keep the aspect ratio, none for the source size
+            pix_fmt: One of PIXEL_FORMATS; bgr24 matches OpenCV, gray yields 2-D arrays
+            fps: Resample to this rate (None keeps the source rate)
+            ring_size: Arrays in the ring; must exceed the number of frames the caller holds at once
+            probe: VideoProbe for the source, probed here when size or rate must be known
+            audio: Optional AudioFeatureExtractor; the same ffmpeg run also decodes the
+                first audio stream to mono float PCM at its sample_rate and feeds it
+                block by block from a reader thread, so audio costs no extra demux
+        """
+        import numpy as np
+        
+        if pix_fmt not in PIXEL_FORMATS:
+            raise ValueError(f"Unsupported pixel format: {pix_fmt} (expected one of {sorted(PIXEL_FORMATS)})")
+        
+        if (width is None or height is None or fps is None) and probe is None:
+            from .probe import probe_video
+            probe = probe_video(video_path)
+        if probe is None and (width is None or height is None or fps is None):
+            raise ValueError(f"Could not probe {video_path}; pass width, height and fps explicitly")
+        
+        width, height = self._output_size(width, height, probe)
+        rate = fps or probe.fps
+        if rate <= 0:
+            raise ValueError(f"Unknown frame rate for {video_path}; pass fps explicitly")
+        
+        channels = PIXEL_FORMATS[pix_fmt]
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        ring = [np.empty(shape, dtype=np.uint8) for _ in range(max(2, ring_size))]
+        views = [memoryview(buffer).cast("B") for buffer in ring]
+        
+        filters = [f"fps={fps}"] if fps else []
+        filters.append(f"scale={width}:{height}")
+        limit = ['-t', str(max(0.0, end - start))] if end is not None else []
+        cmd = ['ffmpeg', '-v', 'error']
+        if start > 0:
+            cmd += ['-ss', str(start)]
+        cmd += ['-i', video_path]
+        cmd += limit + (['-map', '0:v:0'] if audio is not None else ['-an']) + ['-vf', ','.join(filters)]
+        if not fps:
+            # rawvideo output defaults to constant frame rate, which duplicates frames across timestamp gaps
+            cmd += ['-fps_mode', 'passthrough']
+        cmd += ['-f', 'rawvideo', '-pix_fmt', pix_fmt, 'pipe:1']
+        
+        audio_read = audio_write = None
+        if audio is not None:
+            # Second output of the same run: ffmpeg writes PCM to its inherited copy of audio_write
+            audio_read, audio_write = os.pipe()
+            cmd += limit + ['-map', '0:a:0', '-ac', '1', '-ar', str(audio.sample_rate), '-f', 'f32le',
+                            f'pipe:{audio_write}']
+        
+        audio_reader = None
+        try:
+            with ffmpeg_pipe(cmd, pass_fds=(audio_write,) if audio is not None else ()) as proc:
+                if audio is not None:
+                    # Only ffmpeg may hold the write end, or the reader never sees end of stream
+                    os.close(audio_write)
+                    audio_write = None
+                    audio_reader = threading.Thread(target=self._feed_audio, args=(audio_read, audio), daemon=True)
+                    audio_reader.start()
+                    audio_read = None
+                index = 0
+                while True:
+                    slot = index % len(ring)
+                    if not self._read_exact(proc.stdout, views[slot]):
+                        break
+                    yield start + index / rate, ring[slot]
+                    index += 1
+        finally:
+            for fd in (audio_read, audio_write):
+                if fd is not None:
+                    os.close(fd)
+            if audio_reader is not None:
+                audio_reader.join(timeout=5)
+        logger.debug(f"Streamed {index} frames of {width}x{height} {pix_fmt} from {video_path}")
+    
+    @staticmethod
+    def _feed_audio(fd: int, audio, block_samples: int = 8192):
+        """Read float32 PCM from fd in fixed blocks and hand each one to audio.feed()"""
+        import numpy as np
+        
+        block = np.empty(block_samples, dtype=np.float32)
+        view = memoryview(block).cast("B")
+        feeding = True
+        with os.fdopen(fd, 'rb', buffering=0) as stream:
+            while True:
+                filled = 0
+                while filled < len(view):
+                    n = stream.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+                samples = filled // block.itemsize
+                if samples and feeding:
+                    try:
+                        audio.feed(block[:samples])
+                    except Exception as e:
+                        # Keep draining: ffmpeg would block on a full audio pipe and stall the frames too
+                        logger.warning(f"Audio feature extraction stopped: {e}")
+                        feeding = False
+                if filled < len(view):
+                    return
+    
+    @staticmethod
+    def _output_size(width: Optional[int], height: Optional[int], probe) -> Tuple[int, int]:
+        """Fill in a missing dimension from the source aspect ratio, rounded to even"""
+        if width and height:
+            return width, height
+        if not probe or not probe.width or not probe.height:
+            raise ValueError("Source size unknown; pass both width and height")
+        if width:
+            return width, max(2, round(probe.height * width / probe.width / 2) * 2)
+        if height:
+            return max(2, round(probe.width * height / probe.height / 2) * 2), height
+        return probe.width, probe.height
+    
+    @staticmethod
+    def _read_exact(stream, view: memoryview) -> bool:
+        """Fill view from stream; False at end of stream (a partial trailing frame is dropped)"""
+        filled = 0
+        while filled < len(view):
+            n = stream.readinto(view[filled:])
+            if not n:
+                if filled:
+                    logger.warning(f"Dropped a truncated frame ({filled} of {len(view)} bytes)")
+                return False
+            filled += n
+        return True
     
     def extract_frames_for_analysis(self, video_path: str, num_frames: int = 5) -> List[str]:
         """
@@ -86,7 +228,7 @@ class FrameProcessor:
         ]
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = run_ffmpeg(cmd)
             return float(result.stdout.strip())
         except (subprocess.CalledProcessError, ValueError) as e:
             logger.error(f"Failed to get video duration: {e}")
@@ -126,7 +268,7 @@ class FrameProcessor:
         ]
         
         try:
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
+            run_ffmpeg(cmd)
             logger.info(f"Applied text '{text}' to frame")
             return True
         except subprocess.CalledProcessError as e:
@@ -177,7 +319,7 @@ class FrameProcessor:
             ]
             
             try:
-                subprocess.run(cmd, capture_output=True, text=True, check=True)
+                run_ffmpeg(cmd)
                 logger.info(f"Replaced {len(frame_replacements)} frames in video")
                 return True
             except subprocess.CalledProcessError as e:
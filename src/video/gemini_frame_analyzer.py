@@ -1,38 +1,183 @@
 """Workaround: Extract frames and send as images to Gemini for analysis"""
 
+import asyncio
 import logging
 import base64
 import json
 import subprocess
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import tempfile
 
+from .ffmpeg import run_ffmpeg
+from .instrumentation import count, span
+from .request_coalescer import part_bytes
+
 logger = logging.getLogger(__name__)
 
 class GeminiFrameAnalyzer:
     """Extract key frames from video and send as images to Gemini"""
     
-    def __init__(self, ai_client):
+    CONTACT_SHEET_CELL_WIDTH = 320
+    
+    def __init__(self, ai_client, coalescer=None):
         self.ai_client = ai_client
+        self.coalescer = coalescer
         self.temp_dir = Path(tempfile.mkdtemp(prefix="gemini_frames_"))
         
-    async def analyze_video_frames(self, video_path: str, num_frames: int = 5) -> Dict[str, Any]:
+    async def analyze_video_frames(self, video_path: str, num_frames: int = 5,
+                                   timestamps: Optional[List[float]] = None,
+                                   contact_sheet: bool = False,
+                                   grid: Tuple[int, int] = (3, 3),
+                                   max_width: Optional[int] = None) -> Dict[str, Any]:
         """
         Extract key frames from video and send them as images to Gemini
         
         This is a workaround until direct video support is fixed in ai-proxy-core
+        
+        Args:
+            video_path: Path to input video
+            num_frames: Number of evenly spaced frames to sample
+            timestamps: Explicit sample timestamps (e.g. from the local pre-analysis);
+                overrides even spacing when given
+            contact_sheet: Tile the frames into labeled rows x cols grid images instead
+                of attaching each frame separately
+            grid: (rows, cols) per contact sheet
+            max_width: Downscale frames to at most this width before sending
         """
         
-        # Extract key frames from video
-        frames = self._extract_key_frames(video_path, num_frames)
+        with span("sampling"):
+            if not timestamps:
+                timestamps = await asyncio.to_thread(self._even_timestamps, video_path, num_frames)
+            
+            # Extract key frames from video (downscaled to tile size for contact sheets)
+            if contact_sheet:
+                max_width = min(max_width or self.CONTACT_SHEET_CELL_WIDTH, self.CONTACT_SHEET_CELL_WIDTH)
+            frames, timestamps = await asyncio.to_thread(self._extract_key_frames, video_path, timestamps, max_width)
         
         if not frames:
             return {"error": "Failed to extract frames from video"}
         
-        # Prepare multimodal message with frames as images
-        content = [
-            {"type": "text", "text": f"""Analyze these {len(frames)} frames from a video. 
+        sheets = None
+        with span("encode_for_ai", frames=len(frames)):
+            if contact_sheet:
+                from .contact_sheet import build_contact_sheets
+                sheets = await asyncio.to_thread(build_contact_sheets, frames, timestamps, str(self.temp_dir),
+                                                 grid, self.CONTACT_SHEET_CELL_WIDTH)
+                prompt, parts = self._contact_sheet_content(sheets)
+            else:
+                prompt, parts = self._frame_content(frames, timestamps)
+        
+        count("ai_images", sum(1 for part in parts if part.get("type") == "image_url"))
+        count("ai_payload_bytes", part_bytes(prompt) + sum(part_bytes(part) for part in parts))
+        
+        try:
+            with span("ai_call", coalesced=self.coalescer is not None):
+                count("ai_calls")
+                if self.coalescer is not None:
+                    # Shares one request with other videos arriving within the batching window
+                    analysis_text = await self.coalescer.submit(prompt, parts, label=Path(video_path).name)
+                else:
+                    # Send frames to Gemini for analysis
+                    messages = [{"role": "user", "content": [prompt] + parts}]
+                    
+                    response = await self.ai_client.create_completion(
+                        model="gemini-1.5-flash",
+                        messages=messages,
+                        temperature=0.7,
+                        max_tokens=2000
+                    )
+                    
+                    analysis_text = response["choices"][0]["message"]["content"]
+            logger.info(f"Gemini analyzed {len(frames)} frames from video")
+            
+            with span("parse"):
+                return self._parse_analysis(analysis_text, timestamps, sheets)
+                
+        except Exception as e:
+            logger.error(f"Frame analysis failed: {e}")
+            return {"error": str(e)}
+    
+    async def analyze_video_adaptive(self, video_path: str, budget, duration: float,
+                                     hint_intervals: Optional[List[Tuple[float, float]]] = None,
+                                     coarse_max_width: int = 256,
+                                     contact_sheet: bool = False,
+                                     grid: Tuple[int, int] = (3, 3)) -> Dict[str, Any]:
+        """
+        Two-round coarse-to-fine analysis within a frame budget
+        
+        Round 1 sends budget.coarse_frames low-res frames (inside hint_intervals when
+        given) and reads back which moments the model found interesting. Round 2
+        spends the remaining budget densely inside intervals around those moments.
+        Fine-round edits replace coarse edits inside the refined intervals.
+        
+        Args:
+            video_path: Path to input video
+            budget: SamplingBudget with the total and coarse frame counts
+            duration: Video duration in seconds
+            hint_intervals: Intervals to restrict the coarse round to (e.g. from the pre-analysis)
+            coarse_max_width: Frame width for the coarse round
+        """
+        from .sampling import dense_timestamps, edit_timestamps, even_timestamps, intervals_around
+        
+        if hint_intervals:
+            coarse_timestamps = dense_timestamps(hint_intervals, budget.coarse_frames)
+        else:
+            coarse_timestamps = even_timestamps(0.0, duration, budget.coarse_frames)
+        
+        logger.info(f"Coarse pass: {len(coarse_timestamps)} frames at <= {coarse_max_width}px "
+                    f"(budget {budget.total_frames} frames)")
+        with span("coarse_pass", frames=len(coarse_timestamps)):
+            coarse = await self.analyze_video_frames(
+                video_path,
+                timestamps=coarse_timestamps,
+                contact_sheet=contact_sheet,
+                grid=grid,
+                max_width=coarse_max_width
+            )
+        if "error" in coarse or budget.fine_frames <= 0:
+            return coarse
+        
+        # Refine around each moment the model flagged, half a coarse spacing either side
+        spacing = duration / (len(coarse_timestamps) + 1) if coarse_timestamps else duration
+        intervals = intervals_around(edit_timestamps(coarse.get("edits_to_apply", [])), spacing / 2, duration)
+        if not intervals:
+            logger.info("Coarse pass found nothing worth refining; skipping fine pass")
+            return coarse
+        
+        fine_timestamps = dense_timestamps(intervals, budget.fine_frames, exclude=coarse_timestamps)
+        logger.info(f"Fine pass: {len(fine_timestamps)} frames inside {len(intervals)} interval(s)")
+        with span("fine_pass", frames=len(fine_timestamps)):
+            fine = await self.analyze_video_frames(
+                video_path,
+                timestamps=fine_timestamps,
+                contact_sheet=contact_sheet,
+                grid=grid
+            )
+        if "error" in fine:
+            logger.warning(f"Fine pass failed, keeping coarse analysis: {fine['error']}")
+            return coarse
+        
+        def inside(edit):
+            timestamp = edit.get("timestamp")
+            return isinstance(timestamp, (int, float)) and any(s <= timestamp <= e for s, e in intervals)
+        
+        merged = dict(coarse)
+        merged["edits_to_apply"] = sorted(
+            [e for e in coarse.get("edits_to_apply", []) if not inside(e)] + fine.get("edits_to_apply", []),
+            key=lambda e: e.get("timestamp", 0)
+        )
+        merged["sampling"] = {
+            "budget": budget.total_frames,
+            "coarse_frames": len(coarse_timestamps),
+            "fine_frames": len(fine_timestamps),
+            "refined_intervals": intervals
+        }
+        return merged
+    
+    def _frame_content(self, frames: List[str], timestamps: List[float]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Prompt part, and one label plus image part per frame"""
+        prompt = {"type": "text", "text": f"""Analyze these {len(frames)} frames from a video. 
 For each frame, identify:
 1. What's happening in the frame
 2. Any text that should be added
@@ -55,12 +200,10 @@ Please provide specific timestamps and edit suggestions in JSON format:
         }}
     ]
 }}"""}
-        ]
+        content = []
         
         # Add each frame as an image
-        for i, frame_path in enumerate(frames):
-            timestamp = self._get_frame_timestamp(video_path, i, num_frames)
-            
+        for i, (frame_path, timestamp) in enumerate(zip(frames, timestamps)):
             # Add frame as image with metadata
             content.append({
                 "type": "text",
@@ -74,88 +217,117 @@ Please provide specific timestamps and edit suggestions in JSON format:
                 }
             })
         
+        return prompt, content
+    
+    def _contact_sheet_content(self, sheets) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Prompt part, and one label plus image part per contact sheet"""
+        total_cells = sum(len(sheet.cells) for sheet in sheets)
+        prompt = {"type": "text", "text": f"""Analyze these {total_cells} frames from a video, tiled into {len(sheets)} contact sheet image(s).
+Each cell is labeled in its top-left corner with its cell number and timestamp (e.g. "#4 12.5s").
+Cells read left to right, top to bottom, and cell numbers continue across sheets.
+For each interesting cell, identify:
+1. What's happening in the frame
+2. Any text that should be added
+3. Any effects that would enhance it
+
+Refer to frames by their cell number. Provide edit suggestions in JSON format:
+{{
+    "video_analysis": {{
+        "total_frames": {total_cells},
+        "content_summary": "brief description of what the video shows"
+    }},
+    "edits_to_apply": [
+        {{
+            "cell": 1,
+            "description": "what's in this cell",
+            "edit_type": "text_overlay",
+            "text": "suggested text",
+            "position": "bottom"
+        }}
+    ]
+}}"""}
+        content = []
+        
+        for i, sheet in enumerate(sheets):
+            content.append({
+                "type": "text",
+                "text": f"Contact sheet {i+1}: cells #{sheet.first_cell}-#{sheet.last_cell}"
+            })
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:image/jpeg;base64,{self._encode_image(sheet.image_path)}"
+                }
+            })
+        
+        return prompt, content
+    
+    def _parse_analysis(self, analysis_text: str, timestamps: List[float], sheets=None) -> Dict[str, Any]:
+        """Parse the model's JSON and map frame indices / contact sheet cells back to exact timestamps"""
+        # Parse JSON response (handle markdown wrapped JSON)
         try:
-            # Send frames to Gemini for analysis
-            messages = [{"role": "user", "content": content}]
+            # Remove markdown code block if present
+            import re
+            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', analysis_text, re.DOTALL)
+            if json_match:
+                analysis_text = json_match.group(1)
             
-            response = await self.ai_client.create_completion(
-                model="gemini-1.5-flash",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2000
-            )
-            
-            analysis_text = response["choices"][0]["message"]["content"]
-            logger.info(f"Gemini analyzed {len(frames)} frames from video")
+            analysis = json.loads(analysis_text)
             
-            # Parse JSON response (handle markdown wrapped JSON)
-            try:
-                # Remove markdown code block if present
-                import re
-                json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', analysis_text, re.DOTALL)
-                if json_match:
-                    analysis_text = json_match.group(1)
-                
-                analysis = json.loads(analysis_text)
-                
-                # Add actual timestamps based on frame positions
-                if "edits_to_apply" in analysis:
+            # Add actual timestamps based on frame positions
+            if "edits_to_apply" in analysis:
+                if sheets:
+                    from .contact_sheet import resolve_cell_references
+                    resolve_cell_references(analysis["edits_to_apply"], sheets)
+                else:
                     for edit in analysis["edits_to_apply"]:
-                        if "frame_index" in edit:
-                            edit["timestamp"] = self._get_frame_timestamp(
-                                video_path, 
-                                edit["frame_index"], 
-                                num_frames
-                            )
-                
-                logger.info(f"Identified {len(analysis.get('edits_to_apply', []))} edits from frame analysis")
-                return analysis
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse Gemini response: {e}")
-                logger.debug(f"Response was: {analysis_text[:500]}")
-                return {"error": "Failed to parse analysis", "raw_response": analysis_text}
-                
-        except Exception as e:
-            logger.error(f"Frame analysis failed: {e}")
-            return {"error": str(e)}
+                        frame_index = edit.get("frame_index")
+                        if isinstance(frame_index, int) and 0 <= frame_index < len(timestamps):
+                            edit["timestamp"] = timestamps[frame_index]
+            
+            logger.info(f"Identified {len(analysis.get('edits_to_apply', []))} edits from frame analysis")
+            return analysis
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse Gemini response: {e}")
+            logger.debug(f"Response was: {analysis_text[:500]}")
+            return {"error": "Failed to parse analysis", "raw_response": analysis_text}
     
-    def _extract_key_frames(self, video_path: str, num_frames: int) -> List[str]:
-        """Extract evenly spaced frames from video"""
-        
-        # Get video duration
+    def _even_timestamps(self, video_path: str, num_frames: int) -> List[float]:
+        """Evenly spaced sample timestamps across the whole video"""
         duration = self._get_video_duration(video_path)
         if duration <= 0:
             logger.error("Could not determine video duration")
             return []
         
-        # Calculate timestamps for frame extraction
         interval = duration / (num_frames + 1)
-        timestamps = [interval * (i + 1) for i in range(num_frames)]
+        return [interval * (i + 1) for i in range(num_frames)]
+    
+    def _extract_key_frames(self, video_path: str, timestamps: List[float],
+                            max_width: Optional[int] = None) -> Tuple[List[str], List[float]]:
+        """
+        Extract frames at the given timestamps
+        
+        Returns the extracted frame paths and the timestamps that succeeded,
+        index-aligned so frame_index in the model response maps back exactly.
+        When max_width is set, frames are downscaled by ffmpeg during extraction.
+        Frames come from the shared frame cache when any stage already decoded them.
+        """
+        from .frame_cache import shared_frame_cache
         
+        cache = shared_frame_cache()
         extracted_frames = []
+        extracted_timestamps = []
         
         for i, timestamp in enumerate(timestamps):
             output_path = self.temp_dir / f"frame_{i:03d}_{timestamp:.1f}s.jpg"
             
-            cmd = [
-                'ffmpeg',
-                '-ss', str(timestamp),
-                '-i', video_path,
-                '-frames:v', '1',
-                '-q:v', '2',  # High quality JPEG
-                '-y',
-                str(output_path)
-            ]
-            
-            try:
-                subprocess.run(cmd, capture_output=True, text=True, check=True)
+            if cache.frame_to_file(video_path, timestamp, str(output_path), max_width):
                 extracted_frames.append(str(output_path))
-                logger.info(f"Extracted frame {i+1}/{num_frames} at {timestamp:.1f}s")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Failed to extract frame at {timestamp}s: {e}")
+                extracted_timestamps.append(timestamp)
+                logger.info(f"Extracted frame {i+1}/{len(timestamps)} at {timestamp:.1f}s")
         
-        return extracted_frames
+        return extracted_frames, extracted_timestamps
     
     def _get_video_duration(self, video_path: str) -> float:
         """Get video duration in seconds"""
@@ -168,7 +340,7 @@ Please provide specific timestamps and edit suggestions in JSON format:
         ]
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = run_ffmpeg(cmd)
             return float(result.stdout.strip())
         except (subprocess.CalledProcessError, ValueError) as e:
             logger.error(f"Failed to get video duration: {e}")
@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional
 import mimetypes
 
+
 logger = logging.getLogger(__name__)
 
 class GeminiVideoAnalyzer:
@@ -163,21 +164,9 @@ Analyze the entire video and identify 3-5 key moments that would benefit from en
     
     def extract_frame_at_timestamp(self, video_path: str, timestamp: float, output_path: str) -> bool:
         """Extract a single frame at the Gemini-identified timestamp"""
-        import subprocess
-        
-        cmd = [
-            'ffmpeg',
-            '-ss', str(timestamp),
-            '-i', video_path,
-            '-frames:v', '1',
-            '-y',
-            output_path
-        ]
+        from .frame_cache import shared_frame_cache
         
-        try:
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
+        if shared_frame_cache().frame_to_file(video_path, timestamp, output_path):
             logger.info(f"Extracted frame at {timestamp}s")
             return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to extract frame at {timestamp}s: {e}")
-            return False
\ No newline at end of file
+        return False
@@ -0,0 +1,315 @@
+"""Local CPU pre-analysis: score a downscaled decode with OpenCV before calling Gemini"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WindowScores:
+    """Heuristic scores for one fixed-length window of the video"""
+    start: float
+    end: float
+    motion: float = 0.0       # mean absolute frame difference, 0-1
+    sharpness: float = 0.0    # Laplacian variance of the downscaled frame (low = blurry)
+    faces: int = 0            # max faces detected in a sampled frame
+    text: float = 0.0         # 0-1 likelihood of on-screen text
+    brightness: float = 0.0   # mean luma, 0-1
+    cut: bool = False         # a hard scene cut happens inside this window
+    loudness: float = 0.0     # mean audio RMS, 0-1 full scale (0 without audio)
+    onsets: int = 0           # audio onsets (speech starts, beats) inside this window
+
+    @property
+    def interest(self) -> float:
+        """Combined 0-1 score of how much this window is worth sending to Gemini"""
+        score = 0.45 * min(self.motion * 8.0, 1.0)
+        score += 0.3 if self.faces else 0.0
+        score += 0.2 * self.text
+        score += 0.1 if self.cut else 0.0
+        score += 0.1 if self.onsets else 0.0
+        # Blurry or near-black frames are poor material for the model
+        if self.sharpness < 20.0:
+            score *= 0.6
+        if self.brightness < 0.08:
+            score *= 0.5
+        return min(score, 1.0)
+
+
+@dataclass
+class PreAnalysis:
+    """Outcome of the local pre-analysis pass"""
+    duration: float
+    windows: List[WindowScores] = field(default_factory=list)
+    needs_ai: bool = True
+    intervals: List[Tuple[float, float]] = field(default_factory=list)
+    reason: str = ""
+    audio: Optional[Any] = None  # AudioFeatures from the same decode, when the video has audio
+
+    def sample_timestamps(self, num_frames: int) -> List[float]:
+        """
+        Spread num_frames sample timestamps over the interesting intervals,
+        proportionally to interval length. Falls back to even spacing.
+        """
+        if num_frames <= 0:
+            return []
+        if not self.intervals:
+            interval = self.duration / (num_frames + 1) if self.duration > 0 else 0.0
+            return [interval * (i + 1) for i in range(num_frames)]
+
+        total = sum(end - start for start, end in self.intervals) or 1.0
+        timestamps = []
+        remaining = num_frames
+        for i, (start, end) in enumerate(self.intervals):
+            if i == len(self.intervals) - 1:
+                count = remaining
+            else:
+                count = min(remaining, max(1, round(num_frames * (end - start) / total)))
+            remaining -= count
+            step = (end - start) / (count + 1)
+            timestamps.extend(start + step * (j + 1) for j in range(count))
+            if remaining <= 0:
+                break
+        return sorted(timestamps)
+
+    def to_analysis(self) -> Dict[str, Any]:
+        """
+        Build an analysis dict in the same shape Gemini returns, so the heuristic
+        result can be rendered directly when the AI is skipped or unavailable
+        """
+        frames_to_edit = []
+        effect_recommendations = []
+        priority_scores = []
+
+        for start, end in self.intervals:
+            windows = [w for w in self.windows if w.start < end and w.end > start]
+            if not windows:
+                continue
+            peak = max(windows, key=lambda w: w.interest)
+            frames_to_edit.append({"start": round(start, 2), "end": round(end, 2), "type": "effect_enhancement"})
+            effect_recommendations.append({
+                "timestamp": round((peak.start + peak.end) / 2, 2),
+                "effect": "highlight",
+                "intensity": round(peak.interest, 2)
+            })
+            priority_scores.append(max(1, round(peak.interest * 10)))
+
+        for window in self.windows:
+            if window.cut:
+                frames_to_edit.append({"start": round(window.start, 2), "end": round(window.end, 2), "type": "scene_transition"})
+                priority_scores.append(5)
+            elif window.brightness < 0.15:
+                effect_recommendations.append({
+                    "timestamp": round(window.start, 2),
+                    "effect": "brightness",
+                    "intensity": round(0.15 - window.brightness, 2)
+                })
+
+        frames_to_edit.sort(key=lambda f: f["start"])
+        return {
+            "frames_to_edit": frames_to_edit,
+            "enhancement_types": sorted({f["type"] for f in frames_to_edit}),
+            "text_overlay_suggestions": [],
+            "effect_recommendations": effect_recommendations,
+            "priority_scores": priority_scores
+        }
+
+
+class HeuristicAnalyzer:
+    """
+    Score motion, blur, faces, on-screen text and brightness on a downscaled decode
+
+    Runs entirely on the CPU with OpenCV. Frames are decoded at a low sample rate
+    and shrunk to analysis_width before any scoring happens. Given a probe, one
+    ffmpeg run decodes both the downscaled gray frames and the audio (see
+    FrameProcessor.iter_frames), and audio features come out of the same pass;
+    without one, OpenCV decodes the frames (grab() skips conversion for frames
+    in between) and there are no audio features.
+    """
+
+    def __init__(self, analysis_width: int = 160, sample_fps: float = 2.0, window_seconds: float = 1.0,
+                 interest_threshold: float = 0.3, max_intervals: int = 5):
+        self.analysis_width = analysis_width
+        self.sample_fps = sample_fps
+        self.window_seconds = window_seconds
+        self.interest_threshold = interest_threshold
+        self.max_intervals = max_intervals
+        self._face_cascade = None
+
+    def analyze(self, video_path: str, probe=None) -> PreAnalysis:
+        """Score the video and decide whether Gemini should see it"""
+        audio = None
+        if probe is not None and probe.width and probe.height and probe.fps:
+            samples, audio = self._sample_with_audio(video_path, probe)
+            duration = probe.duration
+        else:
+            samples, duration = self._sample_opencv(video_path)
+
+        if duration <= 0 and samples:
+            duration = samples[-1][0] + 1.0 / self.sample_fps
+
+        windows = self._score_windows(samples, duration, audio)
+        pre_analysis = self._decide(windows, duration)
+        pre_analysis.audio = audio
+        logger.info(f"Pre-analysis scored {len(samples)} frames in {len(windows)} windows: "
+                    f"needs_ai={pre_analysis.needs_ai} ({pre_analysis.reason})")
+        if audio is not None:
+            logger.info(f"Pre-analysis audio: {len(audio.onsets)} onsets, {len(audio.silences)} silent spans")
+        return pre_analysis
+
+    def _sample_with_audio(self, video_path: str, probe):
+        """Gray samples and AudioFeatures from a single ffmpeg demux and decode"""
+        from .audio_features import AudioFeatureExtractor
+        from .frame_processor import FrameProcessor
+
+        extractor = AudioFeatureExtractor() if probe.has_audio else None
+        samples = [
+            (timestamp, gray.copy())
+            for timestamp, gray in FrameProcessor().iter_frames(video_path, width=self.analysis_width, pix_fmt="gray",
+                                                                fps=self.sample_fps, ring_size=2, probe=probe,
+                                                                audio=extractor)
+        ]
+        return samples, extractor.finish() if extractor is not None else None
+
+    def _sample_opencv(self, video_path: str):
+        import cv2
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"OpenCV could not open video: {video_path}")
+
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            duration = frame_count / fps if frame_count > 0 else 0.0
+            stride = max(1, round(fps / self.sample_fps))
+
+            samples = []  # (timestamp, gray)
+            index = 0
+            while True:
+                if index % stride == 0:
+                    ok, frame = cap.read()
+                    if not ok:
+                        break
+                    samples.append((index / fps, self._downscale_gray(frame)))
+                elif not cap.grab():
+                    break
+                index += 1
+        finally:
+            cap.release()
+        return samples, duration
+
+    def _downscale_gray(self, frame):
+        import cv2
+
+        height, width = frame.shape[:2]
+        scale = self.analysis_width / float(width)
+        small = cv2.resize(frame, (self.analysis_width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _score_windows(self, samples, duration: float, audio=None) -> List[WindowScores]:
+        import cv2
+        import numpy as np
+
+        if not samples:
+            return []
+
+        num_windows = max(1, int(np.ceil(duration / self.window_seconds)))
+        windows = [
+            WindowScores(start=i * self.window_seconds, end=min(duration, (i + 1) * self.window_seconds))
+            for i in range(num_windows)
+        ]
+        buckets: List[List[int]] = [[] for _ in windows]
+        for i, (timestamp, _) in enumerate(samples):
+            buckets[min(num_windows - 1, int(timestamp / self.window_seconds))].append(i)
+
+        prev = None
+        diffs = []
+        for _, gray in samples:
+            diffs.append(0.0 if prev is None else float(cv2.absdiff(gray, prev).mean()) / 255.0)
+            prev = gray
+
+        for window, indices in zip(windows, buckets):
+            if not indices:
+                continue
+            grays = [samples[i][1] for i in indices]
+            window.motion = float(np.mean([diffs[i] for i in indices]))
+            window.cut = any(diffs[i] > 0.3 for i in indices)
+            window.sharpness = float(np.mean([cv2.Laplacian(g, cv2.CV_64F).var() for g in grays]))
+            window.brightness = float(np.mean([g.mean() for g in grays])) / 255.0
+            # Face and text detectors are the expensive part; run them once per window
+            middle = grays[len(grays) // 2]
+            window.faces = self._count_faces(middle)
+            window.text = self._text_score(middle)
+
+        if audio is not None and audio.rms is not None and len(audio.rms):
+            hops_per_window = self.window_seconds / audio.hop_seconds
+            for i, window in enumerate(windows):
+                rms = audio.rms[int(i * hops_per_window):int((i + 1) * hops_per_window)]
+                window.loudness = float(rms.mean()) if len(rms) else 0.0
+            for onset in audio.onsets:
+                windows[min(num_windows - 1, int(onset / self.window_seconds))].onsets += 1
+
+        return windows
+
+    def _count_faces(self, gray) -> int:
+        import cv2
+
+        if self._face_cascade is None:
+            if hasattr(cv2, "CascadeClassifier"):
+                self._face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+            else:
+                logger.warning("This OpenCV build has no Haar cascades; face scoring disabled")
+                self._face_cascade = False
+        if not self._face_cascade:
+            return 0
+        faces = self._face_cascade.detectMultiScale(gray, scaleFactor=1.15, minNeighbors=4, minSize=(12, 12))
+        return len(faces)
+
+    def _text_score(self, gray) -> float:
+        """Count text-like blobs: short, wide regions of dense horizontal edges"""
+        import cv2
+
+        gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+        _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        joined = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+        contours, _ = cv2.findContours(joined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        height = gray.shape[0]
+        text_boxes = 0
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if h < 4 or h > 0.2 * height or w < 2 * h:
+                continue
+            fill = cv2.countNonZero(binary[y:y + h, x:x + w]) / float(w * h)
+            if fill > 0.45:
+                text_boxes += 1
+        return min(1.0, text_boxes / 5.0)
+
+    def _decide(self, windows: List[WindowScores], duration: float) -> PreAnalysis:
+        if not windows:
+            return PreAnalysis(duration=duration, needs_ai=False, reason="no decodable frames")
+
+        if all(w.brightness < 0.05 for w in windows):
+            return PreAnalysis(duration=duration, windows=windows, needs_ai=False, reason="video is black")
+
+        interesting = [w for w in windows if w.interest >= self.interest_threshold]
+        if not interesting:
+            return PreAnalysis(duration=duration, windows=windows, needs_ai=False,
+                               reason="static content with no faces or text")
+
+        # Merge adjacent interesting windows, then keep the strongest intervals
+        merged: List[List[Any]] = []
+        for window in interesting:
+            if merged and window.start - merged[-1][1] <= 1e-6:
+                merged[-1][1] = window.end
+                merged[-1][2] = max(merged[-1][2], window.interest)
+            else:
+                merged.append([window.start, window.end, window.interest])
+        merged.sort(key=lambda m: m[2], reverse=True)
+        intervals = sorted((start, end) for start, end, _ in merged[:self.max_intervals])
+
+        covered = sum(end - start for start, end in intervals)
+        return PreAnalysis(duration=duration, windows=windows, needs_ai=True, intervals=intervals,
+                           reason=f"{len(intervals)} interesting intervals covering {covered:.1f}s")
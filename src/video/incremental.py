@@ -0,0 +1,216 @@
+"""
+Incremental re-render: keep each output's segment map and re-encode only what changed
+
+The output is rendered as keyframe-bounded segments, each encoded on its own
+with the edits that touch it and concatenated with the original audio. Each
+segment is keyed by a hash of everything that decides its pixels (source, time
+span, relevant edits, pre-filters, encoder settings) and kept in the output's
+state directory next to a segment map. When an edit changes, only the segments
+whose key changed are encoded again; the rest are reused as they are.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .edit_list import SCENE_TRANSITION, Edit, EditList
+from .ffmpeg import run_ffmpeg
+from .fingerprint import fingerprint
+from .instrumentation import count
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAP = "segments.json"
+SEGMENT_MAP_VERSION = 1
+
+
+@dataclass(slots=True)
+class RenderedSegment:
+    """One encoded piece of the output, stored in the state directory as file"""
+    start: float
+    end: float
+    key: str
+    file: str
+
+
+def plan_bounds(keyframe_pts: Sequence[float], duration: float,
+                min_segment_seconds: float = 2.0) -> List[Tuple[float, float]]:
+    """
+    Split [0, duration] at keyframes into segments at least min_segment_seconds long
+
+    Without keyframe times the split falls on a fixed min_segment_seconds grid;
+    segments are decoded with an accurate seek either way, keyframes only make
+    the seek cheap.
+    """
+    if not keyframe_pts:
+        steps = max(1, int(duration // min_segment_seconds))
+        keyframe_pts = [i * min_segment_seconds for i in range(steps)]
+    bounds = []
+    start = 0.0
+    for keyframe in sorted(keyframe_pts):
+        if keyframe - start >= min_segment_seconds and duration - keyframe >= min_segment_seconds / 2:
+            bounds.append((start, keyframe))
+            start = keyframe
+    bounds.append((start, duration))
+    return bounds
+
+
+def segment_edits(edits: EditList, start: float, end: float) -> List[Edit]:
+    """Edits that change any frame in [start, end)"""
+    relevant = edits.active(start, end)
+    # A fade-in holds every frame before it black, so later transitions reach back into this segment
+    relevant += [e for e in edits.of_kind(SCENE_TRANSITION) if e.start >= end]
+    return relevant
+
+
+def source_key(video_path: str) -> str:
+    """Identity of a source file: its content fingerprint, so a re-upload under another name reuses segments"""
+    return fingerprint(video_path)
+
+
+def _filters_key(filters: Sequence[str]) -> List[str]:
+    """Filters with any referenced command file (f='...') replaced by a hash of its contents"""
+    def file_hash(match):
+        try:
+            return f"f=sha1:{hashlib.sha1(Path(match.group(1)).read_bytes()).hexdigest()}"
+        except OSError:
+            return match.group(0)
+    return [re.sub(r"f='([^']+)'", file_hash, f) for f in filters]
+
+
+class IncrementalRenderer:
+    """
+    Renders an edit list as reusable segments
+
+    editor supplies build_filters() (a VideoEditor). Every segment is encoded
+    with the same encoder settings, so the pieces concatenate without another
+    encode.
+    """
+
+    def __init__(self, editor, min_segment_seconds: float = 2.0, encoder: str = "libx264", preset: str = "fast",
+                 crf: int = 23):
+        self.editor = editor
+        self.min_segment_seconds = min_segment_seconds
+        self.encoder = encoder
+        self.preset = preset
+        self.crf = crf
+
+    def render(self, input_video: str, output_video: str, edits: EditList, state_dir: str,
+               pre_filters: Optional[List[str]] = None, probe=None,
+               keyframes: Optional[Sequence[Tuple[float, float]]] = None,
+               source: Optional[str] = None, movflags: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Render output_video, reusing segments from state_dir; returns segment statistics
+
+        Args:
+            input_video: Path to input video
+            output_video: Path to output video
+            edits: The edit list to render
+            state_dir: Where this output's segments and segment map live between renders
+            pre_filters: Filters applied to every frame before the edits (e.g. the reframe crop)
+            probe: VideoProbe of the input (probed here when omitted)
+            keyframes: (pts, dts) of the input's keyframes (read with ffprobe when omitted)
+            source: Identity of the source content; defaults to source_key(input_video)
+            movflags: MP4 layout of the joined output (see Packaging.movflags)
+        """
+        from .effect_engine import concat_segments
+        from .probe import keyframe_times, probe_video
+
+        probe = probe or probe_video(input_video)
+        if probe is None or not probe.duration:
+            raise ValueError(f"Incremental render needs the duration of {input_video}")
+        if keyframes is None:
+            keyframes = keyframe_times(input_video)
+
+        state = Path(state_dir)
+        state.mkdir(parents=True, exist_ok=True)
+        previous = self._load_map(state)
+
+        common = {
+            "source": source or source_key(input_video),
+            "pre_filters": _filters_key(pre_filters or []),
+            "encoder": [self.encoder, self.preset, self.crf]
+        }
+        segments = []
+        encoded = 0
+        encoded_seconds = 0.0
+        for start, end in plan_bounds([pts for pts, _ in keyframes], probe.duration, self.min_segment_seconds):
+            relevant = segment_edits(edits, start, end)
+            key = hashlib.sha1(json.dumps(
+                {**common, "span": [start, end], "edits": [e.to_dict() for e in relevant]}, sort_keys=True
+            ).encode()).hexdigest()
+            segment = RenderedSegment(start, end, key, f"seg_{key[:20]}.mp4")
+            if not (state / segment.file).exists():
+                self._encode(input_video, state / segment.file, segment, EditList(relevant), pre_filters or [])
+                encoded += 1
+                encoded_seconds += end - start
+            segments.append(segment)
+
+        concat_segments([f"file '{(state / s.file).resolve()}'\n" for s in segments], input_video, output_video,
+                        state / "concat.txt", movflags)
+        self._save_map(state, common["source"], segments, edits)
+        self._prune(state, segments)
+
+        reused = len(segments) - encoded
+        changed = _changed_edits(previous.get("edit_list"), edits)
+        logger.info(f"Incremental render: encoded {encoded_seconds:.2f}s of {probe.duration:.2f}s, "
+                    f"reused {reused} of {len(segments)} segments"
+                    + (f" ({changed} edits changed)" if changed is not None else ""))
+        count("segments_reused", reused)
+        return {"segments": len(segments), "reused": reused, "encoded_seconds": encoded_seconds}
+
+    def _encode(self, input_video: str, path: Path, segment: RenderedSegment, edits: EditList,
+                pre_filters: List[str]):
+        # Put frames back on the source timeline so edit times (and sendcmd times) stay absolute
+        filters = ([f"setpts=PTS-STARTPTS+{segment.start}/TB"] + list(pre_filters) + self.editor.build_filters(edits)
+                   + ["setpts=PTS-STARTPTS"])
+        partial = path.with_name(f".partial_{path.name}")
+        run_ffmpeg([
+            'ffmpeg', '-v', 'error',
+            '-ss', str(segment.start), '-i', input_video, '-t', str(segment.end - segment.start),
+            '-an', '-vf', ','.join(filters), '-fps_mode', 'passthrough',
+            '-c:v', self.encoder, '-preset', self.preset, '-crf', str(self.crf), '-pix_fmt', 'yuv420p',
+            '-y', str(partial)
+        ])
+        os.replace(partial, path)
+
+    def _load_map(self, state: Path) -> Dict[str, Any]:
+        try:
+            data = json.loads((state / SEGMENT_MAP).read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if data.get("version") == SEGMENT_MAP_VERSION else {}
+
+    def _save_map(self, state: Path, source: str, segments: List[RenderedSegment], edits: EditList):
+        record = {
+            "version": SEGMENT_MAP_VERSION,
+            "source": source,
+            "rendered_at": time.time(),
+            "segments": [asdict(s) for s in segments],
+            "edit_list": edits.to_dicts()
+        }
+        partial = state / f".{SEGMENT_MAP}"
+        partial.write_text(json.dumps(record, indent=2))
+        os.replace(partial, state / SEGMENT_MAP)
+
+    def _prune(self, state: Path, segments: List[RenderedSegment]):
+        """Drop segment files the current map no longer references"""
+        keep = {s.file for s in segments}
+        for path in state.glob("seg_*.mp4"):
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
+
+
+def _changed_edits(previous: Optional[List[Dict[str, Any]]], edits: EditList) -> Optional[int]:
+    """Edits added or removed since the previous render (None on a first render)"""
+    if previous is None:
+        return None
+    before = {json.dumps(e, sort_keys=True) for e in previous}
+    after = {json.dumps(e, sort_keys=True) for e in edits.to_dicts()}
+    return len(before ^ after)
@@ -0,0 +1,177 @@
+"""Per-job timing spans and counters, exportable as JSON or Prometheus text"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# (metrics being collected, innermost open span) for the current job; None outside a job
+_active: ContextVar[Optional[Tuple["JobMetrics", Optional["Span"]]]] = ContextVar("job_metrics", default=None)
+
+
+@dataclass
+class Span:
+    """One timed step; children are the steps nested inside it"""
+    name: str
+    start: float
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"name": self.name, "seconds": round(self.seconds, 6)}
+        if self.attributes:
+            data["attributes"] = self.attributes
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+
+class JobMetrics:
+    """
+    Span tree and counters for one job
+
+    Spans opened in tasks or threads spawned by the job (asyncio tasks and
+    asyncio.to_thread copy the context) nest under whatever span was open when
+    they were spawned, so concurrent steps show up as siblings.
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _attach(self, parent: Optional[Span], span: Span):
+        with self._lock:
+            (parent.children if parent is not None else self.spans).append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "spans": [span.to_dict() for span in self.spans],
+            "counters": dict(sorted(self.counters.items()))
+        }
+
+
+@contextmanager
+def collect(metrics: Optional[JobMetrics] = None) -> Iterator[JobMetrics]:
+    """Collect spans and counters for the code run inside; pass metrics to resume a job's collection"""
+    metrics = metrics or JobMetrics()
+    token = _active.set((metrics, None))
+    try:
+        yield metrics
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time the enclosed block as a child of the current span; a no-op outside collect()"""
+    active = _active.get()
+    if active is None:
+        yield None
+        return
+
+    metrics, parent = active
+    current = Span(name=name, start=time.perf_counter(), attributes=attributes)
+    metrics._attach(parent, current)
+    token = _active.set((metrics, current))
+    try:
+        yield current
+    finally:
+        current.end = time.perf_counter()
+        _active.reset(token)
+
+
+def count(name: str, value: float = 1):
+    """Add to a counter of the current job; a no-op outside collect()"""
+    active = _active.get()
+    if active is not None:
+        active[0].add(name, value)
+
+
+# Process-wide startup milestones (perf_counter values), first occurrence wins
+_startup: Dict[str, float] = {}
+
+
+def mark_startup(name: str, at: Optional[float] = None):
+    """Record a startup milestone such as 'imports' or 'first_ffmpeg' once per process"""
+    _startup.setdefault(name, time.perf_counter() if at is None else at)
+
+
+def reset_startup(name: str = "start"):
+    """Start the startup clock over, e.g. in a process forked from a warm parent"""
+    _startup.clear()
+    mark_startup(name)
+
+
+def startup_timings() -> Dict[str, float]:
+    """Seconds from the 'start' mark to every other milestone, in the order they happened"""
+    start = _startup.get("start")
+    if start is None:
+        return {}
+    return {name: round(at - start, 6) for name, at in sorted(_startup.items(), key=lambda item: item[1])
+            if name != "start"}
+
+
+def span_totals(metrics: Dict[str, Any]) -> Dict[str, Tuple[float, int]]:
+    """(total seconds, occurrences) per span path such as 'analysis/ai_call'"""
+    totals: Dict[str, Tuple[float, int]] = {}
+
+    def walk(spans: List[Dict[str, Any]], prefix: str):
+        for s in spans:
+            path = f"{prefix}{s['name']}"
+            seconds, n = totals.get(path, (0.0, 0))
+            totals[path] = (seconds + s["seconds"], n + 1)
+            walk(s.get("children", []), f"{path}/")
+
+    walk(metrics.get("spans", []), "")
+    return totals
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def to_prometheus(metrics: Dict[str, Any], labels: Optional[Dict[str, str]] = None,
+                  prefix: str = "nano_banana") -> str:
+    """
+    Render a metrics dict (ProcessingResult.metrics) in the Prometheus text format
+
+    Spans become {prefix}_span_seconds / {prefix}_span_count gauges labeled by span
+    path; counters become {prefix}_<name>_total; startup milestones, when present,
+    become {prefix}_startup_seconds labeled by milestone.
+    """
+    base = ",".join(f'{k}="{_escape(v)}"' for k, v in (labels or {}).items())
+
+    def label_set(**extra) -> str:
+        parts = [base] if base else []
+        parts += [f'{k}="{_escape(v)}"' for k, v in extra.items()]
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    totals = span_totals(metrics)
+    lines = [f"# TYPE {prefix}_span_seconds gauge"]
+    lines += [f"{prefix}_span_seconds{label_set(span=path)} {seconds:.6f}" for path, (seconds, _) in totals.items()]
+    lines.append(f"# TYPE {prefix}_span_count gauge")
+    lines += [f"{prefix}_span_count{label_set(span=path)} {n}" for path, (_, n) in totals.items()]
+
+    for name, value in metrics.get("counters", {}).items():
+        metric = f"{prefix}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{label_set()} {value:g}")
+
+    startup = metrics.get("startup")
+    if startup:
+        lines.append(f"# TYPE {prefix}_startup_seconds gauge")
+        lines += [f"{prefix}_startup_seconds{label_set(milestone=name)} {seconds:.6f}" for name, seconds in startup.items()]
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,122 @@
+"""
+Output packaging written by the render pass itself
+
+MP4 outputs get their moov index at the front (faststart) so playback can
+start before the whole file has arrived, or are fragmented (fMP4) for
+streaming. HLS adds an adaptive ladder: the render's filtered frames are split
+and each rendition is encoded and segmented in the same ffmpeg run, instead of
+remuxing or re-decoding the finished output afterwards.
+"""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FASTSTART = "faststart"
+FRAGMENTED = "fragmented"
+HLS = "hls"
+MODES = (FASTSTART, FRAGMENTED, HLS)
+
+MASTER_PLAYLIST = "master.m3u8"
+
+_MOVFLAGS = {
+    FASTSTART: "+faststart",
+    FRAGMENTED: "+frag_keyframe+empty_moov+default_base_moof",
+    HLS: "+faststart",
+}
+_MP4_SUFFIXES = {".mp4", ".m4v", ".mov"}
+
+# (height, video bitrate) of each HLS rendition, top rung first
+DEFAULT_LADDER = ((1080, "5000k"), (720, "2800k"), (480, "1400k"), (360, "800k"))
+
+
+@dataclass
+class Packaging:
+    """
+    How the render pass packages its output
+
+    mode is one of MODES. For HLS, hls_dir receives the master playlist and one
+    fMP4-segmented playlist per rendition; renditions are the ladder rungs no
+    larger than the rendered frame's short side (at most max_renditions), so a
+    1080x1920 vertical short gets a 1080x1920 top rung. Keyframes are forced on
+    segment boundaries so players can switch between them. frame_size is the
+    rendered (width, height) when pre_filters such as the reframe change it;
+    otherwise the probed source size is used.
+    """
+    mode: str = FASTSTART
+    hls_dir: Optional[str] = None
+    ladder: Sequence[Tuple[int, str]] = DEFAULT_LADDER
+    max_renditions: int = 3
+    segment_seconds: float = 4.0
+    audio_bitrate: str = "128k"
+    frame_size: Optional[Tuple[int, int]] = None
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown packaging {self.mode!r} (expected one of {', '.join(MODES)})")
+
+    def movflags(self, output_path: str) -> Optional[str]:
+        """-movflags value for the main output, or None when it isn't an MP4-family file"""
+        if Path(output_path).suffix.lower() not in _MP4_SUFFIXES:
+            return None
+        return _MOVFLAGS[self.mode]
+
+    def mp4_args(self, output_path: str) -> List[str]:
+        flags = self.movflags(output_path)
+        return ['-movflags', flags] if flags else []
+
+    def rungs(self, short_side: int) -> List[Tuple[int, str]]:
+        """Ladder rungs for a frame with this short side; a smaller frame gets one rung at its own size"""
+        rungs = [(size, bitrate) for size, bitrate in self.ladder if size <= short_side]
+        if not rungs:
+            rungs = [(short_side - short_side % 2, self.ladder[-1][1])]
+        return rungs[:self.max_renditions]
+
+    def hls_outputs(self, source_label: str, probe, encoder: str = "libx264",
+                    preset: str = "fast") -> Optional[Tuple[str, List[str]]]:
+        """
+        The filter graph splitting source_label into the ladder, and the output arguments writing it
+
+        The graph leaves a [main] pad for the MP4 output. Returns None unless
+        the mode is HLS, and (with a warning) when the frame size is unknown.
+        Each rendition scales the frame's short side to its rung.
+        """
+        if self.mode != HLS or not self.hls_dir:
+            return None
+        width, height = self.frame_size or ((probe.width, probe.height) if probe is not None else (0, 0))
+        if not width or not height:
+            logger.warning("Skipping the HLS ladder: frame size unknown")
+            return None
+
+        rungs = self.rungs(min(width, height))
+        pads = ''.join(f"[hls{i}]" for i in range(len(rungs)))
+        graph = [f"{source_label}split={len(rungs) + 1}[main]{pads}"]
+        scale = "{}:-2" if width < height else "-2:{}"
+        graph += [f"[hls{i}]scale={scale.format(size)}[hlsv{i}]" for i, (size, _) in enumerate(rungs)]
+        has_audio = probe is not None and probe.has_audio
+
+        args = []
+        for i in range(len(rungs)):
+            args += ['-map', f'[hlsv{i}]']
+        if has_audio:
+            for _ in rungs:
+                args += ['-map', '0:a:0']
+        args += ['-c:v', encoder, '-preset', preset, '-pix_fmt', 'yuv420p',
+                 '-force_key_frames', f"expr:gte(t,n_forced*{self.segment_seconds})"]
+        for i, (_, bitrate) in enumerate(rungs):
+            args += [f'-b:v:{i}', bitrate]
+        if has_audio:
+            args += ['-c:a', 'aac', '-b:a', self.audio_bitrate]
+        streams = ' '.join(f"v:{i},a:{i}" if has_audio else f"v:{i}" for i in range(len(rungs)))
+        hls_dir = Path(self.hls_dir)
+        args += [
+            '-f', 'hls', '-hls_time', str(self.segment_seconds), '-hls_playlist_type', 'vod',
+            '-hls_segment_type', 'fmp4', '-hls_flags', 'independent_segments',
+            '-hls_segment_filename', str(hls_dir / "v%v" / "seg_%03d.m4s"),
+            '-master_pl_name', MASTER_PLAYLIST, '-var_stream_map', streams,
+            str(hls_dir / "v%v" / "index.m3u8")
+        ]
+        return ';'.join(graph), args
@@ -0,0 +1,121 @@
+"""Probe video metadata once with ffprobe"""
+
+import json
+import logging
+import subprocess
+from dataclasses import asdict, dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from .ffmpeg import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VideoProbe:
+    """Container and stream metadata the pipeline needs"""
+    duration: float = 0.0
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    video_codec: str = ""
+    pix_fmt: str = ""
+    profile: str = ""  # as ffprobe names it, e.g. "High" or "High 4:4:4 Predictive"
+    has_audio: bool = False
+    size_bytes: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VideoProbe":
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+def probe_video(video_path: str) -> Optional[VideoProbe]:
+    """
+    Read duration, dimensions, frame rate and streams in a single ffprobe call
+
+    Returns None when ffprobe fails or the file has no video stream.
+    """
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-show_entries', 'format=duration,size:stream=codec_type,codec_name,profile,pix_fmt,width,height,avg_frame_rate',
+        '-of', 'json',
+        video_path
+    ]
+
+    try:
+        result = run_ffmpeg(cmd)
+        data = json.loads(result.stdout)
+    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError) as e:
+        logger.error(f"Failed to probe video {video_path}: {e}")
+        return None
+
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    if video is None:
+        logger.error(f"No video stream in {video_path}")
+        return None
+
+    fmt = data.get("format", {})
+    return VideoProbe(
+        duration=float(fmt.get("duration") or 0.0),
+        width=int(video.get("width") or 0),
+        height=int(video.get("height") or 0),
+        fps=_parse_rate(video.get("avg_frame_rate", "0/0")),
+        video_codec=video.get("codec_name", ""),
+        pix_fmt=video.get("pix_fmt", ""),
+        profile=video.get("profile", ""),
+        has_audio=any(s.get("codec_type") == "audio" for s in streams),
+        size_bytes=int(fmt.get("size") or 0)
+    )
+
+
+def keyframe_times(video_path: str) -> List[Tuple[float, float]]:
+    """
+    (presentation, decoding) times of the video's keyframes, read from packet flags without decoding
+
+    The two differ when the stream has B-frames; cutting at a keyframe without
+    re-encoding needs the decoding time. Returns an empty list when ffprobe fails.
+    """
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,dts_time,flags',
+        '-of', 'csv=print_section=0',
+        video_path
+    ]
+
+    try:
+        result = run_ffmpeg(cmd)
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        logger.error(f"Failed to read keyframes of {video_path}: {e}")
+        return []
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        fields = line.split(",")
+        if len(fields) < 3 or "K" not in fields[2]:
+            continue
+        try:
+            pts = float(fields[0])
+        except ValueError:
+            continue
+        try:
+            dts = float(fields[1])
+        except ValueError:
+            dts = pts
+        keyframes.append((pts, dts))
+    return sorted(keyframes)
+
+
+def _parse_rate(rate: str) -> float:
+    """Parse an ffprobe rational like '30000/1001'"""
+    try:
+        num, _, den = rate.partition("/")
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
@@ -0,0 +1,224 @@
+"""Auto-reframe landscape video to vertical 9:16 along a tracked, smoothed crop path"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TARGET_ASPECT = 9 / 16
+
+
+@dataclass
+class CropPath:
+    """
+    Where a full-height crop window sits over time, in source pixels
+
+    points are (timestamp, x of the crop's left edge) at the analysis sample
+    rate; x_at() interpolates between them.
+    """
+    source_width: int
+    source_height: int
+    crop_width: int
+    crop_height: int
+    points: List[Tuple[float, int]] = field(default_factory=list)
+
+    def x_at(self, timestamp: float) -> int:
+        import bisect
+
+        if not self.points:
+            return (self.source_width - self.crop_width) // 2
+        times = [t for t, _ in self.points]
+        i = bisect.bisect_right(times, timestamp)
+        if i == 0:
+            return self.points[0][1]
+        if i == len(self.points):
+            return self.points[-1][1]
+        (t0, x0), (t1, x1) = self.points[i - 1], self.points[i]
+        return round(x0 + (x1 - x0) * (timestamp - t0) / (t1 - t0))
+
+    def sendcmd_script(self, fps: float, duration: float, target: str = "crop@reframe") -> str:
+        """Time-keyed crop commands at frame rate, written only where x actually changes"""
+        lines = []
+        last = None
+        for frame in range(int(duration * fps) + 1):
+            timestamp = frame / fps
+            x = self.x_at(timestamp)
+            if x != last:
+                lines.append(f"{timestamp:.4f} {target} x {x};")
+                last = x
+        return "\n".join(lines) + "\n"
+
+
+def crop_size(width: int, height: int) -> Optional[Tuple[int, int]]:
+    """Even-sized full-height 9:16 window for a source, or None if it is not wider than 9:16"""
+    if not width or not height or width / height <= TARGET_ASPECT:
+        return None
+    crop_width = int(height * TARGET_ASPECT) // 2 * 2
+    return crop_width, height // 2 * 2
+
+
+class Reframer:
+    """
+    Plans a 9:16 crop path from a low-resolution proxy decode
+
+    Frames are decoded by ffmpeg at proxy_width and sample_fps (see
+    FrameProcessor.iter_frames), so saliency, motion and face detection only
+    ever see small grayscale frames. Each sample scores every window position by
+    its spectral-residual saliency, motion and face mass; the chosen window is
+    biased toward the previous one so the crop follows a subject rather than
+    flicking between peaks. Within each shot (the path may jump at hard cuts)
+    the path is smoothed with a moving average and its speed capped.
+    """
+
+    def __init__(self, proxy_width: int = 256, sample_fps: float = 5.0, smoothing_seconds: float = 1.0,
+                 max_speed: float = 0.25, stickiness: float = 0.5, cut_threshold: float = 0.3):
+        """
+        Args:
+            proxy_width: Width of the analysis decode
+            sample_fps: Analysis samples per second
+            smoothing_seconds: Moving-average window for the crop path
+            max_speed: Fastest pan, in source widths per second
+            stickiness: How strongly a window prefers staying near the previous one (0 = none)
+            cut_threshold: Mean frame difference (0-1) treated as a hard cut
+        """
+        self.proxy_width = proxy_width
+        self.sample_fps = sample_fps
+        self.smoothing_seconds = smoothing_seconds
+        self.max_speed = max_speed
+        self.stickiness = stickiness
+        self.cut_threshold = cut_threshold
+        self._face_cascade = None
+
+    def plan(self, video_path: str, probe) -> Optional[CropPath]:
+        """Crop path for the video, or None when it is already 9:16 or narrower"""
+        import numpy as np
+        from .frame_processor import FrameProcessor
+
+        size = crop_size(probe.width, probe.height)
+        if size is None:
+            return None
+        crop_width, crop_height = size
+
+        proxy_height = max(2, round(probe.height * self.proxy_width / probe.width / 2) * 2)
+        proxy_crop = max(1, round(crop_width * self.proxy_width / probe.width))
+        scale = probe.width / self.proxy_width
+
+        samples = []  # (timestamp, proxy x, starts a new shot)
+        prev_gray = None
+        prev_x = None
+        for timestamp, gray in FrameProcessor().iter_frames(video_path, width=self.proxy_width, height=proxy_height,
+                                                            pix_fmt="gray", fps=self.sample_fps, probe=probe):
+            frame = gray.astype(np.float32)
+            cut = prev_gray is not None and float(np.abs(frame - prev_gray).mean()) / 255.0 > self.cut_threshold
+            heat = self._heat(frame, None if prev_gray is None or cut else prev_gray, gray)
+            x = self._best_window(heat.sum(axis=0), proxy_crop, None if cut else prev_x)
+            samples.append((timestamp, x, cut or prev_x is None))
+            prev_gray, prev_x = frame, x
+
+        points = [(t, int(np.clip(round(x * scale), 0, probe.width - crop_width)))
+                  for t, x in self._smooth(samples, probe.width / scale)]
+        logger.info(f"Reframe path: {len(points)} samples, {crop_width}x{crop_height} window over "
+                    f"{probe.width}x{probe.height}")
+        return CropPath(probe.width, probe.height, crop_width, crop_height, points)
+
+    def _heat(self, frame, prev_frame, gray):
+        """Where the viewer will look: saliency, plus motion and faces when present"""
+        import numpy as np
+
+        heat = _spectral_saliency(frame)
+        if prev_frame is not None:
+            motion = np.abs(frame - prev_frame)
+            peak = motion.max()
+            if peak > 0:
+                heat = heat + 0.5 * motion / peak
+        for x, y, w, h in self._faces(gray):
+            heat[y:y + h, x:x + w] += 2.0
+        return heat
+
+    def _faces(self, gray):
+        import cv2
+
+        if self._face_cascade is None:
+            if hasattr(cv2, "CascadeClassifier"):
+                self._face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+            else:
+                logger.warning("This OpenCV build has no Haar cascades; reframing on saliency only")
+                self._face_cascade = False
+        if not self._face_cascade:
+            return []
+        return self._face_cascade.detectMultiScale(gray, scaleFactor=1.15, minNeighbors=4, minSize=(12, 12))
+
+    def _best_window(self, column_mass, window: int, prev_x: Optional[float]) -> float:
+        """Left edge of the window holding the most heat, pulled toward the previous one"""
+        import numpy as np
+
+        cumulative = np.concatenate(([0.0], np.cumsum(column_mass)))
+        scores = cumulative[window:] - cumulative[:-window]
+        if prev_x is not None and scores.max() > 0:
+            positions = np.arange(len(scores))
+            scores = scores - self.stickiness * scores.max() * np.abs(positions - prev_x) / len(column_mass)
+        return float(np.argmax(scores))
+
+    def _smooth(self, samples, proxy_width: float) -> List[Tuple[float, float]]:
+        """Moving average and speed cap within each shot; cuts start a fresh shot"""
+        import numpy as np
+
+        radius = max(0, int(self.smoothing_seconds * self.sample_fps / 2))
+        max_step = self.max_speed * proxy_width / self.sample_fps
+        smoothed = []
+        shot: List[Tuple[float, float]] = []
+
+        def flush():
+            if not shot:
+                return
+            xs = np.array([x for _, x in shot])
+            padded = np.pad(xs, radius, mode="edge")
+            kernel = np.ones(2 * radius + 1) / (2 * radius + 1)
+            averaged = np.convolve(padded, kernel, mode="valid")
+            for i in range(1, len(averaged)):
+                averaged[i] = averaged[i - 1] + np.clip(averaged[i] - averaged[i - 1], -max_step, max_step)
+            smoothed.extend(zip((t for t, _ in shot), averaged.tolist()))
+            shot.clear()
+
+        for timestamp, x, new_shot in samples:
+            if new_shot:
+                flush()
+            shot.append((timestamp, x))
+        flush()
+        return smoothed
+
+
+def _spectral_saliency(frame):
+    """Spectral-residual saliency map (Hou & Zhang 2007), normalised to 0-1"""
+    import cv2
+    import numpy as np
+
+    spectrum = np.fft.fft2(frame)
+    log_amplitude = np.log1p(np.abs(spectrum)).astype(np.float32)
+    residual = log_amplitude - cv2.blur(log_amplitude, (3, 3))
+    saliency = np.abs(np.fft.ifft2(np.exp(residual + 1j * np.angle(spectrum)))) ** 2
+    saliency = cv2.GaussianBlur(saliency.astype(np.float32), (9, 9), 2.5)
+    peak = saliency.max()
+    return saliency / peak if peak > 0 else saliency
+
+
+def reframe_filters(path: CropPath, fps: float, duration: float, work_dir: str,
+                    output_size: Optional[Tuple[int, int]] = None) -> List[str]:
+    """
+    Filters that apply the crop path in the same ffmpeg pass as the other edits
+
+    Writes the sendcmd script into work_dir. output_size scales the cropped
+    frame, e.g. (1080, 1920); by default it keeps the source's resolution.
+    """
+    script = Path(work_dir) / "reframe_cmds.txt"
+    script.write_text(path.sendcmd_script(fps, duration))
+    filters = [
+        f"sendcmd=f='{script}'",
+        f"crop@reframe=w={path.crop_width}:h={path.crop_height}:x={path.x_at(0.0)}:y=0"
+    ]
+    if output_size:
+        filters.append(f"scale={output_size[0]}:{output_size[1]}")
+    filters.append("setsar=1")
+    return filters
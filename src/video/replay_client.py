@@ -0,0 +1,107 @@
+"""Record/replay AI client for deterministic offline benchmarking"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from .ai_ledger import note_call
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayMissError(KeyError):
+    """Raised in replay mode when the corpus has no recording for a request"""
+
+
+class RecordReplayClient:
+    """
+    Drop-in create_completion client that records real responses to a local corpus
+    and replays them offline
+
+    Modes:
+        record: forward to the inner client and save every response
+        replay: serve responses from the corpus only; unknown requests raise ReplayMissError
+        auto:   replay when recorded, otherwise forward and record
+
+    Each corpus entry is one JSON file named by the request hash, holding the response,
+    model, payload size and the latency observed when it was recorded. Replays sleep for
+    that latency times latency_scale (0 disables the delay).
+    """
+
+    MODES = ("record", "replay", "auto")
+
+    def __init__(self, corpus_dir: str, mode: str = "replay", inner=None, latency_scale: float = 1.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown record/replay mode: {mode} (expected one of {self.MODES})")
+        if mode != "replay" and inner is None:
+            raise ValueError(f"Mode '{mode}' needs an inner client to record from")
+
+        self.corpus_dir = Path(corpus_dir)
+        self.corpus_dir.mkdir(parents=True, exist_ok=True)
+        self.mode = mode
+        self.inner = inner
+        self.latency_scale = latency_scale
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    @staticmethod
+    def request_hash(messages: List[Dict[str, Any]], model: str, **kwargs) -> str:
+        """Stable hash of everything that determines the response"""
+        canonical = json.dumps({"model": model, "messages": messages, **kwargs}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def payload_size(messages: List[Dict[str, Any]]) -> int:
+        """Serialized request size in bytes"""
+        return len(json.dumps(messages, separators=(",", ":")).encode("utf-8"))
+
+    async def create_completion(self, messages: List[Dict[str, Any]], model: str, **kwargs) -> Dict[str, Any]:
+        request_hash = self.request_hash(messages, model, **kwargs)
+        entry_path = self.corpus_dir / f"{request_hash}.json"
+
+        if self.mode != "record" and entry_path.exists():
+            return await self._replay(entry_path)
+
+        if self.mode == "replay":
+            self.stats["misses"] += 1
+            raise ReplayMissError(f"No recorded response for request {request_hash[:12]} in {self.corpus_dir}")
+
+        start = time.perf_counter()
+        response = await self.inner.create_completion(messages=messages, model=model, **kwargs)
+        latency = time.perf_counter() - start
+
+        self._write_entry(entry_path, {
+            "request_hash": request_hash,
+            "model": model,
+            "payload_bytes": self.payload_size(messages),
+            "latency_seconds": latency,
+            "recorded_at": time.time(),
+            "response": response
+        })
+        self.stats["recorded"] += 1
+        logger.info(f"Recorded AI response {request_hash[:12]} ({latency:.2f}s)")
+        return response
+
+    async def _replay(self, entry_path: Path) -> Dict[str, Any]:
+        with open(entry_path) as f:
+            entry = json.load(f)
+
+        delay = entry.get("latency_seconds", 0.0) * self.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        self.stats["replayed"] += 1
+        note_call(cache_hit=True)
+        logger.debug(f"Replayed AI response {entry['request_hash'][:12]} ({delay:.2f}s simulated)")
+        return entry["response"]
+
+    def _write_entry(self, entry_path: Path, entry: Dict[str, Any]):
+        """Write via a temp file so a crash never leaves a truncated recording"""
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
@@ -0,0 +1,189 @@
+"""Coalesce frame-analysis requests from several short videos into one completion call"""
+
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingRequest:
+    """One video's frame-analysis request waiting for a batch"""
+    video_id: str
+    prompt: Dict[str, Any]
+    parts: List[Dict[str, Any]]
+    payload_bytes: int
+    future: Optional[asyncio.Future] = field(repr=False, default=None)
+
+
+def part_bytes(part: Dict[str, Any]) -> int:
+    """Approximate on-the-wire size of one message content part"""
+    if part.get("type") == "image_url":
+        return len(part["image_url"]["url"])
+    return len(part.get("text", ""))
+
+
+class AnalysisCoalescer:
+    """
+    Pack frames from several small videos into one create_completion request
+
+    Requests arriving within window_seconds of the first one are grouped, up to
+    max_payload_bytes and max_videos per request, under a single shared preamble
+    with one section per video; each section keeps the video's own prompt, so
+    per-request instructions (such as how to read contact sheet cells) still
+    apply. The response is split back into one JSON document per video. A request that ends up alone in its window is sent unchanged with
+    its own prompt, so light load only pays the (short) window.
+    """
+
+    def __init__(self, ai_client, window_seconds: float = 0.05, max_payload_bytes: int = 16 * 1024 * 1024,
+                 max_videos: int = 8, model: str = "gemini-1.5-flash", temperature: float = 0.7,
+                 max_tokens: int = 2000):
+        self.ai_client = ai_client
+        self.window_seconds = window_seconds
+        self.max_payload_bytes = max_payload_bytes
+        self.max_videos = max_videos
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self._pending: List[_PendingRequest] = []
+        self._pending_bytes = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._next_id = 0
+        self._sending: Set[asyncio.Task] = set()  # the loop only keeps weak references to tasks
+
+    async def submit(self, prompt: Dict[str, Any], parts: List[Dict[str, Any]], label: str = "") -> str:
+        """
+        Queue one video's request and wait for its share of the response
+
+        Args:
+            prompt: The single-video prompt part, used if the request is sent alone
+            parts: The video's frame text/image parts (without the prompt)
+            label: Human-readable name for logs
+
+        Returns:
+            The model's response text for this video alone
+        """
+        loop = asyncio.get_running_loop()
+        self._next_id += 1
+        request = _PendingRequest(
+            video_id=f"v{self._next_id}",
+            prompt=prompt,
+            parts=parts,
+            payload_bytes=part_bytes(prompt) + sum(part_bytes(p) for p in parts),
+            future=loop.create_future()
+        )
+
+        # A request that would overflow the current batch flushes it first
+        if self._pending and (self._pending_bytes + request.payload_bytes > self.max_payload_bytes):
+            self._flush()
+
+        self._pending.append(request)
+        self._pending_bytes += request.payload_bytes
+        logger.debug(f"Queued {label or request.video_id} for coalescing ({request.payload_bytes} bytes)")
+
+        if len(self._pending) >= self.max_videos or self._pending_bytes >= self.max_payload_bytes:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await request.future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_bytes = self._pending, [], 0
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[_PendingRequest]):
+        try:
+            if len(batch) == 1:
+                request = batch[0]
+                text = await self._complete([request.prompt] + request.parts, self.max_tokens)
+                self._resolve(request, text)
+                return
+
+            logger.info(f"Coalescing {len(batch)} videos into one request "
+                        f"({sum(r.payload_bytes for r in batch)} payload bytes)")
+            text = await self._complete(self._batch_content(batch), self.max_tokens * len(batch))
+            per_video = self._split_response(text)
+            for request in batch:
+                if request.video_id in per_video:
+                    self._resolve(request, json.dumps(per_video[request.video_id]))
+                else:
+                    self._reject(request, ValueError(f"Coalesced response has no section for {request.video_id}"))
+        except Exception as e:
+            logger.error(f"Coalesced analysis request failed: {e}")
+            for request in batch:
+                self._reject(request, e)
+
+    async def _complete(self, content: List[Dict[str, Any]], max_tokens: int) -> str:
+        response = await self.ai_client.create_completion(
+            model=self.model,
+            messages=[{"role": "user", "content": content}],
+            temperature=self.temperature,
+            max_tokens=max_tokens
+        )
+        return response["choices"][0]["message"]["content"]
+
+    def _batch_content(self, batch: List[_PendingRequest]) -> List[Dict[str, Any]]:
+        ids = ", ".join(r.video_id for r in batch)
+        content = [{"type": "text", "text": f"""You are given frames from {len(batch)} separate short videos: {ids}.
+Each video's section starts with a "=== VIDEO <id> ===" header, then that video's own
+instructions, then its frames. Analyze every video independently, following its instructions
+for how its frames are shown and referenced, but return all videos in the single JSON object
+below rather than in the format those instructions give. For each frame, identify:
+1. What's happening in the frame
+2. Any text that should be added
+3. Any effects that would enhance it
+
+Refer to frames by frame_index (0-based within that video), or by cell number when the
+video is shown as contact sheets. Return JSON with one entry per video id:
+{{
+    "videos": {{
+        "{batch[0].video_id}": {{
+            "video_analysis": {{"content_summary": "brief description of what the video shows"}},
+            "edits_to_apply": [
+                {{
+                    "frame_index": 0,
+                    "description": "what's in this frame",
+                    "edit_type": "text_overlay",
+                    "text": "suggested text",
+                    "position": "bottom"
+                }}
+            ]
+        }}
+    }}
+}}"""}]
+        for request in batch:
+            content.append({"type": "text", "text": f"=== VIDEO {request.video_id} ==="})
+            content.append(request.prompt)
+            content.extend(request.parts)
+        return content
+
+    def _split_response(self, text: str) -> Dict[str, Any]:
+        json_match = re.search(r'```(?:json)?\s*(\{.*\})\s*```', text, re.DOTALL)
+        if json_match:
+            text = json_match.group(1)
+        data = json.loads(text)
+        videos = data.get("videos", {})
+        if isinstance(videos, list):
+            videos = {v.get("video_id"): v for v in videos if isinstance(v, dict)}
+        return videos
+
+    @staticmethod
+    def _resolve(request: _PendingRequest, text: str):
+        if not request.future.done():
+            request.future.set_result(text)
+
+    @staticmethod
+    def _reject(request: _PendingRequest, error: Exception):
+        if not request.future.done():
+            request.future.set_exception(error)
@@ -0,0 +1,99 @@
+"""Frame sampling budgets and timestamp planning for AI analysis"""
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+
+@dataclass
+class SamplingBudget:
+    """How many frames one video may send to the model, split across the coarse and fine rounds"""
+    total_frames: int
+    coarse_frames: int
+
+    @property
+    def fine_frames(self) -> int:
+        return max(0, self.total_frames - self.coarse_frames)
+
+
+def plan_sampling_budget(duration: float, frames_per_minute: float = 20.0, min_frames: int = 5,
+                         max_frames: int = 24, coarse_fraction: float = 0.3) -> SamplingBudget:
+    """
+    Size the frame budget by duration, capped by the per-video cost ceiling
+
+    Args:
+        duration: Video duration in seconds
+        frames_per_minute: Frames to spend per minute of video before the cap applies
+        min_frames: Floor so very short clips still get a useful look
+        max_frames: Cost ceiling - never send more frames than this for one video
+        coarse_fraction: Share of the budget spent on the cheap coarse round
+    """
+    wanted = math.ceil(max(duration, 0.0) / 60.0 * frames_per_minute)
+    total = max(1, min(max_frames, max(min_frames, wanted)))
+    coarse = max(1, min(total, round(total * coarse_fraction)))
+    return SamplingBudget(total_frames=total, coarse_frames=coarse)
+
+
+def even_timestamps(start: float, end: float, count: int) -> List[float]:
+    """count timestamps evenly spaced strictly inside (start, end)"""
+    if count <= 0 or end <= start:
+        return []
+    step = (end - start) / (count + 1)
+    return [start + step * (i + 1) for i in range(count)]
+
+
+def intervals_around(timestamps: Sequence[float], radius: float, duration: float) -> List[Tuple[float, float]]:
+    """Turn points of interest into merged [t - radius, t + radius] intervals clamped to the video"""
+    intervals: List[List[float]] = []
+    for timestamp in sorted(timestamps):
+        start, end = max(0.0, timestamp - radius), min(duration, timestamp + radius)
+        if end <= start:
+            continue
+        if intervals and start <= intervals[-1][1]:
+            intervals[-1][1] = max(intervals[-1][1], end)
+        else:
+            intervals.append([start, end])
+    return [(start, end) for start, end in intervals]
+
+
+def dense_timestamps(intervals: Sequence[Tuple[float, float]], count: int,
+                     exclude: Sequence[float] = (), min_gap: float = 0.05) -> List[float]:
+    """
+    Spend count samples inside intervals, proportionally to interval length,
+    skipping any that land within min_gap of an already-sampled timestamp
+    """
+    total = sum(end - start for start, end in intervals)
+    if count <= 0 or total <= 0:
+        return []
+
+    # Oversample by the already-taken points that fall inside, so skipping them doesn't shrink the budget
+    taken = sorted(exclude)
+    wanted = count + sum(1 for t in taken if any(start <= t <= end for start, end in intervals))
+
+    timestamps = []
+    remaining = wanted
+    for i, (start, end) in enumerate(intervals):
+        share = remaining if i == len(intervals) - 1 else min(remaining, max(1, round(wanted * (end - start) / total)))
+        remaining -= share
+        timestamps.extend(even_timestamps(start, end, share))
+        if remaining <= 0:
+            break
+
+    fresh = [t for t in sorted(timestamps) if not _near(t, taken, min_gap)]
+    if len(fresh) > count:
+        fresh = [fresh[round(i * (len(fresh) - 1) / max(1, count - 1))] for i in range(count)]
+    return fresh
+
+
+def _near(timestamp: float, taken: Sequence[float], min_gap: float) -> bool:
+    return any(abs(timestamp - t) < min_gap for t in taken)
+
+
+def edit_timestamps(edits: Sequence[dict]) -> List[float]:
+    """Timestamps the model pointed at, ignoring edits without a usable one"""
+    timestamps = []
+    for edit in edits:
+        timestamp: Optional[float] = edit.get("timestamp")
+        if isinstance(timestamp, (int, float)):
+            timestamps.append(float(timestamp))
+    return timestamps
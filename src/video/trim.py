@@ -0,0 +1,142 @@
+"""Dead-air trimming: find silent, static lead-ins and tails and cut them without re-encoding"""
+
+import bisect
+import logging
+import subprocess
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .ffmpeg import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrimPlan:
+    """Keep [start, end) of a source_duration-second video"""
+    start: float
+    end: float
+    source_duration: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def clip(self, intervals: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        """Intervals cut down to the kept span (still on the source timeline)"""
+        clipped = []
+        for start, end in intervals:
+            start, end = max(start, self.start), min(end, self.end)
+            if end > start:
+                clipped.append((start, end))
+        return clipped
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"start": round(self.start, 3), "end": round(self.end, 3),
+                "source_duration": round(self.source_duration, 3)}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["TrimPlan"]:
+        if not data:
+            return None
+        return cls(float(data["start"]), float(data["end"]), float(data["source_duration"]))
+
+
+def find_dead_air(windows, audio, duration: float, has_audio: bool, min_seconds: float = 1.0,
+                  static_motion: float = 0.003) -> Optional[TrimPlan]:
+    """
+    Span left after dropping a dead lead-in and tail, or None when neither is worth cutting
+
+    A pre-analysis window is dead when nothing moves (motion below static_motion,
+    no cut), no face is on screen, and it is silent: at least 90% of it inside
+    the audio's silence spans, or the video has no audio track at all. Only runs
+    of dead windows touching either end are trimmed; dead air in the middle
+    stays. Each end is trimmed only when it is at least min_seconds long.
+    """
+    if not windows or duration <= 0:
+        return None
+    if has_audio and audio is None:
+        # Audio we couldn't analyse may be speech over a still frame
+        return None
+
+    def dead(window) -> bool:
+        if window.motion >= static_motion or window.cut or window.faces:
+            return False
+        if not has_audio:
+            return True
+        return audio.silent_between(window.start, window.end) >= 0.9 * (window.end - window.start)
+
+    alive = [i for i, window in enumerate(windows) if not dead(window)]
+    if not alive:
+        logger.info("Whole video is dead air; leaving it untrimmed")
+        return None
+
+    start = windows[alive[0]].start
+    end = windows[alive[-1]].end
+    if start < min_seconds:
+        start = 0.0
+    if duration - end < min_seconds:
+        end = duration
+    if start == 0.0 and end == duration:
+        return None
+    logger.info(f"Dead air: keeping {start:.2f}s-{end:.2f}s of {duration:.2f}s")
+    return TrimPlan(start, end, duration)
+
+
+def align_to_keyframes(plan: TrimPlan, keyframe_pts: Sequence[float], min_seconds: float = 1.0) -> Optional[TrimPlan]:
+    """
+    Widen the kept span outward to keyframes so it can be stream-copied
+
+    The start moves back to the keyframe at or before it and the end forward
+    to the keyframe at or after it (or the end of the video). Returns None when
+    what's left to trim is under min_seconds.
+    """
+    keyframes = sorted(keyframe_pts)
+    i = bisect.bisect_right(keyframes, plan.start + 1e-6) - 1
+    j = bisect.bisect_left(keyframes, plan.end - 1e-6)
+    start = keyframes[i] if i >= 0 else 0.0
+    end = keyframes[j] if j < len(keyframes) else plan.source_duration
+    if start + (plan.source_duration - end) < min_seconds:
+        return None
+    return replace(plan, start=start, end=end)
+
+
+def apply_trim(input_video: str, output_video: str, plan: TrimPlan,
+               keyframes: Optional[Sequence[Tuple[float, float]]] = None, temp_dir: Optional[str] = None) -> bool:
+    """
+    Write the kept span of input_video to output_video
+
+    With (pts, dts) keyframes, and the plan aligned to them, the span is
+    stream-copied through the concat demuxer (see effect_engine.copy_entry).
+    Without them the span is cut exactly and re-encoded. Returns False on failure.
+    """
+    from .effect_engine import copy_entry
+
+    try:
+        if keyframes:
+            with tempfile.TemporaryDirectory(prefix="nano_trim_", dir=temp_dir) as work_dir:
+                list_path = Path(work_dir) / "trim.txt"
+                list_path.write_text(copy_entry(input_video, plan.start, plan.end, dict(keyframes),
+                                                plan.source_duration))
+                run_ffmpeg([
+                    'ffmpeg', '-v', 'error',
+                    '-f', 'concat', '-safe', '0', '-i', str(list_path),
+                    '-map', '0', '-c', 'copy',
+                    '-y', output_video
+                ])
+        else:
+            logger.info("No keyframe times; re-encoding the trimmed span")
+            run_ffmpeg([
+                'ffmpeg', '-v', 'error',
+                '-ss', str(plan.start), '-i', input_video, '-t', str(plan.duration),
+                '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '18', '-pix_fmt', 'yuv420p', '-c:a', 'aac',
+                '-y', output_video
+            ])
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Trimming {input_video} failed: {e.stderr}")
+        return False
+
+    logger.info(f"Trimmed {plan.source_duration - plan.duration:.2f}s of dead air from {input_video}")
+    return True
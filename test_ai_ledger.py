@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Test the AI call ledger and its per-batch summary"""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+from src.video.ai_ledger import LedgerClient, ledger_job, read_ledger, summarize
+from src.video.replay_client import RecordReplayClient
+
+
+class UsageClient:
+    async def create_completion(self, messages, model, **kwargs):
+        return {"choices": [{"message": {"content": "{}"}}],
+                "usage": {"prompt_tokens": 1200, "completion_tokens": 80}}
+
+
+def test_calls_are_recorded_and_summarized():
+    """Every call lands in the ledger with payload, tokens and cache hits; summaries total per batch"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger_path = str(Path(tmp) / "ledger.jsonl")
+        inner = RecordReplayClient(str(Path(tmp) / "corpus"), mode="auto", inner=UsageClient())
+        client = LedgerClient(inner, ledger_path, batch_id="nightly")
+        messages = [{"role": "user", "content": [
+            {"type": "text", "text": "describe"},
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64," + "A" * 1000}}
+        ]}]
+
+        async def run():
+            with ledger_job("clip.mp4", duration=30.0):
+                await client.create_completion(messages=messages, model="gemini-1.5-flash")
+                await client.create_completion(messages=messages, model="gemini-1.5-flash")
+
+        asyncio.run(run())
+        records = read_ledger(ledger_path)
+
+        assert [r["cache_hit"] for r in records] == [False, True]
+        assert records[0]["images"] == 1 and records[0]["payload_bytes"] == 8 + 23 + 1000
+        assert records[0]["prompt_tokens"] == 1200 and records[0]["video"] == "clip.mp4"
+        assert not {"ttfb_seconds", "retries"} & records[0].keys()
+
+        summary = summarize(records)["nightly"]
+        assert summary["calls"] == 2 and summary["cache_hits"] == 1
+        assert summary["images"] == 2 and summary["video_minutes"] == 0.5
+        assert summary["images_per_minute"] == 4.0
+        assert summary["latency_seconds"]["p50"] is not None
+
+    print("✅ AI ledger test passed")
+
+
+if __name__ == "__main__":
+    test_calls_are_recorded_and_summarized()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Test streaming audio features and reading them in the same decode as the sampled frames"""
+
+import subprocess
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from src.video.audio_features import AudioFeatureExtractor, AudioFeatures
+from src.video.edit_list import Edit, EditList
+from src.video.frame_processor import FrameProcessor
+from src.video.probe import VideoProbe
+
+
+def tone_bursts(bursts, duration, rate=16000):
+    t = np.arange(int(duration * rate)) / rate
+    signal = np.zeros_like(t, dtype=np.float32)
+    for start, end in bursts:
+        on = (t >= start) & (t < end)
+        signal[on] = 0.5 * np.sin(2 * np.pi * 440 * t[on])
+    return signal
+
+
+def test_onsets_and_silences_from_uneven_blocks():
+    """Features don't depend on how the PCM was split into blocks"""
+    signal = tone_bursts([(1.0, 2.0), (3.5, 4.0)], 6.0)
+    extractor = AudioFeatureExtractor()
+    for i in range(0, len(signal), 3001):
+        extractor.feed(signal[i:i + 3001])
+    features = extractor.finish()
+
+    assert features.onsets == [1.0, 3.5]
+    assert features.silences == [(0.0, 1.0), (2.0, 3.5), (4.0, 6.0)]
+    assert len(features.rms) == 600
+    assert AudioFeatures.from_dict(features.to_dict()).onsets == features.onsets
+    print("✅ Audio feature test passed")
+
+
+def test_edits_snap_to_onsets():
+    """Boundaries within reach move onto an onset; the rest stay put"""
+    features = AudioFeatures(onsets=[1.0, 3.5])
+    edits = EditList([Edit(0.9, 2.9, "text_overlay", text="Hi"), Edit(5.0, 6.0, "effect_enhancement")])
+    snapped = edits.snapped(lambda t: features.snap(t, 0.25))
+    assert [(e.start, e.end) for e in snapped] == [(1.0, 2.9), (5.0, 6.0)]
+    print("✅ Onset snapping test passed")
+
+
+def test_frames_and_audio_in_one_decode():
+    """One ffmpeg run yields the sampled frames and feeds the audio extractor"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = str(Path(tmp) / "speech.mp4")
+        subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x90:rate=10:duration=4',
+                        '-f', 'lavfi', '-i', "aevalsrc='if(between(t,2,3),0.5*sin(880*PI*t),0)':s=48000:d=4",
+                        '-c:v', 'libx264', '-c:a', 'aac', '-shortest', '-y', source], check=True)
+        probe = VideoProbe(duration=4.0, width=160, height=90, fps=10.0, video_codec="h264", has_audio=True)
+
+        extractor = AudioFeatureExtractor()
+        timestamps = [t for t, _ in FrameProcessor().iter_frames(source, width=80, height=46, pix_fmt="gray",
+                                                                 fps=2, probe=probe, audio=extractor)]
+        features = extractor.finish()
+
+    assert timestamps == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5]
+    assert len(features.onsets) == 1 and abs(features.onsets[0] - 2.0) < 0.05
+    assert features.silent_between(0.0, 2.0) > 1.5
+    print("✅ Single-pass frames and audio test passed")
+
+
+if __name__ == "__main__":
+    test_onsets_and_silences_from_uneven_blocks()
+    test_edits_snap_to_onsets()
+    test_frames_and_audio_in_one_decode()
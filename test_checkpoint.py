@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Test job checkpoints: a rerun resumes its own phases, and only under the same settings"""
+
+import asyncio
+import subprocess
+import tempfile
+from pathlib import Path
+
+from main import NanoBananaEditor, VideoProcessingConfig
+from test_packaging import top_level_boxes
+
+ANALYSIS = {"edit_list": [{"start": 1.0, "end": 2.0, "kind": "effect_enhancement"}]}
+
+
+def test_changed_settings_render_again():
+    """The same input and output under other settings get a fresh render, not the checkpointed one"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = str(Path(tmp) / "in.mp4")
+        subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x120:rate=10:duration=3',
+                        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-y', source], check=True)
+        output = str(Path(tmp) / "out.mp4")
+        editor = NanoBananaEditor(VideoProcessingConfig(ai_replay_dir=tmp, checkpoint_dir=str(Path(tmp) / "ckpt")))
+
+        async def render():
+            checkpoint = editor.open_checkpoint(source, output)
+            resumed = checkpoint.has("render")
+            await editor.run_render_phase(source, output, ANALYSIS, checkpoint)
+            return resumed
+
+        assert not asyncio.run(render())
+        assert asyncio.run(render())
+        assert "moof" not in top_level_boxes(output)
+
+        editor.config.packaging = "fragmented"
+        assert not asyncio.run(render())
+        assert "moof" in top_level_boxes(output)
+    print("✅ Checkpoint settings test passed")
+
+
+if __name__ == "__main__":
+    test_changed_settings_render_again()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Test that contact-sheet cell references map back to exact frame timestamps"""
+
+from src.video.contact_sheet import ContactSheet, ContactSheetCell, resolve_cell_references
+
+
+def make_sheets():
+    timestamps = [0.5 * (i + 1) for i in range(11)]
+    cells = [ContactSheetCell(cell=i + 1, timestamp=t, frame_path=f"frame_{i}.jpg") for i, t in enumerate(timestamps)]
+    return [
+        ContactSheet(image_path="sheet_0.jpg", rows=3, cols=3, cells=cells[:9]),
+        ContactSheet(image_path="sheet_1.jpg", rows=3, cols=3, cells=cells[9:]),
+    ]
+
+
+def test_resolve_cell_references():
+    """Global cell numbers, '#n' labels and per-sheet pairs all resolve to the frame timestamp"""
+    edits = [
+        {"cell": 3, "timestamp": 99.0},
+        {"cell": "#10"},
+        {"sheet": 2, "cell": 2},
+        {"cell": 42, "timestamp": 7.0},
+    ]
+    resolve_cell_references(edits, make_sheets())
+
+    assert edits[0]["timestamp"] == 1.5
+    assert edits[1]["timestamp"] == 5.0
+    assert edits[2]["timestamp"] == 5.5
+    assert edits[3]["timestamp"] == 7.0  # unknown cell keeps the model's timestamp
+    print("✅ Contact sheet cells resolve to exact timestamps")
+
+
+if __name__ == "__main__":
+    test_resolve_cell_references()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Test the edit decision list: clamping, coalescing and interval queries"""
+
+import random
+
+from src.video.edit_list import Edit, EditList
+from src.video.editor import VideoEditor
+
+
+def test_edits_are_clamped_and_coalesced():
+    """Same-kind edits that touch merge; edits past the probed duration are trimmed or dropped"""
+    edits = EditList([
+        Edit(4.0, 6.0, "effect_enhancement"),
+        Edit(1.0, 3.0, "effect_enhancement"),
+        Edit(3.0, 4.5, "effect_enhancement"),
+        Edit(2.0, 4.0, "text_overlay", text="Hi", position="top"),
+        Edit(3.0, 5.0, "text_overlay", text="Bye", position="top"),
+        Edit(9.0, 12.0, "scene_transition"),
+        Edit(11.0, 13.0, "scene_transition"),
+    ], duration=10.0)
+
+    assert [(e.start, e.end, e.kind) for e in edits] == [
+        (1.0, 6.0, "effect_enhancement"),
+        (2.0, 4.0, "text_overlay"),
+        (3.0, 5.0, "text_overlay"),
+        (9.0, 10.0, "scene_transition"),
+    ]
+
+    filters = VideoEditor().build_filters(edits)
+    assert len(filters) == 4
+    assert sum(f.startswith("eq=") for f in filters) == 1
+
+    print("✅ Edit coalescing test passed")
+
+
+def test_active_matches_a_linear_scan():
+    """Interval-index queries return exactly the overlapping edits"""
+    rng = random.Random(7)
+    edits = []
+    for i in range(300):
+        start = rng.uniform(0, 100)
+        edits.append(Edit(start, start + rng.uniform(0.1, 20), f"kind{i}"))
+    edl = EditList(edits)
+
+    for _ in range(200):
+        t0 = rng.uniform(-5, 105)
+        t1 = t0 + rng.uniform(0, 10)
+        expected = [e for e in edl.edits if e.start < t1 and e.end > t0]
+        assert edl.active(t0, t1) == expected
+
+    print("✅ Interval query test passed")
+
+
+def test_reads_older_analysis_shapes():
+    """Heuristic results nest frames_to_edit; text_overlay segments only mirror the suggestions"""
+    analysis = {"analysis": {
+        "frames_to_edit": [{"start": 1, "end": 2, "type": "text_overlay"}, {"start": 5, "end": 7, "type": "scene_transition"}],
+        "text_overlay_suggestions": [{"timestamp": 1, "text": "Key moment", "position": "bottom"}]
+    }}
+    edl = EditList.from_analysis(analysis)
+    assert [(e.kind, e.text) for e in edl] == [("text_overlay", "Key moment"), ("scene_transition", None)]
+    assert EditList.from_dicts(edl.to_dicts()).edits == edl.edits
+
+    # Without suggestions, text_overlay segments are the only record of those edits
+    segments_only = {"analysis": {"frames_to_edit": [{"start": 1, "end": 3, "type": "text_overlay"},
+                                                     {"start": 5, "end": 7, "type": "effect_enhancement"}]}}
+    edl = EditList.from_analysis(segments_only)
+    assert [(e.start, e.end, e.kind, e.text) for e in edl] == [(1, 3, "text_overlay", None),
+                                                               (5, 7, "effect_enhancement", None)]
+
+    print("✅ Legacy analysis test passed")
+
+
+if __name__ == "__main__":
+    test_edits_are_clamped_and_coalesced()
+    test_active_matches_a_linear_scan()
+    test_reads_older_analysis_shapes()
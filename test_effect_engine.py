@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test the range-limited effect engine: keyframe planning, batching and stream-copied gaps"""
+
+import subprocess
+import tempfile
+from pathlib import Path
+
+from src.video.effect_engine import EffectEngine, EffectRange, plan_segments, register_effect
+from src.video.frame_processor import FrameProcessor
+from src.video.probe import VideoProbe
+
+
+def test_ranges_widen_to_keyframes():
+    """Effect ranges grow to the surrounding keyframes and merge; the gaps are copied"""
+    segments = plan_segments([(2.2, 2.8), (2.9, 3.1), (7.5, 7.6)], [0, 2, 4, 6, 8], 9.0)
+    assert [(s.start, s.end, s.reencode) for s in segments] == [
+        (0.0, 2, False), (2, 4, True), (4, 6, False), (6, 8, True), (8, 9.0, False)
+    ]
+    assert [(s.start, s.end, s.reencode) for s in plan_segments([(1, 2)], [], 5.0)] == [(0.0, 5.0, True)]
+    print("✅ Segment planning test passed")
+
+
+def test_only_affected_frames_change():
+    """A registered batch effect lands on exactly its frames; copied frames stay bit-identical"""
+    calls = []
+
+    @register_effect("invert_test")
+    def invert(frames):
+        calls.append(len(frames))
+        return 255 - frames
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source, output = str(Path(tmp) / "in.mp4"), str(Path(tmp) / "out.mp4")
+        # No B-frames, so keyframe decode and presentation times match
+        subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x120:rate=10:duration=4',
+                        '-c:v', 'libx264', '-bf', '0', '-g', '10', '-sc_threshold', '0', '-pix_fmt', 'yuv420p',
+                        '-y', source], check=True)
+        probe = VideoProbe(duration=4.0, width=160, height=120, fps=10.0, video_codec="h264", pix_fmt="yuv420p",
+                           profile="High")
+
+        stats = EffectEngine(batch_size=4).apply(source, output, [EffectRange(1.2, 1.5, "invert_test")],
+                                                 probe=probe, keyframes=[(t, t) for t in (0.0, 1.0, 2.0, 3.0)])
+        assert stats["segments"] == 3 and stats["reencoded_seconds"] == 1.0
+        assert calls == [2, 1]  # frames 12-14, split across batches 8-11 and 12-15
+
+        processor = FrameProcessor()
+        before = [f.astype(int) for _, f in processor.iter_frames(source, width=160, height=120, probe=probe)]
+        after = [f.astype(int) for _, f in processor.iter_frames(output, width=160, height=120, probe=probe)]
+        assert len(before) == len(after) == 40
+        diffs = [abs(a - b).mean() for a, b in zip(before, after)]
+        assert all(d == 0 for d in diffs[:10] + diffs[20:])
+        assert all(d > 50 for d in diffs[12:15])
+        assert all(d < 5 for d in diffs[10:12] + diffs[15:20])
+
+        # Copied High 4:4:4 pieces can't share a file with yuv420p re-encodes
+        high444 = VideoProbe(duration=4.0, width=160, height=120, fps=10.0, video_codec="h264", pix_fmt="yuv444p",
+                             profile="High 4:4:4 Predictive")
+        stats = EffectEngine(batch_size=4).apply(source, output, [EffectRange(1.2, 1.5, "invert_test")],
+                                                 probe=high444, keyframes=[(t, t) for t in (0.0, 1.0, 2.0, 3.0)])
+        assert stats["segments"] == 1 and stats["reencoded_seconds"] == 4.0
+
+    print("✅ Range-limited effect test passed")
+
+
+if __name__ == "__main__":
+    test_ranges_widen_to_keyframes()
+    test_only_affected_frames_change()
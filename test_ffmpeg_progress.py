@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Test ffmpeg progress parsing, deadlines and stall detection against a fake ffmpeg"""
+
+import stat
+import tempfile
+import time
+from pathlib import Path
+
+from src.video.ffmpeg import FFmpegAborted, FFmpegLimits, ffmpeg_limits, run_ffmpeg
+
+# Reports two progress blocks like `ffmpeg -progress pipe:1`, then optionally hangs
+FAKE_FFMPEG = """#!/bin/sh
+printf 'frame=10\\nfps=25.0\\nout_time_us=400000\\nspeed=0.8x\\nprogress=continue\\n'
+printf 'frame=20\\nfps=25.0\\nout_time_us=800000\\nspeed=N/A\\nprogress={progress_end}\\n'
+{hang}
+exit 0
+"""
+
+
+def fake_ffmpeg(directory: str, progress_end: str = "end", hang: bool = False) -> str:
+    path = Path(directory) / "ffmpeg"
+    path.write_text(FAKE_FFMPEG.format(progress_end=progress_end, hang="exec sleep 30" if hang else ""))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def test_progress_is_parsed_as_it_arrives():
+    """Each -progress block reaches the callback with frame, fps, speed and out_time"""
+    with tempfile.TemporaryDirectory() as tmp:
+        seen = []
+        with ffmpeg_limits(FFmpegLimits(on_progress=seen.append)):
+            result = run_ffmpeg([fake_ffmpeg(tmp), '-i', 'in.mp4', 'out.mp4'])
+
+        assert result.returncode == 0
+        assert [p.frame for p in seen] == [10, 20]
+        assert seen[0].speed == 0.8 and seen[1].speed is None
+        assert abs(seen[1].out_time - 0.8) < 1e-9
+        assert seen[1].done
+
+    print("✅ ffmpeg progress parsing test passed")
+
+
+def test_stalled_and_late_runs_are_killed():
+    """A run that stops reporting progress, or outlives the job deadline, is terminated"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ffmpeg = fake_ffmpeg(tmp, progress_end="continue", hang=True)
+        for limits, reason in ((FFmpegLimits(stall_seconds=0.5), "no progress"),
+                               (FFmpegLimits(deadline=time.monotonic() + 0.3, stall_seconds=None), "deadline")):
+            start = time.monotonic()
+            try:
+                with ffmpeg_limits(limits):
+                    run_ffmpeg([ffmpeg, '-i', 'in.mp4', 'out.mp4'])
+                assert False, "hung ffmpeg was not killed"
+            except FFmpegAborted as e:
+                assert reason in e.reason
+                assert e.progress.frame == 20
+            assert time.monotonic() - start < 5
+
+    print("✅ ffmpeg stall detection test passed")
+
+
+if __name__ == "__main__":
+    test_progress_is_parsed_as_it_arrives()
+    test_stalled_and_late_runs_are_killed()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Test the shared two-tier frame cache"""
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from src.video.frame_cache import FrameCache
+from src.video.instrumentation import collect
+
+
+def test_lru_tiers_evict_least_recent():
+    """Both tiers stay inside their budgets, dropping what was used longest ago"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FrameCache(memory_bytes=25, disk_dir=tmp, disk_bytes=35)
+        cache.put("a", b"a" * 10)
+        cache.put("b", b"b" * 10)
+        assert cache.get("a") == b"a" * 10  # a is now more recent than b
+        cache.put("c", b"c" * 10)
+
+        assert list(cache._memory) == ["a", "c"]
+        assert len(list(Path(tmp).glob("*.frame"))) == 3
+        cache.put("d", b"d" * 10)
+        assert len(list(Path(tmp).glob("*.frame"))) == 3
+
+        # A restarted process serves b from disk and promotes it to memory
+        reopened = FrameCache(memory_bytes=25, disk_dir=tmp, disk_bytes=35)
+        with collect() as metrics:
+            assert reopened.get("b") is None  # evicted: least recently used on disk
+            assert reopened.get("a") == b"a" * 10
+            assert reopened.get("a") == b"a" * 10
+        assert metrics.counters == {"frame_cache_disk_hits": 1, "frame_cache_memory_hits": 1}
+    print("✅ Frame cache LRU test passed")
+
+
+def test_frames_are_decoded_once_per_content():
+    """A second request for the same frame, even of a renamed copy, skips ffmpeg"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = str(Path(tmp) / "in.mp4")
+        subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=320x240:rate=10:duration=2',
+                        '-pix_fmt', 'yuv420p', '-y', source], check=True)
+        copy = str(Path(tmp) / "upload.mp4")
+        shutil.copy(source, copy)
+
+        cache = FrameCache()
+        with collect() as metrics:
+            first = str(Path(tmp) / "first.jpg")
+            assert cache.frame_to_file(source, 1.0, first, max_width=160)
+            assert cache.frame_to_file(copy, 1.0, str(Path(tmp) / "second.jpg"), max_width=160)
+            assert cache.frame(source, 1.0, fmt="png") is not None
+        assert metrics.counters["ffmpeg_invocations"] == metrics.counters["frame_cache_misses"] == 2
+        assert metrics.counters["frame_cache_memory_hits"] == 1
+        assert Path(first).read_bytes()[:2] == b"\xff\xd8"
+    print("✅ Frame cache decode test passed")
+
+
+if __name__ == "__main__":
+    test_lru_tiers_evict_least_recent()
+    test_frames_are_decoded_once_per_content()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Test streaming decoded frames from a rawvideo pipe into a reused ring of arrays"""
+
+from src.video.frame_processor import FrameProcessor
+
+
+def test_frames_stream_into_a_reused_ring():
+    """Frames arrive downscaled, in the requested format and time range, in recycled buffers"""
+    processor = FrameProcessor()
+    buffers = set()
+    timestamps = []
+    for timestamp, frame in processor.iter_frames("test_video.mp4", start=1.0, end=2.0, width=64, height=36,
+                                                  pix_fmt="gray", fps=10, ring_size=3):
+        assert frame.shape == (36, 64)
+        buffers.add(id(frame))
+        timestamps.append(round(timestamp, 3))
+
+    assert timestamps == [round(1.0 + i / 10, 3) for i in range(10)]
+    assert len(buffers) == 3
+
+    # Stopping early shuts the decoder down instead of draining the video
+    frames = processor.iter_frames("test_video.mp4", width=32, height=18, fps=5)
+    _, first = next(frames)
+    assert first.shape == (18, 32, 3)
+    frames.close()
+
+    print("✅ Frame streaming test passed")
+
+
+if __name__ == "__main__":
+    test_frames_stream_into_a_reused_ring()
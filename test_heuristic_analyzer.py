@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Test the local pre-analysis decision logic without decoding any video"""
+
+from src.video.heuristic_analyzer import HeuristicAnalyzer, PreAnalysis, WindowScores
+
+
+def make_windows(motions, faces=()):
+    return [
+        WindowScores(start=float(i), end=float(i + 1), motion=m, sharpness=500.0,
+                     faces=1 if i in faces else 0, brightness=0.5)
+        for i, m in enumerate(motions)
+    ]
+
+
+def test_static_video_skips_ai():
+    """A static, faceless video should not be sent to Gemini"""
+    analyzer = HeuristicAnalyzer()
+    pre_analysis = analyzer._decide(make_windows([0.001] * 10), 10.0)
+    assert not pre_analysis.needs_ai
+    assert pre_analysis.to_analysis()["frames_to_edit"] == []
+    print("✅ Static video skips AI")
+
+
+def test_interesting_intervals_are_merged():
+    """Adjacent interesting windows merge into one interval and attract the samples"""
+    analyzer = HeuristicAnalyzer()
+    pre_analysis = analyzer._decide(make_windows([0.0, 0.2, 0.2, 0.0, 0.0, 0.0, 0.0, 0.0], faces={6}), 8.0)
+    assert pre_analysis.needs_ai
+    assert pre_analysis.intervals == [(1.0, 3.0), (6.0, 7.0)]
+
+    timestamps = pre_analysis.sample_timestamps(6)
+    assert len(timestamps) == 6
+    assert all(1.0 <= t <= 3.0 or 6.0 <= t <= 7.0 for t in timestamps)
+    print(f"✅ Intervals {pre_analysis.intervals} -> samples {[round(t, 2) for t in timestamps]}")
+
+
+def test_fallback_analysis_shape():
+    """The heuristic fallback has the same keys the editor consumes from Gemini"""
+    pre_analysis = PreAnalysis(duration=4.0, windows=make_windows([0.2, 0.0, 0.0, 0.0]),
+                               intervals=[(0.0, 1.0)])
+    analysis = pre_analysis.to_analysis()
+    for key in ["frames_to_edit", "enhancement_types", "text_overlay_suggestions", "effect_recommendations"]:
+        assert key in analysis
+    assert analysis["frames_to_edit"] == [{"start": 0.0, "end": 1.0, "type": "effect_enhancement"}]
+    print("✅ Fallback analysis has the expected shape")
+
+
+if __name__ == "__main__":
+    test_static_video_skips_ai()
+    test_interesting_intervals_are_merged()
+    test_fallback_analysis_shape()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Test incremental re-rendering: only segments whose edits changed are encoded again"""
+
+import asyncio
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+
+from main import NanoBananaEditor, VideoProcessingConfig
+from src.video.edit_list import Edit, EditList
+from src.video.editor import VideoEditor
+from src.video.frame_processor import FrameProcessor
+from src.video.incremental import IncrementalRenderer, plan_bounds
+from src.video.probe import VideoProbe
+
+
+def test_bounds_follow_keyframes():
+    """Segments start on keyframes, are at least the minimum length, and don't leave a sliver at the end"""
+    assert plan_bounds([0, 1, 2, 3, 4, 5], 5.4, 2.0) == [(0.0, 2), (2, 4), (4, 5.4)]
+    assert plan_bounds([0, 1, 2, 3, 4], 4.5, 2.0) == [(0.0, 2), (2, 4.5)]
+    assert plan_bounds([], 5.0, 2.0) == [(0.0, 2.0), (2.0, 5.0)]
+    print("✅ Segment bounds test passed")
+
+
+def test_changed_edit_reencodes_one_segment():
+    """Moving one edit re-encodes its segment; the others are reused byte for byte"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = str(Path(tmp) / "in.mp4")
+        subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x120:rate=10:duration=4',
+                        '-c:v', 'libx264', '-bf', '0', '-g', '10', '-sc_threshold', '0', '-pix_fmt', 'yuv420p',
+                        '-y', source], check=True)
+        probe = VideoProbe(duration=4.0, width=160, height=120, fps=10.0, video_codec="h264")
+        keyframes = [(float(t), float(t)) for t in range(4)]
+        state = Path(tmp) / "state"
+        renderer = IncrementalRenderer(VideoEditor(), min_segment_seconds=1.0)
+
+        def render(edits, name):
+            output = str(Path(tmp) / name)
+            stats = renderer.render(source, output, EditList(edits, 4.0), str(state), probe=probe, keyframes=keyframes)
+            return stats, output
+
+        first, _ = render([Edit(0.2, 0.8, "effect_enhancement"), Edit(2.2, 2.6, "effect_enhancement")], "a.mp4")
+        assert (first["segments"], first["reused"]) == (4, 0)
+
+        second, output = render([Edit(0.2, 0.8, "effect_enhancement"), Edit(2.4, 2.9, "effect_enhancement")], "b.mp4")
+        assert (second["reused"], second["encoded_seconds"]) == (3, 1.0)
+
+        segment_map = json.loads((state / "segments.json").read_text())
+        assert segment_map["edit_list"][1] == {"start": 2.4, "end": 2.9, "kind": "effect_enhancement"}
+        assert len(list(state.glob("seg_*.mp4"))) == 4
+
+        frames = list(FrameProcessor().iter_frames(output, width=160, height=120, probe=probe))
+        assert len(frames) == 40
+
+    print("✅ Incremental render test passed")
+
+
+def test_tweaked_edit_list_rerenders_from_checkpoint():
+    """Editing the --edits file re-renders only what changed, reusing the checkpointed analysis"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = str(Path(tmp) / "in.mp4")
+        subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x120:rate=10:duration=4',
+                        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-y', source], check=True)
+        output = str(Path(tmp) / "out.mp4")
+        edits_path = Path(tmp) / "edits.json"
+        editor = NanoBananaEditor(VideoProcessingConfig(ai_replay_dir=tmp, checkpoint_dir=str(Path(tmp) / "ckpt"),
+                                                        incremental_render=True, edits_path=str(edits_path)))
+        analysis = {"edit_list": [{"start": 0.5, "end": 1.0, "kind": "effect_enhancement"},
+                                  {"start": 2.5, "end": 3.0, "kind": "effect_enhancement"}]}
+        checkpoint = editor.open_checkpoint(source, output)
+        editor.checkpoints.save_phase(checkpoint, "probe",
+                                      VideoProbe(duration=4.0, width=160, height=120, fps=10.0).to_dict())
+        editor.checkpoints.save_phase(checkpoint, "analysis", analysis)
+        editor.checkpoints.save_phase(checkpoint, "extraction", {"frame_dirs": []})
+
+        def run():
+            result = asyncio.run(editor.process_video(source, output))
+            assert result.success, result.error_message
+            return result.metrics["counters"].get("segments_reused")
+
+        assert run() == 0
+        edits = json.loads(edits_path.read_text())
+        assert [e["start"] for e in edits] == [0.5, 2.5]
+
+        edits[1].update(start=3.2, end=3.6)
+        edits_path.write_text(json.dumps(edits))
+        assert run() == 1
+        rendered = editor.open_checkpoint(source, output)
+        assert rendered.artifact("render")["edit_list"][1]["start"] == 3.2
+        assert rendered.artifact("analysis") == analysis
+        assert run() is None  # unchanged: the checkpointed render stands
+
+    print("✅ Tweaked edit list test passed")
+
+
+if __name__ == "__main__":
+    test_bounds_follow_keyframes()
+    test_changed_edit_reencodes_one_segment()
+    test_tweaked_edit_list_rerenders_from_checkpoint()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Test content fingerprints, the deduplicating input store and checkpoint sharing"""
+
+import os
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+from src.pipeline.checkpoint import CheckpointStore
+from src.pipeline.input_store import InputStore
+from src.video.fingerprint import SAMPLE_BYTES, SAMPLE_CHUNKS, fingerprint
+
+
+def write_video(path: Path, size: int, seed: int = 0) -> str:
+    path.write_bytes(random.Random(seed).randbytes(size))
+    return str(path)
+
+
+def test_fingerprint_follows_content_not_name():
+    """Renamed copies match; an unsampled change only shows in the full hash"""
+    with tempfile.TemporaryDirectory() as tmp:
+        size = SAMPLE_BYTES * (SAMPLE_CHUNKS + 2) * 4
+        original = write_video(Path(tmp) / "a.mp4", size)
+        copy = str(Path(tmp) / "b.mp4")
+        shutil.copy(original, copy)
+        assert fingerprint(original) == fingerprint(copy)
+        assert fingerprint(original).startswith("s1-")
+        assert fingerprint(original, full=True) == fingerprint(copy, full=True) != fingerprint(original)
+
+        # A byte between the sampled chunks
+        data = bytearray(Path(copy).read_bytes())
+        data[SAMPLE_BYTES + 10] ^= 0xFF
+        Path(copy).write_bytes(bytes(data))
+        os.utime(copy, ns=(1, 1))
+        assert fingerprint(original) == fingerprint(copy)
+        assert fingerprint(original, full=True) != fingerprint(copy, full=True)
+    print("✅ Fingerprint test passed")
+
+
+def test_store_dedupes_identical_uploads():
+    """The same bytes under another name map to the stored file; a sampled collision does not"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = InputStore(str(Path(tmp) / "store"))
+        size = SAMPLE_BYTES * (SAMPLE_CHUNKS + 2) * 4
+        first = store.add(write_video(Path(tmp) / "upload_1.mp4", size))
+        spool = write_video(Path(tmp) / "upload_2.MP4", size)
+        second = store.add(spool, move=True)
+        assert not first.deduplicated and second.deduplicated
+        assert second.path == first.path and not Path(spool).exists()
+
+        data = bytearray(Path(first.path).read_bytes())
+        data[SAMPLE_BYTES + 10] ^= 0xFF
+        collision = Path(tmp) / "upload_3.mp4"
+        collision.write_bytes(bytes(data))
+        third = store.add(str(collision))
+        assert not third.deduplicated and third.path != first.path
+        assert third.fingerprint.startswith("f1-")
+        assert store.add(str(collision)).path == third.path
+    print("✅ Input store test passed")
+
+
+def test_jobs_on_the_same_content_share_phases():
+    """A second job on a copy of the input starts with the first job's phases, unless settings differ"""
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoints = CheckpointStore(str(Path(tmp) / "checkpoints"))
+        original = write_video(Path(tmp) / "a.mp4", 4096)
+        copy = str(Path(tmp) / "b.mp4")
+        shutil.copy(original, copy)
+        rendered = Path(tmp) / "out_a.mp4"
+        rendered.write_bytes(b"rendered")
+
+        first = checkpoints.open(original, str(rendered), variant="v1")
+        checkpoints.save_phase(first, "probe", {"duration": 4.0})
+        checkpoints.save_phase(first, "render", {"output_path": str(rendered), "size_bytes": 8})
+
+        second = checkpoints.open(copy, str(Path(tmp) / "out_b.mp4"), variant="v1")
+        assert second.key != first.key
+        assert second.artifact("render")["output_path"] == str(rendered)
+        assert not checkpoints.open(copy, str(Path(tmp) / "out_b.mp4"), variant="v2").phases
+        assert not checkpoints.open(copy, str(Path(tmp) / "out_b.mp4")).phases
+
+        # The first job rerun under v2 starts over, and only its v2 phases are shared from then on
+        reopened = checkpoints.open(original, str(rendered), variant="v2")
+        assert not reopened.phases
+        checkpoints.save_phase(reopened, "probe", {"duration": 4.0})
+        shared = checkpoints.open(copy, str(Path(tmp) / "out_c.mp4"), variant="v2")
+        assert list(shared.phases) == ["probe"]
+        assert checkpoints.open(original, str(rendered), variant="v1").has("render")
+    print("✅ Shared checkpoint test passed")
+
+
+if __name__ == "__main__":
+    test_fingerprint_follows_content_not_name()
+    test_store_dedupes_identical_uploads()
+    test_jobs_on_the_same_content_share_phases()
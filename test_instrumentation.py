@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Test per-job timing spans, counters and their Prometheus export"""
+
+import asyncio
+
+from src.video.instrumentation import collect, count, span, span_totals, to_prometheus
+
+
+def test_spans_nest_across_tasks_and_threads():
+    """Spans opened in tasks and worker threads nest under the span that spawned them"""
+    def blocking_step():
+        with span("encode_for_ai"):
+            count("ai_payload_bytes", 1000)
+
+    async def job():
+        with collect() as metrics:
+            with span("analysis"):
+                await asyncio.gather(asyncio.to_thread(blocking_step), asyncio.to_thread(blocking_step))
+                with span("ai_call"):
+                    count("ai_calls")
+            with span("render"):
+                pass
+        return metrics.to_dict()
+
+    metrics = asyncio.run(job())
+
+    assert [s["name"] for s in metrics["spans"]] == ["analysis", "render"]
+    children = [s["name"] for s in metrics["spans"][0]["children"]]
+    assert sorted(children) == ["ai_call", "encode_for_ai", "encode_for_ai"]
+    assert metrics["counters"] == {"ai_calls": 1, "ai_payload_bytes": 2000}
+
+    totals = span_totals(metrics)
+    assert totals["analysis/encode_for_ai"][1] == 2
+
+    # Outside collect() instrumentation is a no-op
+    with span("orphan") as orphan:
+        count("ai_calls")
+    assert orphan is None
+
+    print("✅ Span nesting test passed")
+
+
+def test_prometheus_export():
+    """Span paths become labels; counters become _total series"""
+    metrics = {
+        "spans": [{"name": "analysis", "seconds": 1.5, "children": [{"name": "ai_call", "seconds": 1.25}]}],
+        "counters": {"ffmpeg_invocations": 3}
+    }
+    text = to_prometheus(metrics, labels={"job": 'clip "a"'})
+
+    assert 'nano_banana_span_seconds{job="clip \\"a\\"",span="analysis/ai_call"} 1.250000' in text
+    assert 'nano_banana_ffmpeg_invocations_total{job="clip \\"a\\""} 3' in text
+    assert "# TYPE nano_banana_ffmpeg_invocations_total counter" in text
+
+    print("✅ Prometheus export test passed")
+
+
+if __name__ == "__main__":
+    test_spans_nest_across_tasks_and_threads()
+    test_prometheus_export()
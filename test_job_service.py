@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Test the job service and distributed workers: HTTP submission, leases and locality"""
+
+import asyncio
+import json
+import multiprocessing
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+
+from main import ProcessingResult
+from src.pipeline.job_queue import JobQueue
+from src.pipeline.service import JobService
+from src.pipeline.worker import JobWorker, locality_check, run_worker_pool
+
+
+class FakeEditor:
+    """Walks through the phases without touching ffmpeg or the AI client"""
+
+    def __init__(self):
+        self.config = SimpleNamespace(output_format="mp4")
+        self.processed = []
+
+    async def process_video(self, input_path, output_path=None, progress_callback=None):
+        for phase, progress in (("probe", 0.0), ("analysis", 0.05), ("render", 0.6), ("done", 1.0)):
+            progress_callback(phase, progress, None)
+            await asyncio.sleep(0.01)
+        self.processed.append(input_path)
+        return ProcessingResult(success=True, input_path=input_path, output_path=output_path)
+
+
+def request(url, payload=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, method="POST" if data else "GET")
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_leases_expire_and_requeue():
+    """Two workers never lease the same job; a job whose lease lapses goes back to the queue"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(str(Path(tmp) / "jobs.db"), max_attempts=2)
+        first = queue.submit("a.mp4")
+        queue.submit("b.mp4")
+
+        leased = [queue.lease("w1", 0.05), queue.lease("w2", 60), queue.lease("w3", 60)]
+        assert leased[0]["id"] == first
+        assert leased[2] is None
+
+        assert queue.update_progress(leased[1]["id"], "w2", "probe", 0.0)
+        assert not queue.update_progress(first, "w2", "probe", 0.0)
+
+        time.sleep(0.1)
+        assert not queue.heartbeat(first, "w2", 60)
+        assert queue.requeue_expired() == 1
+        assert not queue.update_progress(first, "w1", "render", 0.6)
+        assert not queue.complete(first, {"success": True}, worker="w1")
+
+        # Second expiry hits max_attempts: the job is failed, not requeued again
+        assert queue.lease("w3", 0.01)["id"] == first
+        time.sleep(0.05)
+        assert queue.requeue_expired() == 0
+        assert queue.get(first)["status"] == "failed"
+
+    print("✅ Job lease expiry test passed")
+
+
+def test_workers_prefer_local_inputs():
+    """A worker takes a newer job it has locally before an older remote one"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(str(Path(tmp) / "jobs.db"))
+        remote = queue.submit("/remote/a.mp4", input_host="node-b")
+        local = queue.submit(str(Path(tmp) / "b.mp4"), input_host="node-b")
+        is_local = locality_check(hostname="node-a", local_roots=[tmp])
+
+        assert queue.lease("node-a", 60, is_local, locality_wait=30)["id"] == local
+        assert queue.lease("node-a", 60, is_local, locality_wait=30) is None
+        assert queue.lease("node-a", 60, is_local, locality_wait=0)["id"] == remote
+
+    print("✅ Job locality test passed")
+
+
+def test_worker_stops_job_after_losing_lease():
+    """Progress is written off the loop; once an update is refused, the job stops and its result is never written"""
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(str(Path(tmp) / "jobs.db"))
+        job_id = queue.submit("clip.mp4", "out.mp4")
+        editor = FakeEditor()
+        phases = []
+
+        class LeaseTakenAway:
+            def __getattr__(self, name):
+                return getattr(queue, name)
+
+            def update_progress(self, job_id, worker, phase, progress):
+                assert threading.current_thread() is not threading.main_thread(), "progress written on the loop"
+                phases.append(phase)
+                if phase == "analysis":
+                    queue.fail(job_id, "Cancelled")
+                return queue.update_progress(job_id, worker, phase, progress)
+
+        worker = JobWorker(editor, LeaseTakenAway(), name="w1", poll_interval=0.05)
+        asyncio.run(run_worker_pool([worker], exit_when_idle=True, install_signal_handlers=False))
+
+        assert phases == ["probe", "analysis"] and editor.processed == []
+        job = queue.get(job_id)
+        assert job["status"] == "failed" and job["error"] == "Cancelled" and job["phase"] == "probe"
+
+    print("✅ Lost lease test passed")
+
+
+def run_worker_process(db_path, name):
+    store = JobQueue(db_path)
+    worker = JobWorker(FakeEditor(), store, name=name, poll_interval=0.05)
+    asyncio.run(run_worker_pool([worker], exit_when_idle=True, install_signal_handlers=False))
+
+
+def test_worker_processes_share_store():
+    """Several worker processes drain one store and each job runs exactly once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "jobs.db")
+        queue = JobQueue(db_path)
+        ids = [queue.submit(f"clip{i}.mp4", f"out{i}.mp4") for i in range(12)]
+
+        processes = [multiprocessing.Process(target=run_worker_process, args=(db_path, f"node{i}"))
+                     for i in range(3)]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join(timeout=30)
+            assert p.exitcode == 0
+
+        jobs = [queue.get(job_id) for job_id in ids]
+        assert all(job["status"] == "succeeded" and job["attempts"] == 1 for job in jobs)
+        assert len({job["worker"] for job in jobs}) > 1
+
+    print("✅ Multi-process worker test passed")
+
+
+def test_service_runs_submitted_jobs():
+    """A job POSTed to the API is processed by a warm worker and reported as succeeded"""
+    with tempfile.TemporaryDirectory() as tmp:
+        video = Path(tmp) / "clip.mp4"
+        video.write_bytes(b"video")
+        editor = FakeEditor()
+        service = JobService(editor, JobQueue(str(Path(tmp) / "jobs.db")), workers=2, output_dir=tmp,
+                             poll_interval=0.1)
+        server = service.start_http("127.0.0.1", 0)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_until_complete, args=(service.run_workers(),))
+        thread.start()
+        try:
+            status, body = request(f"{base}/jobs", {"input": str(video)})
+            assert status == 202
+            job_id = body["id"]
+
+            missing_status, _ = request(f"{base}/jobs", {"input": str(Path(tmp) / "missing.mp4")})
+            assert missing_status == 400
+
+            deadline = time.time() + 5
+            job = {}
+            while time.time() < deadline:
+                _, job = request(f"{base}/jobs/{job_id}")
+                if job["status"] == "succeeded":
+                    break
+                time.sleep(0.05)
+
+            assert job["status"] == "succeeded", job
+            assert job["phase"] == "done" and job["progress"] == 1
+            assert job["result"]["output_path"].endswith(f"enhanced_clip_{job_id}.mp4")
+            assert editor.processed == [str(video)]
+
+            _, queue_status = request(f"{base}/queue")
+            assert queue_status["depth"]["succeeded"] == 1
+            assert request(f"{base}/jobs/nope")[0] == 404
+        finally:
+            service.stop()
+            thread.join(timeout=5)
+            server.shutdown()
+            server.server_close()
+
+    print("✅ Job service test passed")
+
+
+if __name__ == "__main__":
+    test_leases_expire_and_requeue()
+    test_workers_prefer_local_inputs()
+    test_worker_stops_job_after_losing_lease()
+    test_worker_processes_share_store()
+    test_service_runs_submitted_jobs()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Test output packaging in the render pass: faststart MP4 and the HLS ladder"""
+
+import asyncio
+import shutil
+import struct
+import subprocess
+import tempfile
+from pathlib import Path
+
+from main import NanoBananaEditor, VideoProcessingConfig
+from src.video.edit_list import Edit, EditList
+from src.video.editor import VideoEditor
+from src.video.packaging import MASTER_PLAYLIST, Packaging
+from src.video.probe import VideoProbe
+
+
+def top_level_boxes(path: str):
+    data = Path(path).read_bytes()
+    boxes, offset = [], 0
+    while offset < len(data):
+        size, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        boxes.append(kind.decode())
+        if size == 1:
+            size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+        offset += size or len(data)
+    return boxes
+
+
+def test_ladder_rungs_fit_the_source():
+    packaging = Packaging("hls", hls_dir="/tmp/x")
+    assert [h for h, _ in packaging.rungs(1080)] == [1080, 720, 480]
+    assert [h for h, _ in packaging.rungs(720)] == [720, 480, 360]
+    assert [h for h, _ in packaging.rungs(241)] == [240]
+    assert Packaging().movflags("out.mkv") is None
+
+    # A vertical short keeps its full width on the top rung; a reframe's frame size wins over the source's
+    vertical = VideoProbe(duration=3.0, width=1080, height=1920, fps=30.0, video_codec="h264")
+    graph, _ = packaging.hls_outputs("[0:v]", vertical)
+    assert "[hls0]scale=1080:-2" in graph and "[hls2]scale=480:-2" in graph
+    reframed = Packaging("hls", hls_dir="/tmp/x", frame_size=(608, 1080))
+    graph, _ = reframed.hls_outputs("[0:v]", VideoProbe(duration=3.0, width=1920, height=1080, fps=30.0))
+    assert "[hls0]scale=480:-2" in graph and "[hls1]scale=360:-2" in graph
+    print("✅ Ladder rung test passed")
+
+
+def test_render_writes_faststart_mp4_and_hls_ladder():
+    """The moov index leads the file, and the same ffmpeg run writes every rendition"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = str(Path(tmp) / "in.mp4")
+        subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=640x480:rate=10:duration=3',
+                        '-f', 'lavfi', '-i', 'sine=f=440:duration=3', '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+                        '-c:a', 'aac', '-shortest', '-y', source], check=True)
+        assert top_level_boxes(source).index("moov") > top_level_boxes(source).index("mdat")
+
+        editor = VideoEditor()
+        edits = EditList([Edit(1.0, 2.0, "effect_enhancement")])
+        output = str(Path(tmp) / "out.mp4")
+        assert editor.create_enhanced_video(source, output, edits)
+        assert top_level_boxes(output).index("moov") < top_level_boxes(output).index("mdat")
+
+        hls_dir = Path(tmp) / "out_hls"
+        probe = VideoProbe(duration=3.0, width=640, height=480, fps=10.0, video_codec="h264", has_audio=True)
+        assert editor.create_enhanced_video(source, output, edits, packaging=Packaging("hls", hls_dir=str(hls_dir)),
+                                            probe=probe)
+        master = (hls_dir / MASTER_PLAYLIST).read_text()
+        assert "RESOLUTION=640x480" in master and "RESOLUTION=480x360" in master
+        assert sorted(p.name for p in hls_dir.iterdir()) == [MASTER_PLAYLIST, "v0", "v1"]
+        assert list((hls_dir / "v1").glob("seg_*.m4s"))
+    print("✅ Packaging render test passed")
+
+
+def test_failed_render_drops_the_partial_ladder():
+    """When the encode falls back to copying the source, no half-written ladder is kept or checkpointed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "in.mp4"
+        source.write_bytes(b"video")
+        output = str(Path(tmp) / "out.mp4")
+        editor = NanoBananaEditor(VideoProcessingConfig(ai_replay_dir=tmp, packaging="hls",
+                                                        checkpoint_dir=str(Path(tmp) / "ckpt")))
+
+        def failing_render(input_video, output_video, edits, pre_filters, packaging, probe):
+            (Path(packaging.hls_dir) / "v0").mkdir(parents=True)
+            (Path(packaging.hls_dir) / "v0" / "seg_000.m4s").write_bytes(b"partial")
+            shutil.copyfile(input_video, output_video)
+            return False
+
+        editor.video_editor.create_enhanced_video = failing_render
+        checkpoint = editor.open_checkpoint(str(source), output)
+        asyncio.run(editor.run_render_phase(str(source), output, {"edit_list": []}, checkpoint))
+        assert sorted(p.name for p in Path(tmp).iterdir()) == ["ckpt", "in.mp4", "out.mp4"]
+        assert checkpoint.artifact("render")["hls_dir"] is None
+    print("✅ Failed HLS render test passed")
+
+
+if __name__ == "__main__":
+    test_ladder_rungs_fit_the_source()
+    test_render_writes_faststart_mp4_and_hls_ladder()
+    test_failed_render_drops_the_partial_ladder()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Test the pre-forked editor: progress and results cross the fork, crashes stay in the child"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+from main import NanoBananaEditor, ProcessingResult
+from src.pipeline.prefork import PreforkEditor
+from src.video.ffmpeg import FFmpegProgress
+
+
+class ForkedFakeEditor:
+    config = SimpleNamespace(ai_replay_dir="corpus", pre_analysis=False)
+    make_result = NanoBananaEditor.make_result
+
+    async def process_video(self, input_path, output_path=None, progress_callback=None):
+        if input_path == "crash.mp4":
+            os._exit(3)
+        progress_callback("render", 0.8, FFmpegProgress(frame=12, out_time=0.5))
+        return ProcessingResult(success=True, input_path=input_path, output_path=output_path,
+                                frames_processed=os.getpid(), metrics={"spans": [], "counters": {}})
+
+
+def test_jobs_run_in_forked_children():
+    """Each job runs in its own process and reports back to the parent's callback"""
+    editor = PreforkEditor(ForkedFakeEditor())
+    editor.warm_up()
+    seen = []
+
+    async def run():
+        ok = await editor.process_video("a.mp4", "out.mp4",
+                                        progress_callback=lambda *args: seen.append(args))
+        crashed = await editor.process_video("crash.mp4")
+        return ok, crashed
+
+    ok, crashed = asyncio.run(run())
+    server_pid = editor._server_pid
+    editor.close()
+
+    assert ok.success and ok.output_path == "out.mp4"
+    assert ok.frames_processed not in (os.getpid(), server_pid)
+    assert "startup" in ok.metrics
+    assert seen == [("render", 0.8, FFmpegProgress(frame=12, out_time=0.5))]
+    assert not crashed.success and "status 3" in crashed.error_message
+
+    print("✅ Prefork test passed")
+
+
+if __name__ == "__main__":
+    test_jobs_run_in_forked_children()
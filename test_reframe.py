@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Test auto-reframing: the crop path follows a moving subject and becomes sendcmd commands"""
+
+import subprocess
+import tempfile
+from pathlib import Path
+
+from src.video.probe import VideoProbe
+from src.video.reframe import CropPath, Reframer, crop_size
+
+
+def test_crop_path_follows_a_moving_subject():
+    """A box sliding right across a flat background stays inside the 9:16 window"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source = str(Path(tmp) / "pan.mp4")
+        subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'color=gray:s=640x360:r=30:d=6',
+                        '-f', 'lavfi', '-i', 'color=red:s=80x80:r=30:d=6',
+                        '-filter_complex', "[0][1]overlay=x='40+90*t':y=140",
+                        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-y', source], check=True)
+        probe = VideoProbe(duration=6.0, width=640, height=360, fps=30.0, video_codec="h264")
+        path = Reframer().plan(source, probe)
+
+    assert (path.crop_width, path.crop_height) == (202, 360)
+    xs = [x for _, x in path.points]
+    assert xs == sorted(xs) and xs[-1] - xs[0] > 300
+    for timestamp in (1.0, 2.0, 3.0, 4.0):
+        box_left = 40 + 90 * timestamp
+        assert path.x_at(timestamp) <= box_left and box_left + 80 <= path.x_at(timestamp) + path.crop_width
+
+    print("✅ Reframe tracking test passed")
+
+
+def test_sendcmd_script_only_on_change():
+    """Commands are emitted at frame times, and only where the interpolated x moves"""
+    assert crop_size(1080, 1920) is None
+    path = CropPath(640, 360, 202, 360, [(0.0, 100), (1.0, 100), (2.0, 110)])
+    lines = path.sendcmd_script(fps=10, duration=2.0).splitlines()
+    assert lines[0] == "0.0000 crop@reframe x 100;"
+    assert lines[1] == "1.1000 crop@reframe x 101;"
+    assert len(lines) == 11
+
+    print("✅ Reframe command script test passed")
+
+
+if __name__ == "__main__":
+    test_crop_path_follows_a_moving_subject()
+    test_sendcmd_script_only_on_change()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Test that concurrent frame-analysis requests share one completion call"""
+
+import asyncio
+import json
+
+from src.video.request_coalescer import AnalysisCoalescer
+
+
+class RecordingClient:
+    """Answers every coalesced request with one section per video"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def create_completion(self, model, messages, temperature, max_tokens):
+        content = messages[0]["content"]
+        self.calls.append(content)
+        headers = [p["text"].split()[2] for p in content if p.get("text", "").startswith("=== VIDEO")]
+        if not headers:
+            return {"choices": [{"message": {"content": json.dumps({"edits_to_apply": [], "single": True})}}]}
+        videos = {vid: {"edits_to_apply": [{"frame_index": 0, "text": vid}]} for vid in headers}
+        return {"choices": [{"message": {"content": json.dumps({"videos": videos})}}]}
+
+
+def frame_parts(name):
+    return [{"type": "text", "text": f"Frame 1 of {name}"},
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}}]
+
+
+def test_concurrent_requests_are_coalesced():
+    """Three videos within one window become one request and get their own sections back"""
+    async def run():
+        client = RecordingClient()
+        coalescer = AnalysisCoalescer(client, window_seconds=0.01)
+        prompt = {"type": "text", "text": "Analyze these frames"}
+        results = await asyncio.gather(*[coalescer.submit(prompt, frame_parts(n)) for n in ("a", "b", "c")])
+        return client, [json.loads(r) for r in results]
+
+    client, results = asyncio.run(run())
+    assert len(client.calls) == 1
+    assert [r["edits_to_apply"][0]["text"] for r in results] == ["v1", "v2", "v3"]
+    # Each video keeps its own instructions (e.g. how to read contact sheet cells) under its header
+    texts = [p.get("text") for p in client.calls[0]]
+    assert all(texts[texts.index(f"=== VIDEO v{i} ===") + 1] == "Analyze these frames" for i in (1, 2, 3))
+    print("✅ Three videos coalesced into one request")
+
+
+def test_lone_request_uses_its_own_prompt():
+    """A request alone in its window is sent unchanged"""
+    async def run():
+        client = RecordingClient()
+        coalescer = AnalysisCoalescer(client, window_seconds=0.01)
+        result = await coalescer.submit({"type": "text", "text": "Analyze these frames"}, frame_parts("a"))
+        return client, json.loads(result)
+
+    client, result = asyncio.run(run())
+    assert result["single"] is True
+    assert client.calls[0][0]["text"] == "Analyze these frames"
+    print("✅ Lone request sent with its own prompt")
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_are_coalesced()
+    test_lone_request_uses_its_own_prompt()
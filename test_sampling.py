@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Test adaptive frame budgets and coarse-to-fine timestamp planning"""
+
+from src.video.sampling import dense_timestamps, intervals_around, plan_sampling_budget
+
+
+def test_budget_scales_with_duration_and_ceiling():
+    """Short clips get the floor, long videos hit the cost ceiling"""
+    short = plan_sampling_budget(8.0, frames_per_minute=20, min_frames=5, max_frames=24)
+    medium = plan_sampling_budget(45.0, frames_per_minute=20, min_frames=5, max_frames=24)
+    long = plan_sampling_budget(480.0, frames_per_minute=20, min_frames=5, max_frames=24)
+
+    assert short.total_frames == 5
+    assert medium.total_frames == 15
+    assert long.total_frames == 24
+    assert long.coarse_frames + long.fine_frames == long.total_frames
+    print(f"✅ Budgets: 8s={short.total_frames}, 45s={medium.total_frames}, 480s={long.total_frames}")
+
+
+def test_fine_pass_stays_inside_intervals():
+    """The fine round spends its whole budget inside the refined intervals, avoiding coarse samples"""
+    intervals = intervals_around([2.0, 2.5, 9.0], radius=1.0, duration=10.0)
+    assert intervals == [(1.0, 3.5), (8.0, 10.0)]
+
+    timestamps = dense_timestamps(intervals, 6, exclude=[2.0])
+    assert len(timestamps) == 6
+    assert all(any(s <= t <= e for s, e in intervals) for t in timestamps)
+    assert all(abs(t - 2.0) >= 0.05 for t in timestamps)
+    print(f"✅ Fine samples: {[round(t, 2) for t in timestamps]}")
+
+
+if __name__ == "__main__":
+    test_budget_scales_with_duration_and_ceiling()
+    test_fine_pass_stays_inside_intervals()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Test dead-air detection and the keyframe-aligned stream-copy trim"""
+
+import subprocess
+import tempfile
+from pathlib import Path
+
+from src.video.audio_features import AudioFeatures
+from src.video.edit_list import Edit, EditList
+from src.video.frame_processor import FrameProcessor
+from src.video.heuristic_analyzer import WindowScores
+from src.video.probe import VideoProbe
+from src.video.trim import TrimPlan, align_to_keyframes, apply_trim, find_dead_air
+
+
+def make_windows(motions):
+    return [WindowScores(start=float(i), end=float(i + 1), motion=m) for i, m in enumerate(motions)]
+
+
+def test_dead_lead_in_and_tail_are_found():
+    """Only silent, static runs at either end count; speech over a still frame does not"""
+    windows = make_windows([0.0, 0.0, 0.0, 0.05, 0.05, 0.0, 0.0, 0.0])
+    silent = AudioFeatures(silences=[(0.0, 3.0), (6.0, 8.0)])
+    plan = find_dead_air(windows, silent, 8.0, has_audio=True)
+    assert (plan.start, plan.end) == (3.0, 6.0)
+
+    talking_intro = AudioFeatures(silences=[(6.0, 8.0)])
+    assert find_dead_air(windows, talking_intro, 8.0, has_audio=True).start == 0.0
+    assert find_dead_air(windows, None, 8.0, has_audio=True) is None
+    assert find_dead_air(make_windows([0.05, 0.0, 0.05]), None, 3.0, has_audio=False) is None
+
+    aligned = align_to_keyframes(TrimPlan(3.4, 5.2, 8.0), [0.0, 2.0, 4.0, 6.0])
+    assert (aligned.start, aligned.end) == (2.0, 6.0)
+    assert align_to_keyframes(TrimPlan(0.5, 8.0, 8.0), [0.0, 2.0]) is None
+    print("✅ Dead-air detection test passed")
+
+
+def test_trim_stream_copies_the_kept_span():
+    """The lead-in and tail are cut without re-encoding and edits move onto the new timeline"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source, output = str(Path(tmp) / "in.mp4"), str(Path(tmp) / "out.mp4")
+        subprocess.run(['ffmpeg', '-v', 'error',
+                        '-f', 'lavfi', '-i', 'color=black:size=160x120:rate=10:duration=2',
+                        '-f', 'lavfi', '-i', 'testsrc2=size=160x120:rate=10:duration=3',
+                        '-f', 'lavfi', '-i', 'color=black:size=160x120:rate=10:duration=2',
+                        '-filter_complex', '[0][1][2]concat=n=3', '-c:v', 'libx264', '-bf', '0', '-g', '10',
+                        '-sc_threshold', '0', '-pix_fmt', 'yuv420p', '-y', source], check=True)
+        keyframes = [(float(t), float(t)) for t in range(7)]
+
+        plan = TrimPlan(2.0, 5.0, 7.0)
+        assert apply_trim(source, output, plan, keyframes)
+
+        probe = VideoProbe(duration=3.0, width=160, height=120, fps=10.0, video_codec="h264")
+        frames = [f.mean() for _, f in FrameProcessor().iter_frames(output, width=160, height=120, probe=probe)]
+        assert len(frames) == 30
+        assert min(frames) > 50
+
+    edits = EditList([Edit(2.5, 4.0, "text_overlay", text="Hi"), Edit(4.5, 6.5, "effect_enhancement")])
+    shifted = edits.shifted(-plan.start, plan.duration)
+    assert [(e.start, e.end) for e in shifted] == [(0.5, 2.0), (2.5, 3.0)]
+    print("✅ Stream-copy trim test passed")
+
+
+if __name__ == "__main__":
+    test_dead_lead_in_and_tail_are_found()
+    test_trim_stream_copies_the_kept_span()